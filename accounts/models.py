@@ -12,6 +12,8 @@ from django.conf import settings
 
 import uuid
 
+from mediafiles.variants import track
+
 class CustomAccountManager(BaseUserManager):
   def _create_user(self, email, password, **extra_fields):
     if not email:
@@ -60,6 +62,7 @@ class User(AbstractBaseUser, PermissionsMixin):
   last_name = models.CharField(_('last name'), max_length=150, blank=True)
   middle_name = models.CharField(_('middle name'), max_length=150, blank=True)
   avatar = models.ImageField(_('avatar'), upload_to='avatars/', default='avatars/default')
+  avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
   role = models.CharField(_('role'), max_length=20, choices=ROLE, default='user')
   gender = models.CharField(_('gender'), max_length=1, choices=GENDER, default='M')
 
@@ -105,4 +108,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     if self.avatar:
       return self.avatar.url
     return settings.STATIC_URL + 'images/default-avatar.png'
-  
+
+
+track(User, 'avatar')
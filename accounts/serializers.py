@@ -1,10 +1,13 @@
 from rest_framework import serializers
 from .models import User
+from mediafiles.serializers import ImageVariantsField
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    avatar_srcset = ImageVariantsField('avatar')
+
     class Meta:
         model = User
-        fields = ['id', 'email', 'first_name', 'last_name', 'middle_name', 'avatar', 'gender', 'address', 'city', 'phone', 'date_of_birth', 'bio', 'website']
+        fields = ['id', 'email', 'first_name', 'last_name', 'middle_name', 'avatar', 'avatar_srcset', 'gender', 'address', 'city', 'phone', 'date_of_birth', 'bio', 'website']
         read_only_fields = ['email', 'id']
 
 class UserProfileUpdateSerializer(serializers.ModelSerializer):
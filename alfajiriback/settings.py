@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'django_filters',
     'import_export',
 
+    'core',
     'accounts',
     'jobs',
     'categories',
@@ -37,6 +38,8 @@ INSTALLED_APPS = [
     'locations',
     'payments',
     'plans',
+    'notifications',
+    'mediafiles',
 ]
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -77,6 +80,25 @@ ROOT_URLCONF = 'alfajiriback.urls'
 
 IMPORT_EXPORT_USE_TRANSACTIONS = True
 
+# Seconds between background flushes of buffered job view/click/bookmark counters
+JOB_COUNTERS_FLUSH_INTERVAL = config('JOB_COUNTERS_FLUSH_INTERVAL', default=10, cast=int)
+
+# Days raw impression/click rows are kept once compacted into the daily job stats
+JOB_EVENTS_RETENTION_DAYS = config('JOB_EVENTS_RETENTION_DAYS', default=90, cast=int)
+
+# Seconds a worker trusts its taxonomy cache (categories, locations, ...) before re-reading the version stamp
+TAXONOMY_CACHE_CHECK_INTERVAL = config('TAXONOMY_CACHE_CHECK_INTERVAL', default=1, cast=float)
+
+# Seconds anonymous job/taxonomy responses are served from cache, and served stale while one request recomputes
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=60, cast=int)
+RESPONSE_CACHE_STALE_TIMEOUT = config('RESPONSE_CACHE_STALE_TIMEOUT', default=300, cast=int)
+
+# Rows validated and written per transaction by the background bulk imports
+BULK_IMPORT_CHUNK_SIZE = config('BULK_IMPORT_CHUNK_SIZE', default=500, cast=int)
+
+# Rows read per query by the streaming CSV/NDJSON/XLSX exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
@@ -122,6 +144,16 @@ DATABASES = {
     }
 }
 
+# Version stamps in this cache invalidate every worker's local copies (see core.caching and
+# core.taxonomy), so it must be shared between processes when there is more than one,
+# e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 # DATABASES = {
 #   'DEFAULT': {
 #     'ENGINE': 'django.db.backends.backends.mysql',
@@ -173,6 +205,10 @@ STATIC_URL = '/static/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 MEDIA_URL = '/media/'
+# Browser cache lifetime of media files whose name is not content-addressed
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)
+# Internal nginx location (e.g. /protected-media/) to hand media transfers to with X-Accel-Redirect
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -4,6 +4,8 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.views.static import serve
 
+from mediafiles.views import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include(('accounts.urls', 'accounts'), namespace='accounts')),
@@ -12,5 +14,5 @@ urlpatterns = [
     path('locations/', include(('locations.urls', 'locations'), namespace='locations')),
     path('categories/', include(('categories.urls', 'categories'), namespace='categories')),
     path('payments/', include(('payments.urls', 'payments'), namespace='payments')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) \
-+ static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
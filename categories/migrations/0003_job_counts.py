@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_alter_category_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
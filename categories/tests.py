@@ -1,3 +1,33 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from jobs.models import Job
+
+from .models import Category
+
+
+class CategoryEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Design')
+        for index in range(5):
+            Job.objects.create(title=f'Designer {index}', category=cls.category)
+
+    def test_list_has_no_jobs(self):
+        response = APIClient().get('/categories/')
+        self.assertEqual(response.json(), [{
+            'id': self.category.id, 'name': 'Design', 'slug': 'design', 'description': None,
+            'job_count': 5, 'active_job_count': 5, 'total_jobs': 5,
+        }])
+
+    def test_detail_pages_through_jobs(self):
+        client = APIClient()
+        with self.assertNumQueries(2):
+            response = client.get('/categories/design/', {'page_size': 3})
+        jobs = response.json()['jobs']
+        self.assertEqual([job['title'] for job in jobs['results']], ['Designer 4', 'Designer 3', 'Designer 2'])
+        self.assertIn('get_company', jobs['results'][0])
+
+        jobs = client.get(jobs['next']).json()['jobs']
+        self.assertEqual([job['title'] for job in jobs['results']], ['Designer 1', 'Designer 0'])
+        self.assertIsNone(jobs['next'])
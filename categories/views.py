@@ -4,17 +4,25 @@ from rest_framework.generics import ListAPIView, RetrieveAPIView, ListCreateAPIV
 from .models import Category
 from .serializers import CategorySerializer
 from rest_framework import filters
+from core.conditional import ConditionalGetMixin
+from core.response_cache import CachedResponseMixin
+from jobs.views import NestedJobsMixin
 
 
 
 
-class CategoryListAPIView(ListCreateAPIView):
+class CategoryListAPIView(CachedResponseMixin, ConditionalGetMixin, ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     parser_classes = (MultiPartParser, FormParser)
 
-class CategoryDetailAPIView(RetrieveUpdateDestroyAPIView):
+    def get_validators(self, request):
+        # Category saves and deletes, and the job counts, move the jobs cache version.
+        return [], None
+
+class CategoryDetailAPIView(NestedJobsMixin, RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
-    lookup_url_kwarg = 'category_slug'
\ No newline at end of file
+    lookup_url_kwarg = 'category_slug'
+    jobs_lookup = 'category'
\ No newline at end of file
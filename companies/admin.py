@@ -1,10 +1,14 @@
-from import_export.admin import ImportExportModelAdmin
 from django.contrib import admin
 
+from core.admin import BulkImportAdminMixin
+from core.exports import StreamingExportAdminMixin
 from .models import Company
+from .resource import CompanyResource
 
 
-class CompanyAdmin(ImportExportModelAdmin):
+class CompanyAdmin(BulkImportAdminMixin, StreamingExportAdminMixin, admin.ModelAdmin):
+    bulk_import_resource = 'companies'
+    export_resource_class = CompanyResource
     list_display = ('name', 'slug', 'user', 'category', 'created_at', 'updated_at')
     search_fields = ('name', 'slug', 'user__username')
     prepopulated_fields = {'slug': ('name',)}
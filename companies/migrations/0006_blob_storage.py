@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:50
+
+import mediafiles.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_company_cover_variants_company_logo_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='cover',
+            field=models.ImageField(blank=True, null=True, storage=mediafiles.storage.get_blob_storage, upload_to='companies/', verbose_name='Cover'),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=mediafiles.storage.get_blob_storage, upload_to='companies/logos/'),
+        ),
+    ]
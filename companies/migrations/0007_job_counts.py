@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='active_job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,17 +1,17 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
-from django.utils.text import slugify
 from django.conf import settings
-from django.core.mail import send_mail
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.db.models import Count
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 
 from locations.models import Location
 from categories.models import Category
+from core.models import JobCounts, UniqueSlugMixin
+from notifications import outbox
+from mediafiles.variants import track
+from mediafiles.storage import get_blob_storage, track_references
 
 User = settings.AUTH_USER_MODEL
 
@@ -21,12 +21,15 @@ class CompanyManager(models.Manager):
         return self.annotate(total_jobs_count=Count('job'))
 
 
-class Company(models.Model):
+class Company(UniqueSlugMixin, JobCounts):
     name = models.CharField(max_length=255, verbose_name=_('Name'))
     slug = models.SlugField(max_length=255, unique=True, verbose_name=_('Slug'))
     description = models.TextField(verbose_name=_('Description'), blank=True, null=True)
-    logo = models.ImageField(upload_to='companies/logos/', blank=True, null=True)
-    cover = models.ImageField(upload_to='companies/', verbose_name=_('Cover'), blank=True, null=True)
+    logo = models.ImageField(upload_to='companies/logos/', storage=get_blob_storage, blank=True, null=True)
+    cover = models.ImageField(upload_to='companies/', storage=get_blob_storage, verbose_name=_('Cover'), blank=True,
+                              null=True)
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)
+    cover_variants = models.JSONField(default=dict, blank=True, editable=False)
     website = models.URLField(verbose_name=_('Website'), blank=True, null=True)
     phone = models.CharField(max_length=255, verbose_name=_('Phone'), blank=True, null=True)
     email = models.EmailField(verbose_name=_('Email'), blank=True, null=True)
@@ -38,7 +41,6 @@ class Company(models.Model):
                                  related_name='companies')
     location = models.ForeignKey(Location, null=True, blank=True, on_delete=models.CASCADE, verbose_name=_('Location'),
                                  related_name='companies')
-    job_count = models.PositiveIntegerField(blank=True, null=True)
     is_active = models.BooleanField(default=True, verbose_name=_('Is active'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
@@ -68,31 +70,24 @@ class Company(models.Model):
         return ''
 
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super(Company, self).save(*args, **kwargs)
-
-
 @receiver(post_save, sender=Company)
 def send_company_notification(sender, instance, created, **kwargs):
     if created and instance.email:  # Check if it's a new company and email is provided
         # Email to admin
-        admin_subject = f"New Company Added: {instance.name}"
-        admin_message = f"A new company has been added:\n\nName: {instance.name}\nDescription: {instance.truncated_description}\nWebsite: {instance.website}"
-        admin_from_email = settings.DEFAULT_FROM_EMAIL
-        admin_recipient_list = [settings.ADMIN_EMAIL]
-
-        send_mail(admin_subject, admin_message, admin_from_email, admin_recipient_list)
+        outbox.enqueue(
+            subject=f"New Company Added: {instance.name}",
+            body=f"A new company has been added:\n\nName: {instance.name}\n"
+                 f"Description: {instance.truncated_description}\nWebsite: {instance.website}",
+            to=[settings.ADMIN_EMAIL],
+        )
 
         # Email to company
-        company_subject = f"Welcome to Our Platform, {instance.name}!"
-        html_message = render_to_string('emails/company_welcome.html', {'company': instance})
-        plain_message = strip_tags(html_message)
-        company_from_email = settings.DEFAULT_FROM_EMAIL
-        company_recipient_list = [instance.email]
-
-        send_mail(company_subject, plain_message, company_from_email, company_recipient_list, html_message=html_message)
+        outbox.enqueue(
+            subject=f"Welcome to Our Platform, {instance.name}!",
+            template='emails/company_welcome.html',
+            context={'company': instance},
+            to=[instance.email],
+        )
 
 def get_jobs(self):
     return self.jobs.all()
@@ -103,3 +98,8 @@ def get_logo_url(self):
         return self.logo.url
     else:
         return '/static/images/default-company-logo.png'
+
+
+track(Company, 'logo')
+track(Company, 'cover')
+track_references(Company, 'logo', 'cover')
@@ -1,13 +1,17 @@
 from import_export import resources, fields
 from import_export.widgets import ForeignKeyWidget, ManyToManyWidget
 
+from core.bulk_import import BulkImportMixin
+from core.caching import bump_version
+from jobs import search
+
 from .models import Company
 from locations.models import Location
 from categories.models import Category
 from accounts.models import User
 
 
-class CompanyResource(resources.ModelResource):
+class CompanyResource(BulkImportMixin, resources.ModelResource):
     name = fields.Field(attribute='name', column_name='Name')
     location = fields.Field(attribute='location', column_name='Location', widget=ForeignKeyWidget(Location, 'name'))
     address = fields.Field(attribute='address', column_name='Address')
@@ -15,12 +19,17 @@ class CompanyResource(resources.ModelResource):
     email = fields.Field(attribute='email', column_name='Email')
     website = fields.Field(attribute='website', column_name='Website')
     phone = fields.Field(attribute='phone', column_name='Phone')
-    logo = fields.Field(attribute='image', column_name='Logo')
+    logo = fields.Field(attribute='logo', column_name='Logo')
     user = fields.Field(attribute='user', column_name='User', widget=ForeignKeyWidget(User, 'email'))
     description = fields.Field(attribute='description', column_name='Description')
 
 
     class Meta:
         model = Company
-        fields = ('id', 'name', 'location', 'address', 'category', 'company', 'email', 'website', 'phone', 'logo', 'user', 'description')
+        fields = ('id', 'name', 'location', 'address', 'category', 'email', 'website', 'phone', 'logo', 'user', 'description')
         export_order = fields
+
+    def bulk_chunk_saved(self, created_ids, updated_ids):
+        # Company names are part of the job search documents.
+        search.index_jobs(company_ids=updated_ids)
+        bump_version('jobs')
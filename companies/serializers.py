@@ -1,8 +1,8 @@
 from rest_framework import serializers
 
-from jobs.models import Job
 from jobs.serializers import JobSerializer
 from .models import Company
+from mediafiles.serializers import ImageVariantsField
 
 from accounts.models import User
 from locations.models import Location
@@ -33,14 +33,16 @@ class CompanySerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     logo = serializers.ImageField(required=False)
     cover = serializers.ImageField(required=False)
-
+    logo_srcset = ImageVariantsField('logo')
+    cover_srcset = ImageVariantsField('cover')
 
     class Meta:
         model = Company
         fields = (
-        'id', 'name', 'slug', 'logo', 'cover', 'phone', 'email', 'website', 'truncated_description', 'description',
-        'job_count', 'user', 'address', 'location', 'category', 'created_at', 'updated_at')
-        read_only_fields = ('slug', 'created_at', 'updated_at', 'user', 'location', 'category', 'job_count')
+        'id', 'name', 'slug', 'logo', 'cover', 'logo_srcset', 'cover_srcset', 'phone', 'email', 'website',
+        'truncated_description', 'description', 'job_count', 'active_job_count',
+        'user', 'address', 'location', 'category', 'created_at', 'updated_at')
+        read_only_fields = ('slug', 'created_at', 'updated_at', 'user', 'location', 'category', 'job_count', 'active_job_count')
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -49,7 +51,4 @@ class CompanySerializer(serializers.ModelSerializer):
                 representation[field] = ''
         return representation
 
-    def get_total_jobs(self, company):
-        return Job.objects.filter(company=company).count()
-
 
@@ -1,3 +1,75 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from jobs import counters
+from jobs.models import Job, JobDailyStats
+
+from .models import Company
+
+
+@override_settings(JOB_COUNTERS_FLUSH_INTERVAL=0)
+class MyCompanyAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='owner@example.com', password='secret')
+        cls.company = Company.objects.create(name='Acme', slug='acme', user=cls.user)
+        cls.other = Company.objects.create(name='Other', slug='other')
+        cls.today = timezone.localdate()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.addCleanup(counters.buffer.clear)
+
+    def create_jobs(self, company, count):
+        jobs = [Job.objects.create(title=f'{company.name} job {i}', company=company) for i in range(count)]
+        for job in jobs:
+            JobDailyStats.objects.create(job=job, date=self.today, impressions=10, views=4, clicks=2, applications=1)
+            JobDailyStats.objects.create(job=job, date=self.today - timedelta(days=2), views=6)
+        return jobs
+
+    def test_series_per_job_and_company(self):
+        self.create_jobs(self.company, 2)
+        self.create_jobs(self.other, 1)
+        response = self.client.get('/companies/my/analytics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['jobs']), 2)
+        [company] = response.data['companies']
+        self.assertEqual(len(company['series']), 30)
+        self.assertEqual(company['series'][-1]['period'], self.today)
+        self.assertEqual(company['totals']['views'], 20)
+        self.assertEqual(company['totals']['conversion_rate'], 0.1)
+        self.assertEqual(company['totals']['click_through_rate'], 0.2)
+
+    def test_constant_queries(self):
+        for total in (1, 8):
+            self.create_jobs(self.company, total - Job.objects.count())
+            with self.assertNumQueries(3):
+                response = self.client.get('/companies/my/analytics/', {'granularity': 'week'})
+            self.assertEqual(response.status_code, 200)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/companies/my/analytics/', {'granularity': 'hour'}).status_code, 400)
+        self.assertEqual(self.client.get('/companies/my/analytics/', {'start': '2024-02-30'}).status_code, 400)
+        self.assertEqual(self.client.get('/companies/my/analytics/', {'start': '2020-01-01'}).status_code, 400)
+
+    def test_counter_flush_feeds_daily_views(self):
+        [job] = self.create_jobs(self.company, 1)
+        counters.record_list_views([job.pk, job.pk])
+        counters.flush()
+        stats = JobDailyStats.objects.get(job=job, date=self.today)
+        self.assertEqual((stats.views, stats.impressions), (6, 10))
+
+    def test_detail_view_clicks(self):
+        job = Job.objects.create(title='Designer', company=self.company)
+        JobDailyStats.objects.create(job=job, date=self.today, impressions=4)
+        # A view within the click window of the previous one counts as a click.
+        for _ in range(3):
+            self.client.get(f'/jobs/{job.slug}/')
+            counters.flush()
+        totals = self.client.get('/companies/my/analytics/').data['companies'][0]['totals']
+        self.assertEqual((totals['views'], totals['clicks'], totals['click_through_rate']), (3, 2, 0.5))
@@ -1,13 +1,15 @@
 from django.urls import path
 
 from .views import (CompanyListCreateAPIView, CompanyRetrieveUpdateDestroyAPIView, CategoryCompanyViewSet,
-                    MyCompanyViewSet)
+                    MyCompanyViewSet, MyCompanyAnalyticsView, CompanyExportView)
 
 app_name = 'companies'
 
 urlpatterns = [
     path('', CompanyListCreateAPIView.as_view(), name='list_create'),
     path('my/', MyCompanyViewSet.as_view(), name='user_list'),
+    path('my/analytics/', MyCompanyAnalyticsView.as_view(), name='my_analytics'),
+    path('export/', CompanyExportView.as_view(), name='export'),
     path('<slug:slug>/', CompanyRetrieveUpdateDestroyAPIView.as_view(), name='retrieve_update_destroy'),
     path('category/<slug:slug>/', CategoryCompanyViewSet.as_view(), name='category_list'),
 
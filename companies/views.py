@@ -4,30 +4,41 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, ListAPIView
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.authentication import TokenAuthentication
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 
 from .models import Company
+from .resource import CompanyResource
 from .serializers import CompanySerializer
 
 from accounts.models import User
-from categories.models import Category
-from locations.models import Location
+from core import taxonomy
+from core.conditional import ConditionalGetMixin
+from core.exports import ExportAPIView
+from core.pagination import KeysetPagination
+from core.response_cache import CachedResponseMixin
+from jobs.analytics import employer_analytics, parse_range
 
 class CategoryCompanyViewSet(ListAPIView):
     serializer_class = CompanySerializer
     lookup_field = 'slug'
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        category = Category.objects.get(slug=self.kwargs['slug'])
+        category = taxonomy.categories.get_by_slug(self.kwargs['slug'])
+        if category is None:
+            raise NotFound()
         return Company.objects.filter(category=category)
 
 
-class CompanyListCreateAPIView(ListCreateAPIView):
+class CompanyListCreateAPIView(CachedResponseMixin, ListCreateAPIView):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     lookup_field = 'slug'
+    pagination_class = KeysetPagination
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
     def perform_create(self, serializer):
@@ -40,11 +51,18 @@ class CompanyListCreateAPIView(ListCreateAPIView):
         return []
 
 
-class CompanyRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
+class CompanyRetrieveUpdateDestroyAPIView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     lookup_field = 'slug'
 
+    def get_validators(self, request):
+        # The job counters are updated without touching updated_at, and go down when
+        # jobs are deleted, so no date covers them: only the ETag is sent.
+        row = Company.objects.filter(slug=self.kwargs['slug']).values(
+            'updated_at', 'job_count', 'active_job_count').first()
+        return None if row is None else (list(row.values()), None)
+
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -74,34 +92,58 @@ class CompanyRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
             return Response(serializer.data)
         return Response(serializer.errors)
 
+
+class CompanyExportView(ExportAPIView):
+    queryset = Company.objects.all()
+    resource_class = CompanyResource
+    filename = 'companies'
+
     
 class CompanyLocationViewSet(ListAPIView):
     serializer_class = CompanySerializer
     lookup_field = 'slug'
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        location = Location.objects.get(slug=self.kwargs['slug'])
+        location = taxonomy.locations.get_by_slug(self.kwargs['slug'])
+        if location is None:
+            raise NotFound()
         return Company.objects.filter(location=location)
     
     
 class CompanyCategoryViewSet(ListAPIView):
     serializer_class = CompanySerializer
     lookup_field = 'slug'
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        category = Category.objects.get(slug=self.kwargs['slug'])
+        category = taxonomy.categories.get_by_slug(self.kwargs['slug'])
+        if category is None:
+            raise NotFound()
         return Company.objects.filter(category=category)
     
     
 class MyCompanyViewSet(ListAPIView):
     serializer_class = CompanySerializer
     lookup_field = 'slug'
+    pagination_class = KeysetPagination
     # permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         user =self.request.user
         return Company.objects.filter(user=user)
 
-        
+
+class MyCompanyAnalyticsView(APIView):
+    """
+    Views, clicks, bookmarks, applications and conversion rates of the jobs of the
+    companies owned by the user, per job and per company. Accepts `start`, `end`
+    (YYYY-MM-DD, the last 30 days by default) and `granularity` (day, week or month).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        start, end, granularity = parse_range(request.query_params)
+        return Response(employer_analytics(request.user, start, end, granularity))
@@ -0,0 +1,68 @@
+from urllib.parse import urlencode
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.urls import path, reverse
+from django.utils.translation import gettext_lazy as _
+from import_export.admin import ImportExportMixinBase
+
+from .models import ImportJob
+
+
+class BulkImportAdminMixin(ImportExportMixinBase):
+    """
+    Puts the import-export Import button on the changelist, but instead of the
+    row-by-row import it opens a new ImportJob for `bulk_import_resource` (a key of
+    `core.bulk_import.RESOURCES`), which `manage.py run_imports` runs in bulk.
+    """
+    bulk_import_resource = None
+    import_export_change_list_template = 'admin/import_export/change_list_import.html'
+
+    def has_import_permission(self, request):
+        return request.user.has_perm('core.add_importjob')
+
+    def get_urls(self):
+        info = self.get_model_info()
+        return [
+            path('import/', self.admin_site.admin_view(self.import_action), name='%s_%s_import' % info),
+            *super().get_urls(),
+        ]
+
+    def import_action(self, request):
+        if not self.has_import_permission(request):
+            raise PermissionDenied
+        url = reverse('admin:core_importjob_add')
+        return redirect(f'{url}?{urlencode({"resource": self.bulk_import_resource})}')
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), 'has_import_permission': self.has_import_permission(request)}
+        return super().changelist_view(request, extra_context)
+
+
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'resource', 'status', 'progress_display', 'created_rows', 'updated_rows', 'error_rows',
+                    'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'resource')
+    readonly_fields = ('status', 'progress_display', 'total_rows', 'processed_rows', 'created_rows', 'updated_rows',
+                       'error_rows', 'errors', 'last_error', 'created_by', 'created_at', 'started_at', 'finished_at')
+    list_per_page = 20
+
+    @admin.display(description=_('Progress'))
+    def progress_display(self, obj):
+        return f'{obj.progress}% ({obj.processed_rows}/{obj.total_rows})'
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return ('resource', 'file', *self.readonly_fields)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+        if not change:
+            messages.info(request, _('The import is queued and runs in the background (manage.py run_imports).'))
+
+
+admin.site.register(ImportJob, ImportJobAdmin)
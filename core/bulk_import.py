@@ -0,0 +1,329 @@
+import logging
+import os
+from collections import defaultdict
+
+import tablib
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from import_export.widgets import ForeignKeyWidget, ManyToManyWidget
+
+from mediafiles import storage, variants
+
+from . import slugs
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# ImportJob.resource -> import-export resource
+RESOURCES = {
+    'jobs': 'jobs.resource.JobResource',
+    'companies': 'companies.resource.CompanyResource',
+}
+# File extension -> tablib format; the text formats are decoded first.
+FORMATS = {'.csv': 'csv', '.tsv': 'tsv', '.xlsx': 'xlsx', '.json': 'json'}
+TEXT_FORMATS = {'csv', 'tsv', 'json'}
+# Row errors kept on the ImportJob; the others are only counted.
+MAX_ERRORS = 100
+PROGRESS_FIELDS = ['processed_rows', 'created_rows', 'updated_rows', 'error_rows', 'errors']
+
+# Marks a related value that matches several rows.
+AMBIGUOUS = object()
+
+
+class BulkImportMixin:
+    """
+    Hooks of an import-export resource for the bulk imports. These write with
+    bulk_create and bulk_update, which send no model signals. No per-row
+    notifications are sent, and what the other receivers keep up to date is
+    refreshed here once per chunk or per import. Blob references and image
+    variants are handled by the importer itself.
+    """
+
+    def bulk_chunk_saved(self, created_ids, updated_ids):
+        """Called in the transaction of each chunk, once its rows are written."""
+
+    def bulk_import_finished(self, created_ids, updated_ids):
+        """Called once every chunk is written."""
+
+
+class BulkImporter:
+    """
+    Imports rows (dicts keyed by column name) through the declared fields of an
+    import-export resource, one chunk at a time. For each chunk:
+
+    - the ForeignKeyWidget and ManyToManyWidget values are resolved with one
+      IN query per related model and lookup field;
+    - the rows to update are read with one query on the import id field;
+    - every row is validated, and rows with errors are skipped and reported;
+    - the rest are written with bulk_create and bulk_update, and new rows get
+      their slugs from one allocation for the whole chunk.
+
+    Resource fields without a matching model field are ignored.
+    """
+
+    def __init__(self, resource):
+        self.resource = resource
+        self.model = resource._meta.model
+        self.columns = []
+        for field in resource.get_import_fields():
+            try:
+                model_field = self.model._meta.get_field(field.attribute or '')
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete or model_field.many_to_many:
+                self.columns.append((field, model_field))
+        self.id_field = resource.fields[resource._meta.import_id_fields[0]]
+        self.allocates_slugs = hasattr(self.model, 'slug_source')
+
+    @staticmethod
+    def _is_relation(field):
+        return isinstance(field.widget, (ForeignKeyWidget, ManyToManyWidget))
+
+    def _related_values(self, field, row):
+        value = row.get(field.column_name)
+        if value is None or value == '':
+            return []
+        if isinstance(field.widget, ManyToManyWidget):
+            return [part.strip() for part in str(value).split(field.widget.separator) if part.strip()]
+        return [str(value).strip()]
+
+    def _resolve(self, rows):
+        """(model, lookup field) -> {value: pk} for the related values of `rows`."""
+        wanted = defaultdict(set)
+        for field, _ in self.columns:
+            if self._is_relation(field):
+                for row in rows:
+                    wanted[field.widget.model, field.widget.field].update(self._related_values(field, row))
+        resolved = {}
+        for (model, lookup), values in wanted.items():
+            found = resolved[model, lookup] = {}
+            if not values:
+                continue
+            for value, pk in model._default_manager.filter(**{f'{lookup}__in': values}).values_list(lookup, 'pk'):
+                value = str(value)
+                found[value] = AMBIGUOUS if value in found else pk
+        return resolved
+
+    def _key(self, row):
+        if self.id_field.column_name not in row:
+            return None
+        try:
+            return self.id_field.clean(row)
+        except ValueError:
+            return None
+
+    def _existing(self, rows):
+        keys = {key for key in map(self._key, rows) if key is not None}
+        if not keys:
+            return {}
+        field_name = self.model._meta.get_field(self.id_field.attribute).name
+        return self.model._default_manager.in_bulk(keys, field_name=field_name)
+
+    def _assign(self, row, instance, resolved):
+        """
+        Set the row's columns on `instance`. Returns the assigned model fields, the
+        related pks of the many-to-many ones, and the errors by field.
+        """
+        assigned, many, errors = [], {}, defaultdict(list)
+        for field, model_field in self.columns:
+            if field.column_name not in row or (model_field.primary_key and not instance._state.adding):
+                continue
+            if self._is_relation(field):
+                found = resolved[field.widget.model, field.widget.field]
+                pks = []
+                for value in self._related_values(field, row):
+                    pk = found.get(value)
+                    if pk is None or pk is AMBIGUOUS:
+                        errors[model_field.name].append('%s %s with %s "%s".' % (
+                            'Several' if pk is AMBIGUOUS else 'No', field.widget.model._meta.verbose_name,
+                            field.widget.field, value))
+                    else:
+                        pks.append(pk)
+                if model_field.many_to_many:
+                    many[model_field] = pks
+                    continue
+                value = pks[0] if pks else None
+            else:
+                try:
+                    value = field.clean(row)
+                except ValueError as error:
+                    errors[model_field.name].append(str(error))
+                    continue
+                if value is None or value == '':
+                    value = None if model_field.null else model_field.get_default()
+            setattr(instance, model_field.attname, value)
+            assigned.append(model_field)
+        return assigned, many, errors
+
+    def _validate(self, instance, errors):
+        # Relations were resolved above; validating them again would query once per row.
+        exclude = {field.name for field in self.model._meta.get_fields() if field.is_relation}
+        for field in self.model._meta.concrete_fields:
+            if field.is_relation and not field.null and getattr(instance, field.attname) is None \
+                    and field.name not in errors:
+                errors[field.name].append('This field cannot be null.')
+        if self.allocates_slugs and not instance.slug:
+            exclude.add('slug')
+        try:
+            instance.full_clean(exclude=exclude, validate_unique=False, validate_constraints=False)
+        except ValidationError as error:
+            for name, messages in error.message_dict.items():
+                errors[name].extend(messages)
+
+    def import_chunk(self, rows, first_row=1):
+        """
+        Validate and write `rows`, numbered from `first_row` in errors. Returns the
+        created and updated primary keys, and the row errors.
+        """
+        resolved = self._resolve(rows)
+        existing = self._existing(rows)
+        creates, updates, update_fields, many, row_errors = [], [], set(), [], []
+        for number, row in enumerate(rows, first_row):
+            key = self._key(row)
+            instance = existing.get(key) if key is not None else None
+            if instance is None:
+                instance = self.model()
+            assigned, row_many, errors = self._assign(row, instance, resolved)
+            self._validate(instance, errors)
+            if errors:
+                row_errors.append({'row': number, 'errors': dict(errors)})
+                continue
+            if instance._state.adding:
+                creates.append(instance)
+            else:
+                updates.append(instance)
+                update_fields.update(field.name for field in assigned)
+            if row_many:
+                many.append((instance, row_many))
+
+        created_ids, updated_ids = self._write(creates, updates, update_fields, many)
+        return created_ids, updated_ids, row_errors
+
+    def _write(self, creates, updates, update_fields, many):
+        fresh = [instance for instance in creates if self.allocates_slugs and not instance.slug]
+        values = [getattr(instance, instance.slug_source) for instance in fresh]
+        for attempt in range(slugs.ATTEMPTS):
+            for instance, slug in zip(fresh, slugs.allocate_many(self.model, values) if fresh else []):
+                instance.slug = slug
+            try:
+                with transaction.atomic():
+                    return self._save(creates, updates, update_fields, many)
+            except IntegrityError:
+                for instance in creates:
+                    instance.pk = None
+                    instance._state.adding = True
+                taken = self.model._default_manager.filter(slug__in=[instance.slug for instance in fresh])
+                if attempt == slugs.ATTEMPTS - 1 or not taken.exists():
+                    raise
+                # A concurrent insert took one of the slugs; allocate them again.
+
+    def _save(self, creates, updates, update_fields, many):
+        manager = self.model._default_manager
+        manager.bulk_create(creates)
+        if updates and update_fields:
+            # bulk_update does not run pre_save, so auto_now fields are stamped here.
+            for field in self.model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    update_fields.add(field.name)
+                    for instance in updates:
+                        field.pre_save(instance, add=False)
+            manager.bulk_update(updates, sorted(update_fields))
+        self._save_many(many, {instance.pk for instance in updates})
+        # What the mediafiles post_save receivers do for single saves.
+        storage.update_references(self.model, [*creates, *updates])
+        variants.enqueue_changed(self.model, [*creates, *updates])
+
+        created_ids = [instance.pk for instance in creates]
+        updated_ids = [instance.pk for instance in updates]
+        self.resource.bulk_chunk_saved(created_ids, updated_ids)
+        return created_ids, updated_ids
+
+    def _save_many(self, many, updated_ids):
+        """Replace the many-to-many relations given by the rows, with one delete and insert per field."""
+        by_field = defaultdict(list)
+        for instance, values in many:
+            for model_field, pks in values.items():
+                by_field[model_field].append((instance.pk, pks))
+        for model_field, rows in by_field.items():
+            through = model_field.remote_field.through
+            source = through._meta.get_field(model_field.m2m_field_name()).attname
+            target = through._meta.get_field(model_field.m2m_reverse_field_name()).attname
+            replaced = [pk for pk, _ in rows if pk in updated_ids]
+            if replaced:
+                through.objects.filter(**{f'{source}__in': replaced}).delete()
+            through.objects.bulk_create([
+                through(**{source: pk, target: related}) for pk, related_pks in rows for related in set(related_pks)
+            ], ignore_conflicts=True)
+
+
+def read_rows(file):
+    """The rows of an uploaded CSV, TSV, XLSX or JSON file, as dicts keyed by column name."""
+    extension = os.path.splitext(file.name)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f'Unsupported file type "{extension}"; use one of {", ".join(FORMATS)}.')
+    file_format = FORMATS[extension]
+    with file.open('rb') as handle:
+        content = handle.read()
+    if file_format in TEXT_FORMATS:
+        content = content.decode('utf-8-sig')
+    return tablib.Dataset().load(content, format=file_format).dict
+
+
+def claim_next():
+    """The oldest pending ImportJob, marked running, or None. Safe with several workers."""
+    pending = ImportJob.objects.filter(status=ImportJob.PENDING).order_by('created_at')
+    for pk in pending.values_list('pk', flat=True)[:10]:
+        claimed = ImportJob.objects.filter(pk=pk, status=ImportJob.PENDING).update(
+            status=ImportJob.RUNNING, started_at=timezone.now())
+        if claimed:
+            return ImportJob.objects.get(pk=pk)
+    return None
+
+
+def run_import(import_job, chunk_size=None, on_progress=None):
+    """
+    Run a claimed ImportJob, one transaction per chunk. The progress counters are
+    saved (and `on_progress(import_job)` called) after every chunk.
+    """
+    chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+    created_ids, updated_ids = [], []
+    try:
+        resource = import_string(RESOURCES[import_job.resource])()
+        rows = read_rows(import_job.file)
+        import_job.total_rows = len(rows)
+        import_job.save(update_fields=['total_rows'])
+        importer = BulkImporter(resource)
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            created, updated, errors = importer.import_chunk(chunk, first_row=start + 1)
+            created_ids += created
+            updated_ids += updated
+            import_job.processed_rows += len(chunk)
+            import_job.created_rows += len(created)
+            import_job.updated_rows += len(updated)
+            import_job.error_rows += len(errors)
+            import_job.errors = (import_job.errors + errors)[:MAX_ERRORS]
+            import_job.save(update_fields=PROGRESS_FIELDS)
+            if on_progress is not None:
+                on_progress(import_job)
+        resource.bulk_import_finished(created_ids, updated_ids)
+    except Exception as error:
+        logger.exception("Import job %s failed", import_job.pk)
+        import_job.status = ImportJob.FAILED
+        import_job.last_error = f'{type(error).__name__}: {error}'
+    else:
+        import_job.status = ImportJob.DONE
+    import_job.finished_at = timezone.now()
+    import_job.save(update_fields=['status', 'last_error', 'finished_at'])
+    return import_job
+
+
+def run_pending(chunk_size=None, on_progress=None):
+    """Run the pending imports one after the other. Returns the finished ImportJobs."""
+    finished = []
+    while (import_job := claim_next()) is not None:
+        finished.append(run_import(import_job, chunk_size, on_progress))
+    return finished
@@ -0,0 +1,39 @@
+import hashlib
+
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    """Current version stamp of `namespace`; keys built from it go stale on `bump_version()`."""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def bump_version(namespace):
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, None)
+        return 2
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join([namespace, str(get_version(namespace)), *map(str, parts)])
+
+
+def normalize_params(params, allowed=None):
+    """A stable digest of query parameters, independent of their order."""
+    items = sorted(
+        (key, value)
+        for key in params
+        if allowed is None or key in allowed
+        for value in params.getlist(key) if value != ''
+    )
+    return hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
@@ -0,0 +1,103 @@
+import hashlib
+
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caching import get_version, normalize_params
+
+
+def make_etag(*parts):
+    # Weak: the JSON and browsable renderings of a response are equivalent, not identical.
+    return 'W/"%s"' % hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Whether the client's copy is current: its If-None-Match holds `etag` or, without
+    one, its If-Modified-Since is not older than `last_modified` (epoch seconds).
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        target = etag.removeprefix('W/')
+        return any(tag.removeprefix('W/') == target for tag in parse_etags(if_none_match))
+    if last_modified is not None:
+        since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+        return since is not None and last_modified <= since
+    return False
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+
+class ConditionalGetMixin:
+    """
+    Answers GETs whose validators still match with a 304, before the response is
+    built or serialized.
+
+    Views return cheap validators from `get_validators()`. These are a list of
+    values that change whenever the representation does, such as the object's
+    updated_at or an aggregate of the filtered queryset, plus an optional
+    last-modified datetime. The ETag also covers the version of
+    `etag_namespace` (bumped when related rows change), the path, the query
+    string and `get_user_etag_parts()`. It is the precise validator;
+    Last-Modified only reflects the row itself.
+
+    Views rendering values relative to the current time (`days_left`, `timesince`)
+    set `etag_time_bucket` to a number of seconds. Their ETag then also covers
+    the current date and time bucket, and Last-Modified is never older than the
+    bucket, so a copy is not reported current for longer than that.
+    """
+    etag_namespace = 'jobs'
+    etag_time_bucket = None
+
+    def get_validators(self, request):
+        """`(parts, last_modified)`, or None to answer unconditionally (e.g. to let the view 404)."""
+        raise NotImplementedError
+
+    def get_user_etag_parts(self, request):
+        return [request.user.pk]
+
+    def get_time_etag_parts(self):
+        """`(parts, bucket start)` for `etag_time_bucket`, the start in epoch seconds."""
+        if not self.etag_time_bucket:
+            return [], None
+        now = timezone.now()
+        start = int(now.timestamp()) // self.etag_time_bucket * self.etag_time_bucket
+        return [now.date(), start], start
+
+    def response_not_modified(self, request):
+        """Side effects of the skipped response that must still happen, such as view counters."""
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators(request)
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        parts, last_modified = validators
+        time_parts, bucket_start = self.get_time_etag_parts()
+        etag = make_etag(get_version(self.etag_namespace), request.path, normalize_params(request.GET),
+                         *self.get_user_etag_parts(request), *parts, *time_parts)
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+            if bucket_start is not None:
+                last_modified = max(last_modified, bucket_start)
+        if is_not_modified(request, etag, last_modified):
+            self.response_not_modified(request)
+            return not_modified(etag, last_modified)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_validators(response, etag, last_modified)
+        return response
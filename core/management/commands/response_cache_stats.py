@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.response_cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = ('Show the response cache counters. They live in the default cache, so they cover every worker '
+            'only when that cache is shared.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them.')
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        cached = stats['hit'] + stats['stale'] + stats['wait']
+        lookups = cached + stats['miss']
+        for stat, count in stats.items():
+            self.stdout.write(f'{stat:<8} {count}')
+        ratio = cached / lookups if lookups else 0
+        self.stdout.write(self.style.SUCCESS(f'Served {ratio:.1%} of {lookups} cacheable request(s) from cache.'))
+        if options['reset']:
+            reset_stats()
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.bulk_import import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run the queued bulk imports (core.ImportJob), reporting their progress.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help='Rows per transaction (default: BULK_IMPORT_CHUNK_SIZE).')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new imports.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def report_progress(self, import_job):
+        self.stdout.write(f'{import_job}: {import_job.processed_rows}/{import_job.total_rows} rows')
+
+    def handle(self, *args, **options):
+        while True:
+            for import_job in run_pending(options['chunk_size'], self.report_progress):
+                summary = (f'{import_job}: {import_job.created_rows} created, {import_job.updated_rows} updated, '
+                           f'{import_job.error_rows} with errors.')
+                if import_job.last_error:
+                    self.stdout.write(self.style.ERROR(f'{summary} {import_job.last_error}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(summary))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('jobs', 'Jobs'), ('companies', 'Companies')], max_length=20, verbose_name='Resource')),
+                ('file', models.FileField(help_text='CSV, TSV, XLSX or JSON, with the columns of the admin import.', upload_to='imports/', verbose_name='File')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Total rows')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Processed rows')),
+                ('created_rows', models.PositiveIntegerField(default=0, verbose_name='Created rows')),
+                ('updated_rows', models.PositiveIntegerField(default=0, verbose_name='Updated rows')),
+                ('error_rows', models.PositiveIntegerField(default=0, verbose_name='Rows with errors')),
+                ('errors', models.JSONField(blank=True, default=list, help_text='The first row errors, as {"row": ..., "errors": {field: [...]}}.', verbose_name='Errors')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Created by')),
+            ],
+            options={
+                'verbose_name': 'Import job',
+                'verbose_name_plural': 'Import jobs',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['status', 'created_at'], name='import_job_due_idx')],
+            },
+        ),
+    ]
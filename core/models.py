@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from . import slugs
+
+
+class JobCounts(models.Model):
+    """
+    Number of jobs (and of active jobs) pointing at a row. They are only written with
+    F() updates by jobs.job_counts, so regular saves leave them out: an instance loaded
+    before a job was posted would otherwise put back its stale counts.
+    """
+    COUNTER_FIELDS = ('job_count', 'active_job_count')
+
+    job_count = models.PositiveIntegerField(default=0, editable=False)
+    active_job_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                and field.attname in self.__dict__
+            ]
+        super().save(*args, **kwargs)
+
+
+class UniqueSlugMixin:
+    """
+    Fills an empty `slug` from the `slug_source` attribute on save, with the first
+    free suffix (see core.slugs) instead of failing on the unique constraint.
+    """
+    slug_source = 'name'
+
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+        return slugs.save_with_unique_slug(
+            self, getattr(self, self.slug_source), lambda: super(UniqueSlugMixin, self).save(*args, **kwargs))
+
+
+class ImportJob(models.Model):
+    """A file of rows for a bulk import, run in the background by `manage.py run_imports`."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    # Keys of core.bulk_import.RESOURCES
+    RESOURCE_CHOICES = [
+        ('jobs', 'Jobs'),
+        ('companies', 'Companies'),
+    ]
+
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES, verbose_name=_('Resource'))
+    file = models.FileField(upload_to='imports/', verbose_name=_('File'),
+                            help_text=_('CSV, TSV, XLSX or JSON, with the columns of the admin import.'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name=_('Status'))
+    total_rows = models.PositiveIntegerField(default=0, verbose_name=_('Total rows'))
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name=_('Processed rows'))
+    created_rows = models.PositiveIntegerField(default=0, verbose_name=_('Created rows'))
+    updated_rows = models.PositiveIntegerField(default=0, verbose_name=_('Updated rows'))
+    error_rows = models.PositiveIntegerField(default=0, verbose_name=_('Rows with errors'))
+    errors = models.JSONField(default=list, blank=True, verbose_name=_('Errors'),
+                              help_text=_('The first row errors, as {"row": ..., "errors": {field: [...]}}.'))
+    last_error = models.TextField(blank=True, verbose_name=_('Last error'))
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True,
+                                   verbose_name=_('Created by'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name=_('Started at'))
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name=_('Finished at'))
+
+    class Meta:
+        verbose_name = _('Import job')
+        verbose_name_plural = _('Import jobs')
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='import_job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_resource_display()} import {self.pk} ({self.status})'
+
+    @property
+    def progress(self):
+        """Percentage of the rows processed."""
+        return round(100 * self.processed_rows / self.total_rows) if self.total_rows else 0
@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from .caching import get_version, normalize_params
+from .conditional import is_not_modified, not_modified, set_validators
+
+STATS = ('hit', 'stale', 'wait', 'miss', 'bypass')
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+# Longest a recompute may hold its lock, and how long other requests wait for it
+# when there is no stale copy to serve.
+LOCK_TIMEOUT = 30
+MAX_WAIT = 2.0
+WAIT_INTERVAL = 0.05
+
+
+def _stats_key(stat):
+    return f'response_cache:stats:{stat}'
+
+
+def _count(stat):
+    key = _stats_key(stat)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_stats():
+    """Hits, stale hits, waits, misses and bypasses since the last `reset_stats()`."""
+    return {stat: cache.get(_stats_key(stat), 0) for stat in STATS}
+
+
+def reset_stats():
+    cache.delete_many([_stats_key(stat) for stat in STATS])
+
+
+class CachedResponseMixin:
+    """
+    Caches the GET responses of anonymous requests, keyed on the host, path and
+    normalized query string. Signed-in users always bypass the cache, as their
+    responses carry per-user state such as `is_bookmarked`.
+
+    Entries remember the version of `cache_namespace` they were built from
+    (see core.caching). They are fresh for RESPONSE_CACHE_TIMEOUT seconds, and
+    until the namespace is bumped. After that they are kept for another
+    RESPONSE_CACHE_STALE_TIMEOUT seconds. During that time, one request (holding
+    a lock in the cache) recomputes the entry while the others get the stale
+    copy. Without a stale copy they wait for the recompute instead of running
+    it too.
+
+    Views with side effects per request (view counters) store what they need in
+    `self.response_cache_meta` and replay it in `response_cache_hit()`. Validators
+    set by ConditionalGetMixin are kept with the entry, so hits answer
+    conditional requests with a 304 without querying.
+    """
+    cache_namespace = 'jobs'
+
+    def get_response_cache_key(self, request):
+        return ':'.join([
+            'response', type(self).__name__, request.get_host(), request.path,
+            normalize_params(request.GET),
+        ])
+
+    def response_cache_hit(self, request, meta):
+        pass
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            _count('bypass')
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        version = get_version(self.cache_namespace)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version and entry['fresh_until'] > time.time():
+            return self._cached_response(request, entry, 'hit')
+
+        lock_key = f'{key}:lock'
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            if entry is not None:
+                return self._cached_response(request, entry, 'stale')
+            entry = self._wait_for(key, lock_key)
+            if entry is not None:
+                return self._cached_response(request, entry, 'wait')
+        try:
+            self.response_cache_meta = None
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, {
+                    'version': version,
+                    'fresh_until': time.time() + settings.RESPONSE_CACHE_TIMEOUT,
+                    'status': response.status_code,
+                    'data': response.data,
+                    'headers': {header: response[header] for header in VALIDATOR_HEADERS if response.has_header(header)},
+                    'meta': self.response_cache_meta,
+                }, settings.RESPONSE_CACHE_TIMEOUT + settings.RESPONSE_CACHE_STALE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        _count('miss')
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def _wait_for(self, key, lock_key):
+        deadline = time.monotonic() + MAX_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+            if cache.get(lock_key) is None:
+                break
+        return None
+
+    def _cached_response(self, request, entry, stat):
+        _count(stat)
+        self.response_cache_hit(request, entry['meta'])
+        etag = entry['headers'].get('ETag')
+        last_modified = parse_http_date_safe(entry['headers'].get('Last-Modified') or '')
+        if etag is not None and is_not_modified(request, etag, last_modified):
+            response = not_modified(etag, last_modified)
+        else:
+            response = Response(entry['data'], status=entry['status'])
+            if etag is not None:
+                set_validators(response, etag, last_modified)
+        response['X-Cache'] = stat.upper()
+        return response
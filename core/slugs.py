@@ -0,0 +1,86 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Kept free at the end of long slugs for a '-' and the suffix number.
+SUFFIX_ROOM = 11
+ATTEMPTS = 5
+
+
+def slug_base(model, value, field='slug'):
+    """`value` slugified and cut to leave room for a suffix in `model.field`."""
+    max_length = model._meta.get_field(field).max_length
+    base = slugify(value or '') or model._meta.model_name
+    if len(base) + SUFFIX_ROOM > max_length:
+        base = base[:max_length - SUFFIX_ROOM].rstrip('-')
+    return base
+
+
+def _taken(model, bases, field, exclude_pk=None):
+    """
+    Suffix numbers in use for each of `bases` (0 for the bare base), read with one
+    query for the slugs equal to or starting with a base.
+    """
+    condition = Q()
+    for base in bases:
+        condition |= Q(**{field: base}) | Q(**{f'{field}__startswith': f'{base}-'})
+    rows = model._default_manager.filter(condition)
+    if exclude_pk is not None:
+        rows = rows.exclude(pk=exclude_pk)
+
+    taken = {base: set() for base in bases}
+    for slug in rows.values_list(field, flat=True).iterator():
+        if slug in taken:
+            taken[slug].add(0)
+        head, _, tail = slug.rpartition('-')
+        if head in taken and tail.isascii() and tail.isdigit() and not tail.startswith('0'):
+            taken[head].add(int(tail))
+    return taken
+
+
+def _next(base, used):
+    number = 0
+    while number in used:
+        number += 1
+    used.add(number)
+    return f'{base}-{number}' if number else base
+
+
+def allocate(model, value, field='slug', exclude_pk=None):
+    """
+    The first free slug of `base`, `base-1`, `base-2`, ... for `value` in
+    `model.field`, whatever the number of rows already sharing the base.
+    `exclude_pk` is the row being renamed, whose own slug may be reused.
+    """
+    base = slug_base(model, value, field)
+    return _next(base, _taken(model, [base], field, exclude_pk)[base])
+
+
+def allocate_many(model, values, field='slug'):
+    """Distinct free slugs for `values`, in order, with one query for the whole batch (e.g. for bulk_create)."""
+    bases = [slug_base(model, value, field) for value in values]
+    taken = _taken(model, set(bases), field) if bases else {}
+    return [_next(base, taken[base]) for base in bases]
+
+
+def save_with_unique_slug(instance, value, save, field='slug'):
+    """
+    Give `instance` a free slug for `value` and call `save()`. When a concurrent
+    insert took the slug in between, the save fails on the unique constraint and
+    is retried with the next free one.
+    """
+    model = type(instance)
+    exclude_pk = None if instance._state.adding else instance.pk
+    for attempt in range(ATTEMPTS):
+        slug = allocate(model, value, field, exclude_pk)
+        setattr(instance, field, slug)
+        try:
+            # A savepoint, so that the failed insert leaves the outer transaction usable.
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            taken = model._default_manager.filter(**{field: slug})
+            if exclude_pk is not None:
+                taken = taken.exclude(pk=exclude_pk)
+            if attempt == ATTEMPTS - 1 or not taken.exists():
+                raise
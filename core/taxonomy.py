@@ -0,0 +1,141 @@
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django_filters import ModelChoiceFilter
+from django_filters.fields import ModelChoiceField
+from rest_framework import serializers
+
+from .caching import bump_version, get_version
+
+
+class TaxonomyCache:
+    """
+    Process-local copy of a small, rarely-changing table, indexed by primary key and
+    by `slug_field`. The rows are loaded in one query on first use, and again once
+    the table's version stamp (see core.caching) has moved. Saves and deletes bump
+    the stamp through signals, and the stamp lives in the shared cache, so every
+    worker picks the change up. It is read at most once per
+    TAXONOMY_CACHE_CHECK_INTERVAL seconds.
+
+    The instances are shared by every request and must be treated as read-only.
+    Their job counters are written with F() updates, not saves, and go stale here.
+    """
+
+    def __init__(self, label, slug_field='slug'):
+        self.label = label
+        self.slug_field = slug_field
+        self.namespace = f'taxonomy:{label.lower()}'
+        self._lock = threading.Lock()
+        # (version, rows by pk, rows by slug)
+        self._state = None
+        self._checked_at = 0.0
+
+    def __deepcopy__(self, memo):
+        # Serializer and filter fields are deep-copied per instance; they all share this cache.
+        return self
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    def connect(self):
+        post_save.connect(self._changed, sender=self.model, weak=False, dispatch_uid=f'{self.namespace}:save')
+        post_delete.connect(self._changed, sender=self.model, weak=False, dispatch_uid=f'{self.namespace}:delete')
+
+    def _changed(self, **kwargs):
+        self.invalidate()
+        # Again once committed, in case another worker reloaded in between.
+        transaction.on_commit(self.invalidate)
+
+    def invalidate(self):
+        self._state = None
+        bump_version(self.namespace)
+
+    def _load(self):
+        now = time.monotonic()
+        state = self._state
+        if state is not None and now - self._checked_at < settings.TAXONOMY_CACHE_CHECK_INTERVAL:
+            return state
+        version = get_version(self.namespace)
+        if state is None or state[0] != version:
+            with self._lock:
+                rows = list(self.model._default_manager.all())
+                by_slug = {getattr(row, self.slug_field): row for row in rows} if self.slug_field else {}
+                state = self._state = (version, {row.pk: row for row in rows}, by_slug)
+        self._checked_at = now
+        return state
+
+    def get(self, pk):
+        """The row with primary key `pk` (in any form the field accepts), or None."""
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            return None
+        return self._load()[1].get(pk)
+
+    def get_by_slug(self, slug):
+        return self._load()[2].get(slug)
+
+    def all(self):
+        return list(self._load()[1].values())
+
+
+categories = TaxonomyCache('categories.Category')
+locations = TaxonomyCache('locations.Location')
+countries = TaxonomyCache('locations.Country')
+plans = TaxonomyCache('plans.Plan', slug_field=None)
+TAXONOMIES = (categories, locations, countries, plans)
+
+
+def connect_signals():
+    for taxonomy in TAXONOMIES:
+        taxonomy.connect()
+
+
+def invalidate_all():
+    for taxonomy in TAXONOMIES:
+        taxonomy.invalidate()
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField validated against a TaxonomyCache instead of with a query."""
+
+    def __init__(self, taxonomy, **kwargs):
+        self.taxonomy = taxonomy
+        if not kwargs.get('read_only'):
+            kwargs.setdefault('queryset', taxonomy.model._default_manager.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = self.taxonomy.get(data)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class CachedModelChoiceField(ModelChoiceField):
+    def __init__(self, *args, taxonomy, **kwargs):
+        self.taxonomy = taxonomy
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if self.null_label is not None and value == self.null_value:
+            return value
+        if value in self.empty_values:
+            return None
+        instance = self.taxonomy.get(value)
+        if instance is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return instance
+
+
+class CachedModelChoiceFilter(ModelChoiceFilter):
+    """ModelChoiceFilter whose choice is looked up in the TaxonomyCache given as `taxonomy`."""
+    field_class = CachedModelChoiceField
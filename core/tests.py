@@ -0,0 +1,485 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import openpyxl
+import tablib
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from categories.models import Category
+from categories.views import CategoryListAPIView
+from companies.admin import CompanyAdmin
+from companies.models import Company
+from jobs import counters
+from jobs.models import Job, JobApplication
+from jobs.resource import JobResource
+from locations.models import Location
+from mediafiles import storage
+from mediafiles.models import Blob, VariantTask
+from mediafiles.tests import make_image
+from notifications.models import OutboxMessage
+from plans.models import Plan
+
+from . import bulk_import, response_cache, slugs, taxonomy
+from .caching import bump_version
+from .models import ImportJob
+
+
+class TaxonomyCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.design = Category.objects.create(name='Design')
+        Company.objects.create(name='Acme', slug='acme', category=cls.design)
+
+    def setUp(self):
+        # Rolled back test data never signals the caches.
+        taxonomy.invalidate_all()
+
+    def test_lookups_cost_no_queries_once_loaded(self):
+        self.assertEqual(taxonomy.categories.get(self.design.pk), self.design)
+        with self.assertNumQueries(0):
+            self.assertEqual(taxonomy.categories.get_by_slug('design'), self.design)
+            self.assertEqual(taxonomy.categories.get(str(self.design.pk)), self.design)
+            self.assertIsNone(taxonomy.categories.get('not a pk'))
+            self.assertIsNone(taxonomy.categories.get_by_slug('sales'))
+
+    def test_saves_invalidate(self):
+        taxonomy.categories.all()
+        Category.objects.create(name='Sales')
+        self.assertEqual(taxonomy.categories.get_by_slug('sales').name, 'Sales')
+        self.design.delete()
+        self.assertIsNone(taxonomy.categories.get_by_slug('design'))
+
+    @override_settings(TAXONOMY_CACHE_CHECK_INTERVAL=0)
+    def test_other_workers_reload_on_version_change(self):
+        taxonomy.categories.all()
+        # A change made by another process only shows through the version stamp.
+        Category.objects.filter(pk=self.design.pk).update(name='Graphic design')
+        self.assertEqual(taxonomy.categories.get(self.design.pk).name, 'Design')
+        bump_version(taxonomy.categories.namespace)
+        self.assertEqual(taxonomy.categories.get(self.design.pk).name, 'Graphic design')
+
+    def test_endpoints_resolve_through_the_cache(self):
+        client = APIClient()
+        self.assertEqual(client.get('/companies/category/design/').status_code, 200)
+        self.assertEqual(client.get('/companies/category/sales/').status_code, 404)
+        self.assertEqual(client.get('/jobs/', {'category': 0}).status_code, 400)
+
+        plan = Plan.objects.create(title='Basic', price_per_day=10)
+        Job.objects.create(title='Designer', category=self.design, plan=plan)
+        taxonomy.categories.all()
+        taxonomy.plans.all()
+        response = client.get('/jobs/', {'category': self.design.pk})
+        self.assertEqual(response.json()['results'][0]['plan_title'], 'Basic')
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = Job.objects.create(title='Designer', category=Category.objects.create(name='Design'))
+
+    def setUp(self):
+        cache.clear()
+        counters.buffer.clear()
+        self.addCleanup(counters.buffer.clear)
+        self.client = APIClient()
+
+    def test_hits_until_a_save(self):
+        self.assertEqual(self.client.get('/categories/')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get('/categories/?unused=')
+        self.assertEqual((response['X-Cache'], len(response.json())), ('HIT', 1))
+        self.assertEqual(self.client.get('/categories/?b=2&a=1')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/categories/?a=1&b=2')['X-Cache'], 'HIT')
+
+        Category.objects.create(name='Sales')
+        response = self.client.get('/categories/')
+        self.assertEqual((response['X-Cache'], len(response.json())), ('MISS', 2))
+        self.assertEqual(response_cache.get_stats(), {'hit': 2, 'stale': 0, 'wait': 0, 'miss': 3, 'bypass': 0})
+
+    def test_stale_copy_while_another_request_recomputes(self):
+        response = self.client.get('/categories/')
+        lock_key = CategoryListAPIView().get_response_cache_key(response.wsgi_request) + ':lock'
+        Category.objects.create(name='Sales')
+        cache.add(lock_key, 1)
+        response = self.client.get('/categories/')
+        self.assertEqual((response['X-Cache'], len(response.json())), ('STALE', 1))
+        cache.delete(lock_key)
+        self.assertEqual(len(self.client.get('/categories/').json()), 2)
+
+    def test_signed_in_users_bypass(self):
+        self.client.force_authenticate(User.objects.create_user(email='user@example.com', password='secret'))
+        self.assertNotIn('X-Cache', self.client.get('/categories/'))
+        self.assertEqual(response_cache.get_stats()['bypass'], 1)
+
+    def test_hits_still_count_views(self):
+        self.client.get(f'/jobs/{self.job.slug}/')
+        self.assertEqual(self.client.get(f'/jobs/{self.job.slug}/')['X-Cache'], 'HIT')
+        self.assertEqual(counters.buffer.pending(self.job.pk)['view_count'], 2)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme', slug='acme')
+        cls.job = Job.objects.create(title='Designer', company=cls.company)
+
+    def setUp(self):
+        cache.clear()
+        counters.buffer.clear()
+        self.addCleanup(counters.buffer.clear)
+        self.client = APIClient()
+
+    def test_detail_not_modified_still_counts_the_view(self):
+        self.client.force_authenticate(User.objects.create_user(email='user@example.com', password='secret'))
+        etag = self.client.get(f'/jobs/{self.job.slug}/')['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        response = self.client.get(f'/jobs/{self.job.slug}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        self.assertEqual(counters.buffer.pending(self.job.pk)['view_count'], 2)
+
+        counters.flush()
+        self.assertEqual(self.client.get(f'/jobs/{self.job.slug}/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_changes_with_its_jobs(self):
+        etag = self.client.get('/jobs/')['ETag']
+        self.assertEqual(self.client.get('/jobs/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/jobs/?page_size=1', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        Job.objects.create(title='Writer')
+        self.assertEqual(self.client.get('/jobs/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cached_responses_answer_without_queries(self):
+        etag = self.client.get('/categories/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/categories/', HTTP_IF_NONE_MATCH=f'"other", {etag}')
+        self.assertEqual((response.status_code, response['X-Cache']), (304, 'HIT'))
+
+    def test_if_modified_since(self):
+        detail = f'/jobs/{self.job.slug}/'
+        last_modified = self.client.get(detail)['Last-Modified']
+        self.assertEqual(self.client.get(detail, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        # The company's job counters change without its updated_at.
+        response = self.client.get('/companies/acme/')
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get('/companies/acme/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        Job.objects.create(title='Writer', company=self.company)
+        self.assertEqual(self.client.get('/companies/acme/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+        self.assertEqual(self.client.get('/companies/acme/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_time_relative_fields_expire_the_etag(self):
+        category = Category.objects.create(name='Design')
+        Job.objects.create(title='Writer', category=category, deadline=timezone.localdate() + timedelta(days=5))
+        response = self.client.get('/categories/design/')
+        self.assertEqual(response.data['jobs']['results'][0]['days_left'], 5)
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/categories/design/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        detail = f'/jobs/{self.job.slug}/'
+        last_modified = self.client.get(detail)['Last-Modified']
+        self.assertEqual(self.client.get(detail, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        later = timezone.now() + timedelta(days=3)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get('/categories/design/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual((response.status_code, response.data['jobs']['results'][0]['days_left']), (200, 2))
+            # The response cache expires by the real clock, which is not mocked.
+            cache.clear()
+            self.assertEqual(self.client.get(detail, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_user_state_is_part_of_the_etag(self):
+        user = User.objects.create_user(email='user@example.com', password='secret')
+        self.client.force_authenticate(user)
+        etag = self.client.get('/jobs/?projection=card')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/jobs/{self.job.pk}/bookmark/')
+        response = self.client.get('/jobs/?projection=card', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['is_bookmarked'])
+        self.client.force_authenticate(None)
+        self.assertNotEqual(self.client.get('/jobs/?projection=card')['ETag'], response['ETag'])
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.jobs = [Job.objects.create(title=f'Job {index}') for index in range(5)]
+        # Ties on created_at are broken by id.
+        Job.objects.filter(pk__in=[job.pk for job in cls.jobs[1:4]]).update(created_at=cls.jobs[0].created_at)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def titles(self, response):
+        return [job['title'] for job in response.data['results']]
+
+    def test_next_and_previous(self):
+        expected = list(Job.objects.order_by('-created_at', 'id').values_list('title', flat=True))
+        pages, response = [], self.client.get('/jobs/?page_size=2')
+        self.assertIsNone(response.data['previous'])
+        while True:
+            pages.append(self.titles(response))
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(self.titles(response), expected[2:4])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(self.titles(response), expected[:2])
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursors(self):
+        for cursor in ['not-base64!', 'eyJwIjpbMV19', 'eyJwIjpbImZvbyIsMV19', 'eyJwIjpbbnVsbCwxXX0=']:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f'/jobs/?cursor={cursor}').status_code, 404)
+
+
+class SlugTests(TestCase):
+    def test_one_query_whatever_the_number_of_siblings(self):
+        for title in ['Engineer', 'Engineer', 'Engineer', 'Engineer 5', 'Engineer Senior']:
+            Job.objects.create(title=title)
+        self.assertEqual(set(Job.objects.values_list('slug', flat=True)),
+                         {'engineer', 'engineer-1', 'engineer-2', 'engineer-5', 'engineer-senior'})
+        with self.assertNumQueries(1):
+            self.assertEqual(slugs.allocate(Job, 'Engineer'), 'engineer-3')
+        job = Job.objects.get(slug='engineer-1')
+        self.assertEqual(slugs.allocate(Job, 'Engineer', exclude_pk=job.pk), 'engineer-1')
+
+    def test_collisions_get_a_suffix(self):
+        self.assertEqual([Category.objects.create(name='Design').slug for _ in range(3)],
+                         ['design', 'design-1', 'design-2'])
+        self.assertEqual(Company.objects.create(name='?!').slug, 'company')
+        self.assertEqual(len(Job.objects.create(title='x' * 200).slug), 189)
+
+    def test_batch(self):
+        Category.objects.create(name='Design')
+        with self.assertNumQueries(1):
+            allocated = slugs.allocate_many(Category, ['Design', 'Sales', 'Design', 'Sales'])
+        self.assertEqual(allocated, ['design-1', 'sales', 'design-2', 'sales-1'])
+
+    def test_renaming_a_job_moves_its_slug(self):
+        Job.objects.create(title='Writer')
+        job = Job.objects.create(title='Engineer')
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='user@example.com', password='secret'))
+        response = client.patch('/jobs/engineer/', {'title': 'Writer'}, format='json')
+        self.assertEqual((response.status_code, response.data['slug']), (200, 'writer-1'))
+        response = client.patch('/jobs/writer-1/', {'description': 'Copy'}, format='json')
+        self.assertEqual(response.data['slug'], 'writer-1')
+        job.refresh_from_db()
+        self.assertEqual((job.title, job.slug), ('Writer', 'writer-1'))
+
+    def test_retries_when_a_concurrent_insert_takes_the_slug(self):
+        Category.objects.create(name='Design')
+        with mock.patch.object(slugs, 'allocate', side_effect=['design', 'design-1']):
+            self.assertEqual(Category.objects.create(name='Design').slug, 'design-1')
+        with mock.patch.object(slugs, 'allocate', return_value='design'), self.assertRaises(IntegrityError):
+            Category.objects.create(name='Design')
+
+
+class BulkImportTests(TestCase):
+    header = 'Title,Company,Category,Location,User,Applicants,Work Experience\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='owner@example.com', password='secret')
+        cls.applicant = User.objects.create_user(email='applicant@example.com', password='secret')
+        cls.company = Company.objects.create(name='Acme', slug='acme')
+        cls.design = Category.objects.create(name='Design')
+        cls.nairobi = Location.objects.create(name='Nairobi')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def queue(self, content, name='feed.csv', resource='jobs'):
+        return ImportJob.objects.create(resource=resource, file=SimpleUploadedFile(name, content.encode()))
+
+    def feed(self, count):
+        return self.header + ''.join(
+            f'Designer {index},Acme,Design,Nairobi,owner@example.com,"applicant@example.com, owner@example.com",2\n'
+            for index in range(count))
+
+    def test_imports_in_bulk(self):
+        import_job = self.queue(self.feed(25))
+        self.assertEqual(bulk_import.claim_next(), import_job)
+        progress = []
+        bulk_import.run_import(import_job, chunk_size=10, on_progress=lambda job: progress.append(job.processed_rows))
+        self.assertEqual(progress, [10, 20, 25])
+
+        import_job.refresh_from_db()
+        self.assertEqual((import_job.status, import_job.created_rows, import_job.error_rows, import_job.progress),
+                         (ImportJob.DONE, 25, 0, 100))
+        job = Job.objects.get(title='Designer 3')
+        self.assertEqual((job.company, job.category, job.location, job.user, job.work_experience),
+                         (self.company, self.design, self.nairobi, self.user, 2))
+        self.assertEqual(set(job.applicants.all()), {self.user, self.applicant})
+        self.assertEqual(len(set(Job.objects.values_list('slug', flat=True))), 25)
+        self.design.refresh_from_db()
+        self.assertEqual(self.design.job_count, 25)
+        # No per-row notifications.
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_queries_do_not_grow_with_the_rows(self):
+        importer = bulk_import.BulkImporter(JobResource())
+        counts = []
+        for size in (2, 20):
+            rows = tablib.Dataset().load(self.feed(size), format='csv').dict
+            with CaptureQueriesContext(connection) as queries:
+                importer.import_chunk(rows)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_updates_and_row_errors(self):
+        job = Job.objects.create(title='Designer', company=self.company)
+        import_job = self.queue(
+            'id,Title,Category,Work Experience\n'
+            f'{job.pk},Senior designer,Design,\n'
+            ',Writer,Sales,\n'
+            ',Engineer,,many\n'
+            ',Engineer,,\n'
+            ',Engineer,,\n')
+        bulk_import.run_pending()
+        import_job.refresh_from_db()
+        self.assertEqual((import_job.created_rows, import_job.updated_rows, import_job.error_rows), (2, 1, 2))
+        self.assertEqual([error['row'] for error in import_job.errors], [2, 3])
+        self.assertIn('category', import_job.errors[0]['errors'])
+        self.assertIn('work_experience', import_job.errors[1]['errors'])
+
+        job.refresh_from_db()
+        self.assertEqual((job.title, job.category, job.company, job.slug),
+                         ('Senior designer', self.design, self.company, 'designer'))
+        self.assertEqual(set(Job.objects.filter(title='Engineer').values_list('slug', flat=True)),
+                         {'engineer', 'engineer-1'})
+
+    def test_companies(self):
+        import_job = self.queue('[{"Name": "Acme", "Category": "Design"}, {"Name": "Globex", "Category": ""}]', 'feed.json',
+                                resource='companies')
+        bulk_import.run_pending()
+        import_job.refresh_from_db()
+        self.assertEqual(import_job.status, ImportJob.DONE)
+        self.assertEqual(Company.objects.get(slug='acme-1').category, self.design)
+        self.assertTrue(Company.objects.filter(slug='globex').exists())
+
+    def test_images_are_referenced(self):
+        original = Job.objects.create(title='Designer', image=make_image())
+        other = Job.objects.create(title='Writer', image=make_image((10, 10)))
+        VariantTask.objects.all().delete()
+        import_job = self.queue(f'Title,Image\nEngineer,{original.image.name}\n')
+        bulk_import.run_pending()
+        imported = Job.objects.get(title='Engineer')
+        self.assertEqual(imported.image.name, original.image.name)
+        self.assertEqual(Blob.objects.get(name=original.image.name).ref_count, 2)
+        self.assertEqual(VariantTask.objects.get().object_id, str(imported.pk))
+
+        # The blob outlives the job it was uploaded with.
+        original.delete()
+        self.assertEqual(storage.collect_garbage(grace=timedelta(0)), (0, 0))
+        self.assertTrue(imported.image.storage.exists(imported.image.name))
+
+        # Updates release the blob they replace.
+        import_job = self.queue(f'id,Title,Image\n{imported.pk},Engineer,{other.image.name}\n')
+        bulk_import.run_pending()
+        self.assertEqual(Blob.objects.get(name=original.image.name).ref_count, 0)
+        self.assertEqual(Blob.objects.get(name=other.image.name).ref_count, 2)
+
+    def test_unreadable_file_fails_the_import(self):
+        import_job = self.queue('Title\nDesigner\n', 'feed.txt')
+        bulk_import.run_pending()
+        import_job.refresh_from_db()
+        self.assertEqual(import_job.status, ImportJob.FAILED)
+        self.assertIn('Unsupported file type', import_job.last_error)
+
+
+    def test_admin_import_queues_a_bulk_import(self):
+        self.client.force_login(User.objects.create_superuser(email='admin@example.com', password='secret'))
+        for changelist, resource in (('/admin/jobs/job/', 'jobs'), ('/admin/companies/company/', 'companies')):
+            with self.subTest(resource=resource):
+                self.assertContains(self.client.get(changelist), f'href=\'{changelist}import/\'')
+                response = self.client.get(f'{changelist}import/')
+                self.assertRedirects(response, f'/admin/core/importjob/add/?resource={resource}')
+                self.assertContains(self.client.get(response.url), f'<option value="{resource}" selected>')
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(email='staff@example.com', password='secret', is_staff=True)
+        cls.applicant = User.objects.create_user(email='applicant@example.com', password='secret')
+        cls.company = Company.objects.create(name='Acme', slug='acme')
+        cls.design = Category.objects.create(name='Design')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def create_jobs(self, count):
+        for index in range(count):
+            job = Job.objects.create(title=f'Designer {index}', company=self.company, category=self.design)
+            job.applicants.add(self.applicant)
+
+    def download(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+            content = b''.join(response.streaming_content).decode()
+        return response, content
+
+    @override_settings(EXPORT_CHUNK_SIZE=5)
+    def test_csv_is_streamed_in_chunks(self):
+        self.create_jobs(12)
+        # A query for the jobs and one for the applicants of each chunk of 5.
+        response, content = self.download('/jobs/export/', 4)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="jobs.csv"')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual((rows[0]['Company'], rows[0]['Category'], rows[0]['Applicants']),
+                         ('Acme', 'Design', 'applicant@example.com'))
+
+    def test_ndjson_with_filters(self):
+        self.create_jobs(2)
+        Job.objects.create(title='Writer')
+        taxonomy.invalidate_all()
+        taxonomy.categories.all()
+        response, content = self.download(f'/jobs/export/?file_format=ndjson&category={self.design.pk}', 2)
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual({row['Title'] for row in rows}, {'Designer 0', 'Designer 1'})
+
+    def test_xlsx(self):
+        JobApplication.objects.create(job=Job.objects.create(title='Designer'), user=self.applicant,
+                                      employer_email='jobs@example.com')
+        response = self.client.get('/jobs/applications/export/?file_format=xlsx')
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][:3], ('id', 'Job', 'User'))
+        self.assertEqual(rows[1][1:3], ('designer', 'applicant@example.com'))
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.applicant)
+        self.assertEqual(self.client.get('/companies/export/').status_code, 403)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get('/companies/export/?file_format=pdf').status_code, 400)
+
+    def test_admin_action(self):
+        response = CompanyAdmin(Company, admin.site).export_csv(None, Company.objects.all())
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.splitlines()[1].split(',')[:2], [str(self.company.pk), 'Acme'])
+        self.assertIn('companies.csv', response['Content-Disposition'])
@@ -1,20 +1,32 @@
 from django.contrib import admin
-from .models import Job, JobApplication, Impression, Click, Bookmark
-from .resource import JobResource
-from import_export.admin import ImportExportModelAdmin
+from .models import Job, JobApplication, Impression, Click, Bookmark, JobDailyStats
+from .resource import JobApplicationResource, JobResource
+from .search import search_jobs, is_available as search_is_available
+from core.admin import BulkImportAdminMixin
+from core.exports import StreamingExportAdminMixin
 
 
-class JobAdmin(ImportExportModelAdmin):
-    resource_class = JobResource
+class JobAdmin(BulkImportAdminMixin, StreamingExportAdminMixin, admin.ModelAdmin):
+    bulk_import_resource = 'jobs'
+    export_resource_class = JobResource
     list_display = ('title', 'company', 'category',  'location', 'bookmarks', 'view_count', 'click_count', 'slug',  'is_active')
     prepopulated_fields = {'slug': ('title', 'company')}
     list_filter = ('category', 'company', 'location', 'is_active')
-    search_fields = ('title', 'description', 'requirements', 'company__name', 'location__name')
+    search_fields = ('title', 'description', 'company__name', 'location__name', 'category__name')
     list_per_page = 20
 
+    def get_search_results(self, request, queryset, search_term):
+        return search_jobs(queryset, search_term), False
+
+    def get_ordering(self, request):
+        if request.GET.get('q') and 'o' not in request.GET and search_is_available():
+            return ('search_entry__rank',)
+        return super().get_ordering(request)
+
 
 @admin.register(JobApplication)
-class JobApplicationAdmin(admin.ModelAdmin):
+class JobApplicationAdmin(StreamingExportAdminMixin, admin.ModelAdmin):
+    export_resource_class = JobApplicationResource
     list_display = ('job', 'user', 'created_at', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('job__title', 'user__email')
@@ -35,6 +47,13 @@ class ClickAdmin(admin.ModelAdmin):
     list_per_page = 20
 
 
+@admin.register(JobDailyStats)
+class JobDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('job', 'date', 'impressions', 'clicks', 'unique_sessions', 'applications')
+    list_filter = ('date',)
+    search_fields = ('job__title',)
+    list_select_related = ('job',)
+    list_per_page = 20
 
 
 admin.site.register(Bookmark)
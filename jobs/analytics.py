@@ -0,0 +1,117 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from companies.models import Company
+from .models import Job, JobDailyStats
+
+METRICS = ('impressions', 'views', 'clicks', 'bookmarks', 'applications')
+GRANULARITIES = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+DEFAULT_DAYS = 30
+MAX_PERIODS = 366
+
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def periods(start, end, granularity):
+    """Start dates of the periods covering `start`..`end`."""
+    current, result = _period_start(start, granularity), []
+    while current <= end:
+        result.append(current)
+        current = _next_period(current, granularity)
+    return result
+
+
+def parse_range(params):
+    """Validate the `start`, `end` and `granularity` query parameters."""
+    granularity = params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise ValidationError({'granularity': f"Choose one of {', '.join(GRANULARITIES)}."})
+    dates = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise ValidationError({name: 'Enter a date as YYYY-MM-DD.'})
+    end = dates.get('end') or timezone.localdate()
+    start = dates.get('start') or end - timedelta(days=DEFAULT_DAYS - 1)
+    if start > end:
+        raise ValidationError({'start': 'The start date must not be after the end date.'})
+    if len(periods(start, end, granularity)) > MAX_PERIODS:
+        raise ValidationError({'granularity': f'The range spans more than {MAX_PERIODS} periods, use a coarser granularity.'})
+    return start, end, granularity
+
+
+def _with_rates(values):
+    values['click_through_rate'] = round(values['clicks'] / values['impressions'], 4) if values['impressions'] else None
+    values['conversion_rate'] = round(values['applications'] / values['views'], 4) if values['views'] else None
+    return values
+
+
+def _summarize(counts, buckets):
+    """Totals and a gap-free series from `counts` (`{period: {metric: n}}`)."""
+    series, totals = [], dict.fromkeys(METRICS, 0)
+    for period in buckets:
+        values = counts.get(period, dict.fromkeys(METRICS, 0))
+        for metric in METRICS:
+            totals[metric] += values[metric]
+        series.append(_with_rates({'period': period, **values}))
+    return _with_rates(totals), series
+
+
+def employer_analytics(user, start, end, granularity='day'):
+    """
+    Time series of the jobs of every company owned by `user`, per job and per company,
+    read from JobDailyStats in three queries whatever the number of jobs.
+    """
+    companies = list(Company.objects.filter(user=user).order_by('name').values('id', 'name', 'slug'))
+    jobs = list(Job.objects.filter(company__user=user).order_by('-created_at').values('id', 'title', 'slug', 'company_id'))
+
+    truncate = GRANULARITIES[granularity]
+    rows = (
+        JobDailyStats.objects.filter(job__company__user=user, date__gte=start, date__lte=end)
+        .annotate(period=truncate('date'))
+        .values('job_id', 'period')
+        .annotate(**{metric: Sum(metric) for metric in METRICS})
+        .order_by()
+    )
+
+    job_counts = defaultdict(dict)
+    company_counts = defaultdict(lambda: defaultdict(lambda: dict.fromkeys(METRICS, 0)))
+    company_of = {job['id']: job['company_id'] for job in jobs}
+    for row in rows:
+        values = {metric: row[metric] or 0 for metric in METRICS}
+        job_counts[row['job_id']][row['period']] = values
+        company_values = company_counts[company_of.get(row['job_id'])][row['period']]
+        for metric in METRICS:
+            company_values[metric] += values[metric]
+
+    buckets = periods(start, end, granularity)
+    for company in companies:
+        company['totals'], company['series'] = _summarize(company_counts[company['id']], buckets)
+    for job in jobs:
+        job['totals'], job['series'] = _summarize(job_counts[job['id']], buckets)
+    return {'start': start, 'end': end, 'granularity': granularity, 'companies': companies, 'jobs': jobs}
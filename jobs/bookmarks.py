@@ -0,0 +1,61 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
+
+from .models import Bookmark, Job
+from .user_state import forget_bookmarks
+
+MAX_BULK_SIZE = 500
+
+
+def _adjust_counter(job_ids, delta):
+    return Job.objects.filter(pk__in=job_ids).update(bookmarks=Coalesce(F('bookmarks'), Value(0)) + delta)
+
+
+def toggle_bookmark(user, job_id):
+    """
+    Bookmark `job_id` for `user`, or remove the bookmark if there is one. Runs the
+    DELETE, the counter UPDATE and, when adding, an INSERT in one short transaction;
+    the unique (job, user) index settles concurrent toggles. The Bookmark signals
+    clear the user's cached set. Returns True if the job is now bookmarked.
+    """
+    with transaction.atomic():
+        removed = Bookmark.objects.filter(job_id=job_id, user=user).delete()[0]
+        if not _adjust_counter([job_id], -1 if removed else 1):
+            raise NotFound('Job not found.')
+        if not removed:
+            try:
+                with transaction.atomic():
+                    Bookmark.objects.create(job_id=job_id, user=user)
+            except IntegrityError:
+                # A concurrent request bookmarked it first and counted it.
+                _adjust_counter([job_id], -1)
+    return not removed
+
+
+def set_bookmarks(user, states):
+    """
+    Apply `states` (`{job_id: bookmarked}`) for `user` in one transaction, e.g. when an
+    offline client syncs. Unknown jobs are ignored. The counters of the jobs whose
+    bookmarks changed are recounted with a single UPDATE. Returns the ids of the jobs
+    now bookmarked among `states`.
+    """
+    wanted = {job_id for job_id, bookmarked in states.items() if bookmarked}
+    unwanted = set(states) - wanted
+    with transaction.atomic():
+        existing = set(Bookmark.objects.filter(user=user, job_id__in=states).values_list('job_id', flat=True))
+        removed = existing & unwanted
+        if removed:
+            Bookmark.objects.filter(user=user, job_id__in=removed).delete()
+        added = set(Job.objects.filter(pk__in=wanted - existing).values_list('pk', flat=True))
+        if added:
+            Bookmark.objects.bulk_create([Bookmark(job_id=job_id, user=user) for job_id in added],
+                                         ignore_conflicts=True)
+        changed = removed | added
+        if changed:
+            counts = Bookmark.objects.filter(job=OuterRef('pk')).order_by().values('job').annotate(total=Count('id'))
+            Job.objects.filter(pk__in=changed).update(bookmarks=Coalesce(Subquery(counts.values('total')), 0))
+    # bulk_create sends no signals.
+    transaction.on_commit(lambda: forget_bookmarks(user.pk))
+    return (existing - removed) | added
@@ -0,0 +1,183 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('view_count', 'click_count', 'impression_count')
+TIMESTAMP_FIELDS = ('last_viewed_at', 'last_clicked_at')
+# Counters also added to the JobDailyStats row of the day they are flushed on.
+DAILY_FIELDS = {'view_count': 'views', 'click_count': 'clicks'}
+
+
+class CounterBuffer:
+    """
+    Write-behind accumulator for the hot Job counters.
+
+    Read paths record hits here instead of saving the job. The pending deltas are
+    written out by `flush()` as `UPDATE ... SET view_count = view_count + N`
+    statements, one per group of jobs sharing the same deltas, inside a single
+    transaction. A daemon thread flushes every JOB_COUNTERS_FLUSH_INTERVAL seconds
+    (set it to 0 to only flush explicitly) and whatever is left is flushed when
+    the process exits.
+    """
+
+    def __init__(self, flush_interval=None):
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._deltas = defaultdict(Counter)
+        self._timestamps = defaultdict(dict)
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'JOB_COUNTERS_FLUSH_INTERVAL', 10)
+
+    def incr(self, job_id, field, amount=1):
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"{field} is not a buffered job counter")
+        with self._lock:
+            self._deltas[job_id][field] += amount
+        self._ensure_flusher()
+
+    def incr_many(self, job_ids, field, amount=1):
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"{field} is not a buffered job counter")
+        with self._lock:
+            for job_id in job_ids:
+                self._deltas[job_id][field] += amount
+        self._ensure_flusher()
+
+    def touch(self, job_id, field, when):
+        if field not in TIMESTAMP_FIELDS:
+            raise ValueError(f"{field} is not a buffered job timestamp")
+        with self._lock:
+            current = self._timestamps[job_id].get(field)
+            if current is None or when > current:
+                self._timestamps[job_id][field] = when
+        self._ensure_flusher()
+
+    def pending(self, job_id):
+        """Deltas not yet written for `job_id`, e.g. to show up-to-date counts."""
+        with self._lock:
+            return dict(self._deltas.get(job_id, {}))
+
+    def flush(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(Counter)
+            timestamps, self._timestamps = self._timestamps, defaultdict(dict)
+
+        if not deltas and not timestamps:
+            return 0
+
+        # Jobs that received exactly the same deltas (the usual case for list pages)
+        # share one UPDATE statement.
+        groups = defaultdict(list)
+        for job_id in set(deltas) | set(timestamps):
+            key = (
+                tuple(sorted((f, n) for f, n in deltas.get(job_id, {}).items() if n)),
+                tuple(sorted(timestamps.get(job_id, {}).items())),
+            )
+            if key != ((), ()):
+                groups[key].append(job_id)
+
+        daily = {
+            job_id: {DAILY_FIELDS[field]: amount for field, amount in counts.items() if field in DAILY_FIELDS and amount}
+            for job_id, counts in deltas.items()
+        }
+
+        from .models import Job
+        from .rollups import add_daily_counts
+
+        try:
+            with transaction.atomic():
+                for (counter_items, timestamp_items), job_ids in groups.items():
+                    updates = {field: Coalesce(F(field), Value(0)) + amount for field, amount in counter_items}
+                    updates.update(dict(timestamp_items))
+                    Job.objects.filter(pk__in=job_ids).update(**updates)
+                add_daily_counts(timezone.localdate(), daily)
+        except Exception:
+            logger.exception("Failed to flush job counters, re-queueing %d jobs", len(groups))
+            self._requeue(deltas, timestamps)
+            return 0
+        return len(groups)
+
+    def _requeue(self, deltas, timestamps):
+        with self._lock:
+            for job_id, counts in deltas.items():
+                self._deltas[job_id].update(counts)
+            for job_id, values in timestamps.items():
+                for field, when in values.items():
+                    current = self._timestamps[job_id].get(field)
+                    if current is None or when > current:
+                        self._timestamps[job_id][field] = when
+
+    def _ensure_flusher(self):
+        if not self.flush_interval or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='job-counter-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval or 1):
+            if self.flush_interval:
+                try:
+                    self.flush()
+                finally:
+                    # This thread's connection would otherwise stay open, idle, between flushes.
+                    connection.close()
+
+    def clear(self):
+        with self._lock:
+            self._deltas.clear()
+            self._timestamps.clear()
+
+    def stop(self):
+        self._stopped.set()
+
+
+buffer = CounterBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    buffer.stop()
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush job counters on exit")
+
+
+def record_list_views(job_ids):
+    buffer.incr_many(job_ids, 'view_count')
+
+
+def record_detail_view(job_id, clicked, when):
+    buffer.incr(job_id, 'view_count')
+    if clicked:
+        buffer.incr(job_id, 'click_count')
+    buffer.touch(job_id, 'last_viewed_at', when)
+    buffer.touch(job_id, 'last_clicked_at', when)
+
+
+def record_impressions(counts):
+    """`counts` maps job ids to the number of new impressions of a batch."""
+    for job_id, count in counts.items():
+        buffer.incr(job_id, 'impression_count', count)
+
+
+def flush():
+    return buffer.flush()
@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+
+from core.caching import normalize_params, versioned_key
+from .filters import JobFilter
+from .models import Job
+
+CACHE_NAMESPACE = 'jobs'
+CACHE_TIMEOUT = 60 * 10
+
+SALARY_BANDS = (
+    ('0-20k', 0, 20000),
+    ('20k-50k', 20000, 50000),
+    ('50k-100k', 50000, 100000),
+    ('100k-200k', 100000, 200000),
+    ('200k+', 200000, None),
+)
+
+# Each facet is counted with every filter applied except its own, so the counts
+# show how many jobs picking another value would return.
+FACET_PARAMS = {
+    'category': ('category',),
+    'location': ('location',),
+    'job_type': ('job_type',),
+    'salary': ('min_salary', 'max_salary'),
+}
+
+
+def _filtered(filterset, ignore=()):
+    """Apply the validated filters of `filterset` except those named in `ignore`."""
+    queryset = filterset.queryset
+    for name, value in filterset.form.cleaned_data.items():
+        if name not in ignore:
+            queryset = filterset.filters[name].filter(queryset, value)
+    return queryset.order_by()
+
+
+def _related_counts(queryset, field):
+    rows = (
+        queryset.exclude(**{f'{field}__isnull': True})
+        .values(f'{field}_id', f'{field}__name', f'{field}__slug')
+        .annotate(count=Count('id'))
+        .order_by('-count', f'{field}__name')
+    )
+    return [
+        {'id': row[f'{field}_id'], 'name': row[f'{field}__name'], 'slug': row[f'{field}__slug'], 'count': row['count']}
+        for row in rows
+    ]
+
+
+def _job_type_counts(queryset):
+    labels = dict(Job.JOB_TYPE_CHOICES)
+    rows = queryset.exclude(job_type__isnull=True).values('job_type').annotate(count=Count('id')).order_by('-count')
+    return [{'value': row['job_type'], 'label': labels.get(row['job_type'], row['job_type']), 'count': row['count']}
+            for row in rows]
+
+
+def _salary_counts(queryset):
+    aggregates = {}
+    for index, (label, low, high) in enumerate(SALARY_BANDS):
+        condition = Q(min_salary__gte=low)
+        if high is not None:
+            condition &= Q(min_salary__lt=high)
+        aggregates[f'band_{index}'] = Count('id', filter=condition)
+    counts = queryset.aggregate(**aggregates)
+    return [
+        {'label': label, 'min': low, 'max': high, 'count': counts[f'band_{index}']}
+        for index, (label, low, high) in enumerate(SALARY_BANDS)
+    ]
+
+
+def compute_facets(queryset, params, request=None):
+    filterset = JobFilter(params, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return {
+        'total': _filtered(filterset).count(),
+        'category': _related_counts(_filtered(filterset, FACET_PARAMS['category']), 'category'),
+        'location': _related_counts(_filtered(filterset, FACET_PARAMS['location']), 'location'),
+        'job_type': _job_type_counts(_filtered(filterset, FACET_PARAMS['job_type'])),
+        'salary': _salary_counts(_filtered(filterset, FACET_PARAMS['salary'])),
+    }
+
+
+def get_facets(queryset, params, request=None):
+    """Facet counts for the JobFilter parameters in `params`, cached until jobs change."""
+    key = versioned_key(CACHE_NAMESPACE, 'facets', normalize_params(params, allowed=JobFilter.base_filters))
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, params, request)
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
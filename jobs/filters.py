@@ -4,11 +4,16 @@ from categories.models import Category
 from companies.models import Company
 from django_filters import rest_framework as filters
 
+from core import taxonomy
+from core.taxonomy import CachedModelChoiceFilter
+from .search import search_jobs
+
 
 class JobFilter(filters.FilterSet):
-    title = filters.CharFilter(lookup_expr='icontains')
-    location = filters.ModelChoiceFilter(queryset=Location.objects.all())
-    category = filters.ModelChoiceFilter(queryset=Category.objects.all())
+    q = filters.CharFilter(method='filter_search')
+    title = filters.CharFilter(method='filter_title')
+    location = CachedModelChoiceFilter(queryset=Location.objects.all(), taxonomy=taxonomy.locations)
+    category = CachedModelChoiceFilter(queryset=Category.objects.all(), taxonomy=taxonomy.categories)
     company = filters.ModelChoiceFilter(queryset=Company.objects.all()) #added
     min_salary = filters.NumberFilter(field_name='min_salary', lookup_expr='gte')
     max_salary = filters.NumberFilter(field_name='max_salary', lookup_expr='lte')
@@ -28,6 +33,12 @@ class JobFilter(filters.FilterSet):
             'vacancies'
         }
 
+    def filter_search(self, queryset, name, value):
+        return search_jobs(queryset, value)
+
+    def filter_title(self, queryset, name, value):
+        return search_jobs(queryset, value, column='title')
+
 
 
 # from django_filters import rest_framework as filters
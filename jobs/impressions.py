@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import Counter
+
+from django.db.models import Q
+
+from . import counters
+from .models import Impression, Job
+
+DEDUP_WINDOW = 30 * 60
+BUCKET_SECONDS = 5 * 60
+MAX_BATCH_SIZE = 500
+
+
+class RecentImpressions:
+    """
+    In-memory set of the `(job_id, visitor)` pairs seen during the dedup window.
+
+    Keys are kept in fixed-size time buckets, so expiring the oldest bucket drops a
+    whole slice of keys at once instead of tracking a timestamp per key. A key counts
+    as seen for between `window - bucket` and `window` seconds.
+    """
+
+    def __init__(self, window=DEDUP_WINDOW, bucket_seconds=BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = max(1, window // bucket_seconds)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _expire(self, current):
+        for index in [index for index in self._buckets if index <= current - self.bucket_count]:
+            del self._buckets[index]
+
+    def add_new(self, keys, now=None):
+        """Record `keys` and return those not already seen within the window, in order."""
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        fresh = []
+        with self._lock:
+            self._expire(current)
+            bucket = self._buckets.setdefault(current, set())
+            for key in keys:
+                if not any(key in seen for seen in self._buckets.values()):
+                    bucket.add(key)
+                    fresh.append(key)
+        return fresh
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+recent = RecentImpressions()
+
+
+def _resolve_jobs(references):
+    """
+    Map the job ids or slugs in `references` to job ids with a single query. A string
+    of digits is a slug when a job has it as one, and an id otherwise.
+    """
+    ids = {reference for reference in references if isinstance(reference, int)}
+    slugs = {reference for reference in references if isinstance(reference, str)}
+    ids.update(int(slug) for slug in slugs if slug.isdigit())
+    rows = list(Job.objects.filter(Q(pk__in=ids) | Q(slug__in=slugs)).values_list('id', 'slug'))
+    resolved = {}
+    for job_id, slug in rows:
+        if job_id in ids:
+            resolved[job_id] = job_id
+        if slug in slugs:
+            resolved[slug] = job_id
+    for job_id, _ in rows:
+        resolved.setdefault(str(job_id), job_id)
+    return resolved
+
+
+def ingest(impressions, source_ip=None, now=None):
+    """
+    Record a batch of impressions, each a dict with a `job` id or slug and an optional
+    `session_id`. Repeats of a `(job, session or IP)` pair within the dedup window are
+    dropped, the rest are written with one `bulk_create` and added to the buffered job
+    counters. Returns the number of `accepted`, `duplicate` and `unknown` impressions.
+    """
+    jobs = _resolve_jobs({impression['job'] for impression in impressions})
+    keys, sessions, unknown = [], {}, 0
+    for impression in impressions:
+        job_id = jobs.get(impression['job'])
+        if job_id is None:
+            unknown += 1
+            continue
+        session_id = impression.get('session_id') or None
+        key = (job_id, session_id or source_ip)
+        keys.append(key)
+        sessions[key] = session_id
+
+    fresh = recent.add_new(keys, now=now)
+    if fresh:
+        Impression.objects.bulk_create([
+            Impression(job_id=job_id, source_ip=source_ip, session_id=sessions[(job_id, visitor)])
+            for job_id, visitor in fresh
+        ])
+        counters.record_impressions(Counter(job_id for job_id, visitor in fresh))
+    return {'accepted': len(fresh), 'duplicate': len(keys) - len(fresh), 'unknown': unknown}
@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from categories.models import Category
+from companies.models import Company
+from locations.models import Location
+
+from .models import Job
+
+# Job foreign key -> model keeping `job_count` and `active_job_count` for it
+COUNTED_BY = {'category_id': Category, 'location_id': Location, 'company_id': Company}
+TRACKED_FIELDS = (*COUNTED_BY, 'is_active')
+
+
+def loaded_values(job):
+    """The tracked fields of `job` that were loaded, by name."""
+    return {field: job.__dict__[field] for field in TRACKED_FIELDS if field in job.__dict__}
+
+
+def complete(job, values):
+    """Fill the fields missing from `values` (deferred on load) from the job's row."""
+    missing = [field for field in TRACKED_FIELDS if field not in values]
+    if missing and job.pk is not None:
+        row = Job.objects.filter(pk=job.pk).values(*missing).first()
+        if row is not None:
+            values.update(row)
+    return values
+
+
+def _contributions(values):
+    """(model, pk) -> (total, active) that a job with `values` adds to the counters."""
+    if not values:
+        return {}
+    active = 1 if values.get('is_active') else 0
+    return {(model, values[field]): (1, active)
+            for field, model in COUNTED_BY.items() if values.get(field) is not None}
+
+
+def apply_change(old, new):
+    """
+    Move a job's contribution to the counters from its `old` values to its `new`
+    ones (either is None for a created or deleted job), with one F() update per
+    model and delta.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for sign, values in ((-1, old), (1, new)):
+        for key, (total, active) in _contributions(values).items():
+            deltas[key][0] += sign * total
+            deltas[key][1] += sign * active
+
+    grouped = defaultdict(list)
+    for (model, pk), (total, active) in deltas.items():
+        if total or active:
+            grouped[model, total, active].append(pk)
+    for (model, total, active), pks in grouped.items():
+        # Clamped at zero so that a drifted counter cannot fail the job's save or delete.
+        model.objects.filter(pk__in=pks).update(
+            job_count=Greatest(F('job_count') + total, Value(0)),
+            active_job_count=Greatest(F('active_job_count') + active, Value(0)),
+        )
+
+
+def rebuild():
+    """
+    Recount `job_count` and `active_job_count` of every category, location and
+    company from the jobs, with one UPDATE per model. Needed after changes that
+    bypass the Job signals (queryset updates, bulk creates, raw SQL).
+    Returns the number of rows whose counters were wrong.
+    """
+    fixed = 0
+    with transaction.atomic():
+        for field, model in COUNTED_BY.items():
+            jobs = Job.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+            total = Coalesce(Subquery(jobs.annotate(total=Count('pk')).values('total')), 0)
+            active = Coalesce(Subquery(jobs.filter(is_active=True).annotate(total=Count('pk')).values('total')), 0)
+            drifted = (model.objects.annotate(expected_total=total, expected_active=active)
+                       .exclude(job_count=F('expected_total'), active_job_count=F('expected_active')))
+            fixed += model.objects.filter(pk__in=drifted.values('pk')).update(job_count=total, active_job_count=active)
+    return fixed
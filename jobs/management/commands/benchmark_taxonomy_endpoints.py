@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from categories.models import Category
+from categories.views import CategoryDetailAPIView, CategoryListAPIView
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+
+
+class Command(BaseCommand):
+    help = ('Time the category list and detail endpoints as the job table grows, against serializing every '
+            'job of the category (what the nested `jobs` field asked for). Data is created in a transaction '
+            'that is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000', help='Comma-separated job counts.')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per measurement.')
+
+    def measure(self, call, repeat):
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            call()
+        return (time.perf_counter() - started) / repeat * 1000, len(queries)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        repeat = options['repeat']
+        list_view, detail_view = CategoryListAPIView.as_view(), CategoryDetailAPIView.as_view()
+
+        self.stdout.write(f"{'jobs':>8} {'list ms':>9} {'detail ms':>10} {'queries':>8} {'unbounded ms':>13}")
+        with transaction.atomic():
+            categories = [Category.objects.create(name=f'Benchmark {index}', slug=f'benchmark-{index}')
+                          for index in range(10)]
+            created = 0
+            for size in sizes:
+                # Signals are bypassed; the counters are not what is measured here.
+                Job.objects.bulk_create([
+                    Job(title=f'Benchmark job {index}', slug=f'benchmark-job-{index}',
+                        category=categories[index % len(categories)])
+                    for index in range(created, size)
+                ], batch_size=1000)
+                created = max(created, size)
+                category = categories[0]
+
+                list_ms, _ = self.measure(lambda: list_view(factory.get('/categories/')).render(), repeat)
+                detail_ms, queries = self.measure(
+                    lambda: detail_view(factory.get(f'/categories/{category.slug}/'),
+                                        category_slug=category.slug).render(), repeat)
+                unbounded_ms, _ = self.measure(
+                    lambda: JobSerializer(Job.objects.filter(category=category), many=True).data, 1)
+                self.stdout.write(f'{size:>8} {list_ms:>9.1f} {detail_ms:>10.1f} {queries:>8} {unbounded_ms:>13.1f}')
+            transaction.set_rollback(True)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs.job_counts import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recount the total and active jobs of every category, location and company.'
+
+    def handle(self, *args, **options):
+        fixed = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt job counts; {fixed} row(s) had drifted.'))
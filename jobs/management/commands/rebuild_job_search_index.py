@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from jobs import search
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of jobs from scratch.'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING('Full-text search needs SQLite FTS5; nothing to rebuild.'))
+            return
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Job.objects.count()} jobs.'))
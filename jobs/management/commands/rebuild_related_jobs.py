@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from jobs.related import TOP_K, rebuild_related_jobs
+
+
+class Command(BaseCommand):
+    help = 'Fit the related jobs vocabulary again and recompute the related jobs of every job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=TOP_K, help='Number of related jobs kept per job.')
+
+    def handle(self, *args, **options):
+        count = rebuild_related_jobs(k=options['top'])
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} related job entries.'))
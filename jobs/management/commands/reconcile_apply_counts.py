@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs.rollups import reconcile_applications
+
+
+class Command(BaseCommand):
+    help = 'Recount every job apply_count and the daily application stats from the job applications.'
+
+    def handle(self, *args, **options):
+        days = reconcile_applications()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled application counts over {days} job day(s).'))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.related import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Refresh the related jobs of the jobs saved since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Jobs refreshed per batch.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for saved jobs.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed = process_pending(limit=options['batch_size'])
+            if refreshed:
+                self.stdout.write(f'Refreshed the related jobs of {refreshed} job(s).')
+            if not options['loop']:
+                break
+            if refreshed < options['batch_size']:
+                time.sleep(options['interval'])
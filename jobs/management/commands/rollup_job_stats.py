@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from jobs.rollups import prune, rollup
+
+
+class Command(BaseCommand):
+    help = 'Compact new impressions, clicks and applications into daily job stats and prune old raw events.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None,
+                            help='Days raw events are kept (defaults to JOB_EVENTS_RETENTION_DAYS).')
+        parser.add_argument('--no-prune', action='store_true', help='Only roll up, keep every raw event.')
+
+    def handle(self, *args, **options):
+        rows = rollup()
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {rows} job day(s).'))
+        if not options['no_prune']:
+            deleted = prune(retention_days=options['retention_days'])
+            self.stdout.write(f'Pruned {deleted} raw event(s).')
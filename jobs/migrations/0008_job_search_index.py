@@ -0,0 +1,64 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:33
+
+import django.db.models.deletion
+import jobs.models
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other databases search with icontains instead.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_job_search USING fts5("
+        "title, description, company, location, category, "
+        "tokenize = 'porter unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO jobs_job_search (jobs_job_search, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0, 2.0, 2.0)')"
+    )
+    schema_editor.execute(
+        "INSERT INTO jobs_job_search (rowid, title, description, company, location, category) "
+        "SELECT job.id, COALESCE(job.title, ''), COALESCE(job.description, ''), COALESCE(company.name, ''), "
+        "COALESCE(location.name, ''), COALESCE(category.name, '') "
+        "FROM jobs_job AS job "
+        "LEFT JOIN companies_company AS company ON company.id = job.company_id "
+        "LEFT JOIN locations_location AS location ON location.id = job.location_id "
+        "LEFT JOIN categories_category AS category ON category.id = job.category_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS jobs_job_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_alter_job_slug'),
+        ('companies', '0004_alter_company_options'),
+        ('locations', '0002_alter_location_options'),
+        ('categories', '0002_alter_category_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchEntry',
+            fields=[
+                ('job', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='jobs.job')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('company', models.TextField()),
+                ('location', models.TextField()),
+                ('category', models.TextField()),
+                ('document', jobs.models.FullTextField(db_column='jobs_job_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'jobs_job_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
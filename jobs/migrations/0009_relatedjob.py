@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_job_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='jobs.job')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_by', to='jobs.job')),
+            ],
+            options={
+                'verbose_name_plural': 'Related Jobs',
+                'ordering': ['job', '-score'],
+                'indexes': [models.Index(fields=['job', '-score'], name='related_job_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedjob',
+            constraint=models.UniqueConstraint(fields=('job', 'related'), name='unique_related_job'),
+        ),
+    ]
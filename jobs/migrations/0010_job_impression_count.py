@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_relatedjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='impression_count',
+            field=models.IntegerField(blank=True, default=0, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_job_impression_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('impressions', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('unique_sessions', models.PositiveIntegerField(default=0)),
+                ('applications', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Job daily stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('position', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='click',
+            index=models.Index(fields=['created_at'], name='click_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='impression',
+            index=models.Index(fields=['created_at'], name='impression_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='jobdailystats',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='jobs.job'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdailystats',
+            index=models.Index(fields=['date'], name='job_daily_stats_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobdailystats',
+            constraint=models.UniqueConstraint(fields=('job', 'date'), name='unique_job_daily_stats'),
+        ),
+    ]
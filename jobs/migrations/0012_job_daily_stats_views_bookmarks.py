@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdailystats',
+            name='bookmarks',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jobdailystats',
+            name='views',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_bookmarks(apps, schema_editor):
+    Bookmark = apps.get_model('jobs', 'Bookmark')
+    Job = apps.get_model('jobs', 'Job')
+    duplicates = (
+        Bookmark.objects.values('job_id', 'user_id')
+        .annotate(first=Min('id'), total=Count('id'))
+        .filter(total__gt=1, job__isnull=False, user__isnull=False)
+        .order_by()
+    )
+    for row in duplicates:
+        Bookmark.objects.filter(job_id=row['job_id'], user_id=row['user_id']).exclude(id=row['first']).delete()
+
+    # The counters drifted along with the duplicates; recount them once.
+    counts = Bookmark.objects.filter(job=OuterRef('pk')).order_by().values('job').annotate(total=Count('id'))
+    Job.objects.update(bookmarks=Coalesce(Subquery(counts.values('total')), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_job_daily_stats_views_bookmarks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_bookmarks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookmark',
+            constraint=models.UniqueConstraint(fields=('job', 'user'), name='unique_job_bookmark'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_bookmark_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:50
+
+import mediafiles.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_job_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=mediafiles.storage.get_blob_storage, upload_to='jobs/images/'),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=mediafiles.storage.get_blob_storage, upload_to='jobs/resumes/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def rebuild_job_counts(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    for field, label in (('category', 'categories.Category'), ('location', 'locations.Location'),
+                         ('company', 'companies.Company')):
+        jobs = Job.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+        apps.get_model(label).objects.update(
+            job_count=Coalesce(Subquery(jobs.annotate(total=Count('pk')).values('total')), 0),
+            active_job_count=Coalesce(
+                Subquery(jobs.filter(is_active=True).annotate(total=Count('pk')).values('total')), 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_blob_storage'),
+        ('categories', '0003_job_counts'),
+        ('companies', '0007_job_counts'),
+        ('locations', '0004_job_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_job_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def reconcile_applications(apps, schema_editor):
+    """rollups.reconcile_applications() with the historical models, for the applications sent before the stats."""
+    Job = apps.get_model('jobs', 'Job')
+    JobApplication = apps.get_model('jobs', 'JobApplication')
+    JobDailyStats = apps.get_model('jobs', 'JobDailyStats')
+
+    counts = JobApplication.objects.filter(job=OuterRef('pk')).order_by().values('job').annotate(total=Count('id'))
+    Job.objects.update(apply_count=Coalesce(Subquery(counts.values('total')), 0))
+
+    days = {
+        (row['job_id'], row['date']): row['count']
+        for row in JobApplication.objects.filter(job__isnull=False).annotate(date=TruncDate('created_at'))
+        .values('job_id', 'date').annotate(count=Count('id')).order_by()
+    }
+    JobDailyStats.objects.bulk_create(
+        [JobDailyStats(job_id=job_id, date=date) for job_id, date in days], ignore_conflicts=True, batch_size=500)
+    JobDailyStats.objects.exclude(applications=0).update(applications=0)
+    entries = []
+    for entry in JobDailyStats.objects.filter(date__in={date for _, date in days}).only('id', 'job_id', 'date'):
+        if (entry.job_id, entry.date) in days:
+            entry.applications = days[entry.job_id, entry.date]
+            entries.append(entry)
+    JobDailyStats.objects.bulk_update(entries, ['applications'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_rebuild_job_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconcile_applications, migrations.RunPython.noop),
+    ]
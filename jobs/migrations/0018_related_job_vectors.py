@@ -0,0 +1,46 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_reconcile_applications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedJobRefresh',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='jobs.job')),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, unique=True)),
+                ('idf', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_terms', to='jobs.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='job_term_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobterm',
+            constraint=models.UniqueConstraint(fields=('job', 'term'), name='unique_job_term'),
+        ),
+    ]
@@ -1,25 +1,29 @@
 import random, string
 # from datetime import datetime, timedelta, date
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.urls import reverse
-from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.utils.timesince import timesince
 from django.core.validators import MinValueValidator, MaxValueValidator, EmailValidator, URLValidator
 from django.core.exceptions import ValidationError
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models import F, Lookup, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
 from django.dispatch import receiver
-from django.core.mail import send_mail, EmailMessage, EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 
 from locations.models import Location
 from categories.models import Category
 from companies.models import Company
 from plans.models import Plan
+from core import slugs
+from core.caching import bump_version
+from core.models import UniqueSlugMixin
+from notifications import outbox
+from mediafiles.variants import track
+from mediafiles.storage import get_blob_storage, track_references
 
 import logging
 
@@ -48,7 +52,7 @@ class EmailOrURLField(models.CharField):
         super().validate(value, model_instance)
 
 
-class Job(models.Model):
+class Job(UniqueSlugMixin, models.Model):
     # Job Type
     FULL_TIME = 'Full Time'
     PART_TIME = 'Part Time'
@@ -106,6 +110,8 @@ class Job(models.Model):
         (PER_YEAR, 'Per Year'),
     ]
 
+    slug_source = 'title'
+
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, verbose_name=_('Slug'), blank=True)
     address = models.CharField(max_length=255, verbose_name=_('Specific location'), blank=True, null=True)
@@ -118,7 +124,8 @@ class Job(models.Model):
     website = models.URLField(max_length=200, blank=True, null=True)
     application_contact = EmailOrURLField(blank=True, null=True)
     phone = models.CharField(max_length=200, blank=True, null=True)
-    image = models.ImageField(upload_to='jobs/images/', blank=True, null=True)
+    image = models.ImageField(upload_to='jobs/images/', storage=get_blob_storage, blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
 
@@ -141,6 +148,7 @@ class Job(models.Model):
     click_count = models.IntegerField(default=0, blank=True, null=True)
     apply_count = models.IntegerField(default=0, blank=True, null=True)
     bookmarks = models.IntegerField(default=0, blank=True, null=True)
+    impression_count = models.IntegerField(default=0, blank=True, null=True)
 
     vacancies = models.IntegerField(default=1, blank=True, null=True)
 
@@ -155,6 +163,8 @@ class Job(models.Model):
     last_viewed_at = models.DateTimeField(null=True, blank=True)
     last_clicked_at = models.DateTimeField(null=True, blank=True)
 
+    TRUNCATED_DESCRIPTION_LENGTH = 67
+
     class Meta:
         verbose_name_plural = "Jobs"
         ordering = ['-created_at']
@@ -167,9 +177,14 @@ class Job(models.Model):
 
     @property
     def truncated_description(self):
-        max_length = 67
-        if self.description:
-            return (self.description[:max_length] + '...') if len(self.description) > max_length else self.description
+        max_length = self.TRUNCATED_DESCRIPTION_LENGTH
+        # List queries may defer the description and only select its first characters.
+        if 'description' in self.get_deferred_fields() and hasattr(self, 'description_preview'):
+            description = self.description_preview
+        else:
+            description = self.description
+        if description:
+            return (description[:max_length] + '...') if len(description) > max_length else description
         return ''
 
     def update_last_viewed(self):
@@ -219,18 +234,12 @@ class Job(models.Model):
 
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = self.generate_unique_slug()
-        super().save(*args, **kwargs)
+        # Keeps the job counts updated by the signal receivers in the same transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def generate_unique_slug(self):
-        base_slug = slugify(self.title)
-        unique_slug = base_slug
-        counter = 1
-        while Job.objects.filter(slug=unique_slug).exists():
-            unique_slug = f"{base_slug}-{counter}"
-            counter += 1
-        return unique_slug
+        return slugs.allocate(Job, self.title, exclude_pk=None if self._state.adding else self.pk)
 
 
 
@@ -248,23 +257,197 @@ def clean(self):
     super(Job, self).clean()
 
 
+class RelatedJob(models.Model):
+    """Precomputed top-K similar jobs of `job`, maintained by `jobs.related`."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='related_by')
+    score = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Related Jobs"
+        ordering = ['job', '-score']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'related'], name='unique_related_job'),
+        ]
+        indexes = [
+            models.Index(fields=['job', '-score'], name='related_job_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class RelatedTerm(models.Model):
+    """A term of the vocabulary of `jobs.related`, with its inverse document frequency when last fitted."""
+    term = models.CharField(max_length=64, unique=True)
+    idf = models.FloatField()
+
+    def __str__(self):
+        return f"{self.term} ({self.idf:.3f})"
+
+
+class JobTerm(models.Model):
+    """A weight of the sparse TF-IDF vector of `job`, as stored by `jobs.related`."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='related_terms')
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'term'], name='unique_job_term'),
+        ]
+        indexes = [
+            models.Index(fields=['term'], name='job_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}: {self.term} ({self.weight:.3f})"
+
+
+class RelatedJobRefresh(models.Model):
+    """A job saved since its related jobs were computed, waiting for `related.process_pending()`."""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    queued_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.job_id} @ {self.queued_at}"
+
+
+class FullTextField(models.TextField):
+    """The hidden column of an SQLite FTS5 table that is named after the table itself."""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class JobSearchEntry(models.Model):
+    """
+    Row of the `jobs_job_search` FTS5 index, keyed by the job id. The table is
+    created by migration on SQLite only and maintained by `jobs.search`.
+    """
+    job = models.OneToOneField(Job, primary_key=True, db_column='rowid', related_name='search_entry',
+                               on_delete=models.DO_NOTHING, db_constraint=False)
+    title = models.TextField()
+    description = models.TextField()
+    company = models.TextField()
+    location = models.TextField()
+    category = models.TextField()
+    document = FullTextField(db_column='jobs_job_search')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'jobs_job_search'
+
+
 @receiver(post_save, sender=Job)
-def send_job_notification(sender, instance, created, **kwargs):
-    if created:
-        admin_subject = f"New Job Posted: {instance.title}"
-        admin_message = f"A new job has been posted:\n\nTitle: {instance.title}\nCompany: {instance.company.name}\nDescription: {instance.description[:100]}..."
-        admin_from_email = settings.DEFAULT_FROM_EMAIL
-        admin_recipient_list = [settings.ADMIN_EMAIL]
+def update_job_search_index(sender, instance, **kwargs):
+    from . import search
+    search.index_jobs(job_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Job)
+def queue_related_jobs_refresh(sender, instance, **kwargs):
+    from . import related
+    related.queue_refresh([instance.pk])
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_search_index(sender, instance, **kwargs):
+    from . import search
+    search.unindex_jobs([instance.pk])
 
-        send_mail(admin_subject, admin_message, admin_from_email, admin_recipient_list)
 
-        company_subject = f"Your New Job Listing: {instance.title}"
-        html_message = render_to_string('emails/new_job_notification.html', {'job': instance})
-        plain_message = strip_tags(html_message)
-        company_from_email = settings.DEFAULT_FROM_EMAIL
-        company_recipient_list = [instance.company.email]
+@receiver(post_init, sender=Job)
+def remember_counted_values(sender, instance, **kwargs):
+    from . import job_counts
+    instance._counted_values = job_counts.loaded_values(instance)
 
-        send_mail(company_subject, plain_message, company_from_email, company_recipient_list, html_message=html_message)
+
+@receiver(pre_save, sender=Job)
+@receiver(pre_delete, sender=Job)
+def complete_counted_values(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        from . import job_counts
+        job_counts.complete(instance, instance._counted_values)
+
+
+@receiver(post_save, sender=Job)
+def update_job_counts(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from . import job_counts
+    old = None if created else instance._counted_values
+    new = {**(old or {}), **job_counts.loaded_values(instance)}
+    job_counts.apply_change(old, new)
+    instance._counted_values = new
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_counts(sender, instance, **kwargs):
+    from . import job_counts
+    job_counts.apply_change(instance._counted_values, None)
+
+
+@receiver(post_save, sender=Company)
+def update_company_jobs_search_index(sender, instance, created, **kwargs):
+    if not created:
+        from . import search
+        search.index_jobs(company_id=instance.pk)
+
+
+@receiver(post_save, sender=Location)
+def update_location_jobs_search_index(sender, instance, created, **kwargs):
+    if not created:
+        from . import search
+        search.index_jobs(location_id=instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def update_category_jobs_search_index(sender, instance, created, **kwargs):
+    if not created:
+        from . import search
+        search.index_jobs(category_id=instance.pk)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_job_caches(sender, **kwargs):
+    bump_version('jobs')
+
+
+@receiver(post_save, sender=Job)
+def send_job_notification(sender, instance, created, **kwargs):
+    if created:
+        company_name = instance.company.name if instance.company else ''
+        outbox.enqueue(
+            subject=f"New Job Posted: {instance.title}",
+            body=f"A new job has been posted:\n\nTitle: {instance.title}\nCompany: {company_name}\n"
+                 f"Description: {(instance.description or '')[:100]}...",
+            to=[settings.ADMIN_EMAIL],
+        )
+
+        if instance.company and instance.company.email:
+            outbox.enqueue(
+                subject=f"Your New Job Listing: {instance.title}",
+                template='emails/new_job_notification.html',
+                context={'job': instance},
+                to=[instance.company.email],
+            )
 
 
 class Bookmark(models.Model):
@@ -276,19 +459,31 @@ class Bookmark(models.Model):
     class Meta:
         verbose_name_plural = "Bookmarks"
         ordering = ['-created_at']
+        constraints = [models.UniqueConstraint(fields=['job', 'user'], name='unique_job_bookmark')]
 
 
     def save(self, *args, **kwargs):
         super(Bookmark, self).save(*args, **kwargs)
 
 
+@receiver(post_save, sender=Bookmark)
+@receiver(post_delete, sender=Bookmark)
+def invalidate_user_bookmarks(sender, instance, **kwargs):
+    # Covers every path that saves or deletes instances: the toggle, the admin,
+    # cascades from jobs and users, the shell. bulk_create callers forget themselves.
+    if instance.user_id:
+        from .user_state import forget_bookmarks
+        user_id = instance.user_id
+        transaction.on_commit(lambda: forget_bookmarks(user_id))
+
+
 
 
 class JobApplication(models.Model):
     job = models.ForeignKey('Job', on_delete=models.CASCADE, blank=True, null=True)
     employer_email = models.EmailField()
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, blank=True, null=True)
-    resume = models.FileField(upload_to='jobs/resumes/', blank=True, null=True)
+    resume = models.FileField(upload_to='jobs/resumes/', storage=get_blob_storage, blank=True, null=True)
     cover_letter = models.TextField(max_length=2000, blank=True, null=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -300,6 +495,11 @@ class JobApplication(models.Model):
     def __str__(self):
         return f"{self.job.title} - {self.job.id}" if self.job else "No job associated"
 
+    def save(self, *args, **kwargs):
+        # Keeps the apply counters updated by the post_save receivers in the same transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def get_resume_url(self):
         return reverse('jobs:resume', kwargs={'pk': self.pk})
 
@@ -314,44 +514,41 @@ class JobApplication(models.Model):
 
 @receiver(post_save, sender=JobApplication)
 def send_application_email(sender, instance, created, **kwargs):
-    if created:
-        try:
-            # Email to employer
-            subject = f"New Job Application for {instance.job.title}"
-            html_content = render_to_string('emails/new_application_notification.html', {
-                'job': instance.job,
-                'applicant': instance.user,
-                'cover_letter': instance.cover_letter
-            })
-            text_content = strip_tags(html_content)
-            from_email = settings.DEFAULT_FROM_EMAIL
-            to_email = instance.employer_email
-            msg = EmailMultiAlternatives(subject, text_content, from_email, [to_email])
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
-            logger.info(f"Application email sent to employer for job {instance.job.id}")
-
-            # Email to admin (you can create a separate HTML template for admin if needed)
-            admin_subject = f"New Job Application for {instance.job.title}"
-            admin_html_content = render_to_string('emails/admin_new_application_notification.html', {
-                'job': instance.job,
-                'applicant': instance.user
-            })
-            admin_text_content = strip_tags(admin_html_content)
-            admin_to_email = settings.ADMIN_EMAIL
-            admin_msg = EmailMultiAlternatives(admin_subject, admin_text_content, from_email, [admin_to_email])
-            admin_msg.attach_alternative(admin_html_content, "text/html")
-            admin_msg.send()
-            logger.info(f"Application email sent to admin for job {instance.job.id}")
-
-        except Exception as e:
-            logger.error(f"Failed to send application email for job {instance.job.id}: {str(e)}")
+    if created and instance.job:
+        subject = f"New Job Application for {instance.job.title}"
+        # Email to employer
+        outbox.enqueue(
+            subject=subject,
+            template='emails/new_application_notification.html',
+            context={'job': instance.job, 'applicant': instance.user, 'cover_letter': instance.cover_letter},
+            to=[instance.employer_email],
+        )
+        # Email to admin
+        outbox.enqueue(
+            subject=subject,
+            template='emails/admin_new_application_notification.html',
+            context={'job': instance.job, 'applicant': instance.user},
+            to=[settings.ADMIN_EMAIL],
+        )
+        logger.info(f"Application emails queued for job {instance.job.id}")
 
 @receiver(post_save, sender=JobApplication)
 def update_job_apply_count(sender, instance, created, **kwargs):
-    if created and instance.job:
-        instance.job.apply_count = JobApplication.objects.filter(job=instance.job).count()
-        instance.job.save()
+    if created and instance.job_id:
+        _add_applications(instance, 1)
+
+
+@receiver(post_delete, sender=JobApplication)
+def remove_job_apply_count(sender, instance, **kwargs):
+    if instance.job_id:
+        _add_applications(instance, -1)
+
+
+def _add_applications(application, delta):
+    """Adjust the job's apply_count and the day's application stats with F() updates."""
+    from .rollups import add_daily_counts
+    Job.objects.filter(pk=application.job_id).update(apply_count=Coalesce(F('apply_count'), Value(0)) + delta)
+    add_daily_counts(timezone.localdate(application.created_at), {application.job_id: {'applications': delta}})
 
 class Impression(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, blank=True, null=True)
@@ -363,12 +560,14 @@ class Impression(models.Model):
         verbose_name_plural = "Impressions"
         ordering = ['-created_at']
         index_together = ('job', 'session_id',)
+        indexes = [models.Index(fields=['created_at'], name='impression_created_idx')]
 
     def __str__(self):
         return self.job.title + ' - ' + self.source_ip
 
     def get_impressions_count(self):
-        return Click.objects.filter(job=self.job).count()
+        from .rollups import impression_count
+        return impression_count(self.job)
 
     def get_impressions(self):
         return Click.objects.filter(job=self.job)
@@ -387,12 +586,14 @@ class Click(models.Model):
         verbose_name_plural = "Clicks"
         ordering = ['-created_at']
         index_together = ('job', 'session_id',)
+        indexes = [models.Index(fields=['created_at'], name='click_created_idx')]
 
     def __str__(self):
         return self.job.title + ' - ' + self.source_ip
 
     def get_clicks_count(self):
-        return Click.objects.filter(job=self.job).count()
+        from .rollups import click_count
+        return click_count(self.job)
 
     def get_clicks(self):
         return Click.objects.filter(job=self.job)
@@ -401,3 +602,41 @@ class Click(models.Model):
         super(Click, self).save(*args, **kwargs)
 
 
+class JobDailyStats(models.Model):
+    """
+    Per-job, per-day totals. Impressions, sessions and bookmarks are compacted from
+    the event tables by `rollups.rollup()`; views and clicks are added by the counter
+    buffer when it flushes and applications as they are sent.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    impressions = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    unique_sessions = models.PositiveIntegerField(default=0)
+    applications = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Job daily stats"
+        ordering = ['-date']
+        constraints = [models.UniqueConstraint(fields=['job', 'date'], name='unique_job_daily_stats')]
+        indexes = [models.Index(fields=['date'], name='job_daily_stats_date_idx')]
+
+    def __str__(self):
+        return f"{self.job_id} - {self.date}"
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup has consumed its event tables; events before `position` are compacted."""
+    name = models.CharField(max_length=50, unique=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+track(Job, 'image')
+track_references(Job, 'image')
+track_references(JobApplication, 'resume')
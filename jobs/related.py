@@ -0,0 +1,265 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Min, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Job, JobTerm, RelatedJob, RelatedJobRefresh, RelatedTerm
+
+TOP_K = 10
+# Terms kept in each job's vector, by weight; the rest carry little of the similarity.
+VECTOR_TERMS = 32
+MAX_TERM_LENGTH = 64
+TITLE_BOOST = 3
+BLOCK_SIZE = 512
+ROW_CHUNK_SIZE = 2000
+
+TEXT_WEIGHT = 0.6
+CATEGORY_WEIGHT = 0.2
+COMPANY_WEIGHT = 0.1
+LOCATION_WEIGHT = 0.1
+TAXONOMY_WEIGHTS = (('category_id', CATEGORY_WEIGHT), ('company_id', COMPANY_WEIGHT),
+                    ('location_id', LOCATION_WEIGHT))
+
+JOB_FIELDS = ('id', 'title', 'description', 'category_id', 'company_id', 'location_id', 'is_active')
+
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}', re.UNICODE)
+STOP_WORDS = frozenset("""
+    and are but can for from has have into job jobs more must not our out role the their they this
+    will with work you your who all any able also about should within well across per its was were
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower())
+            if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH]
+
+
+def _document(row):
+    return Counter(tokenize(row['title']) * TITLE_BOOST + tokenize(row['description']))
+
+
+def _vector(document, idf):
+    """The normalized TF-IDF weights of the `VECTOR_TERMS` heaviest terms of `document` found in `idf`."""
+    weights = [(term, (1 + math.log(count)) * idf[term]) for term, count in document.items() if term in idf]
+    weights = heapq.nlargest(VECTOR_TERMS, weights, key=itemgetter(1))
+    norm = math.sqrt(sum(weight * weight for _, weight in weights))
+    return {term: weight / norm for term, weight in weights} if norm else {}
+
+
+def fit_vocabulary():
+    """The vocabulary of every job, with the inverse document frequency of each term."""
+    frequency, total = Counter(), 0
+    for row in Job.objects.order_by().values('title', 'description').iterator(chunk_size=ROW_CHUNK_SIZE):
+        frequency.update(_document(row).keys())
+        total += 1
+    # Terms found in a single job cannot make two jobs similar.
+    return {term: math.log((1 + total) / (1 + count)) + 1 for term, count in frequency.items() if count > 1}
+
+
+def _store_vectors(vectors):
+    """
+    Insert `(job_id, vector)` pairs as JobTerm rows. A rebuild writes tens of rows
+    per job, which executemany does several times faster than bulk_create.
+    """
+    rows = [(job_id, term, weight) for job_id, vector in vectors for term, weight in vector.items()]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {JobTerm._meta.db_table} (job_id, term, weight) VALUES (%s, %s, %s)', rows)
+
+
+class Corpus:
+    """Sparse TF-IDF vectors and taxonomy of a set of jobs, for cosine-based similarity."""
+
+    def __init__(self, rows, vectors):
+        self.ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        self.candidate = np.array([bool(row['is_active']) for row in rows], dtype=bool)
+        # A missing category/company/location never matches another job's.
+        self.category = self._keys(rows, 'category_id')
+        self.company = self._keys(rows, 'company_id')
+        self.location = self._keys(rows, 'location_id')
+        self.vectors = vectors
+
+        postings = defaultdict(lambda: ([], []))
+        for position, vector in enumerate(vectors):
+            for term, weight in vector.items():
+                postings[term][0].append(position)
+                postings[term][1].append(weight)
+        self.postings = {term: (np.array(positions, dtype=np.int64), np.array(weights, dtype=np.float32))
+                         for term, (positions, weights) in postings.items()}
+
+    @staticmethod
+    def _keys(rows, field):
+        return np.array([row[field] if row[field] is not None else -index - 1 for index, row in enumerate(rows)],
+                        dtype=np.int64)
+
+    def scores(self, positions):
+        """Similarity of the jobs at `positions` (rows) to every job of the corpus (columns)."""
+        positions = np.asarray(positions)
+        scores = np.zeros((len(positions), len(self.ids)), dtype=np.float32)
+        for row, position in enumerate(positions):
+            for term, weight in self.vectors[position].items():
+                columns, weights = self.postings[term]
+                scores[row, columns] += weight * weights
+        scores *= TEXT_WEIGHT
+        scores += CATEGORY_WEIGHT * (self.category[positions, None] == self.category[None, :])
+        scores += COMPANY_WEIGHT * (self.company[positions, None] == self.company[None, :])
+        scores += LOCATION_WEIGHT * (self.location[positions, None] == self.location[None, :])
+        scores[:, ~self.candidate] = 0
+        scores[np.arange(len(positions)), positions] = 0
+        return scores
+
+    def top_related(self, positions, k=TOP_K):
+        """Yield `(job_id, related_id, score)` for the best `k` matches of each position."""
+        scores = self.scores(positions)
+        k = min(k, scores.shape[1] - 1)
+        if k <= 0:
+            return
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, position in enumerate(positions):
+            for column in best[row]:
+                score = float(scores[row, column])
+                if score > 0:
+                    yield int(self.ids[position]), int(self.ids[column]), score
+
+
+def rebuild_related_jobs(k=TOP_K):
+    """
+    Fit the vocabulary again, store the vector of every job and recompute all the
+    related jobs. Returns the number of related job rows written.
+    """
+    started_at = timezone.now()
+    idf = fit_vocabulary()
+    rows, vectors = [], []
+    for row in Job.objects.order_by().values(*JOB_FIELDS).iterator(chunk_size=ROW_CHUNK_SIZE):
+        rows.append({field: row[field] for field in JOB_FIELDS if field not in ('title', 'description')})
+        vectors.append(_vector(_document(row), idf))
+    corpus = Corpus(rows, vectors)
+    entries = []
+    for start in range(0, len(corpus.ids), BLOCK_SIZE):
+        positions = list(range(start, min(start + BLOCK_SIZE, len(corpus.ids))))
+        entries.extend(RelatedJob(job_id=job_id, related_id=related_id, score=score)
+                       for job_id, related_id, score in corpus.top_related(positions, k))
+
+    with transaction.atomic():
+        RelatedTerm.objects.all().delete()
+        RelatedTerm.objects.bulk_create([RelatedTerm(term=term, idf=value) for term, value in idf.items()],
+                                        batch_size=1000)
+        JobTerm.objects.all().delete()
+        for start in range(0, len(rows), ROW_CHUNK_SIZE):
+            chunk = slice(start, start + ROW_CHUNK_SIZE)
+            _store_vectors(zip([row['id'] for row in rows[chunk]], vectors[chunk]))
+        RelatedJob.objects.all().delete()
+        RelatedJob.objects.bulk_create(entries, batch_size=1000)
+        # Jobs saved since it started stay queued.
+        RelatedJobRefresh.objects.filter(queued_at__lt=started_at).delete()
+    return len(entries)
+
+
+def _scores(row, vector):
+    """
+    Similarity of the job of `row` to every other active job with a term or a
+    category, company or location in common: `{job_id: score}`. Read from the
+    stored vectors with one query for the terms and one for the taxonomy.
+    """
+    scores = defaultdict(float)
+    if vector:
+        query_weight = Case(*[When(term=term, then=Value(weight)) for term, weight in vector.items()],
+                            output_field=FloatField())
+        text = (JobTerm.objects.filter(term__in=list(vector), job__is_active=True).exclude(job_id=row['id'])
+                .values('job_id').annotate(score=Sum(F('weight') * query_weight)).order_by())
+        for entry in text:
+            scores[entry['job_id']] += TEXT_WEIGHT * entry['score']
+
+    shared = Q()
+    for field, _ in TAXONOMY_WEIGHTS:
+        if row[field] is not None:
+            shared |= Q(**{field: row[field]})
+    if shared:
+        fields = [field for field, _ in TAXONOMY_WEIGHTS]
+        for other in Job.objects.filter(shared, is_active=True).exclude(pk=row['id']).order_by().values('id', *fields):
+            scores[other['id']] += sum(weight for field, weight in TAXONOMY_WEIGHTS
+                                       if row[field] is not None and other[field] == row[field])
+    return scores
+
+
+def refresh_related_jobs(job_ids, k=TOP_K):
+    """
+    Refresh after `job_ids` were created or edited: store their vectors with the
+    fitted vocabulary, recompute their own related jobs against the stored
+    vectors, and insert them into the lists of other jobs they now rank in.
+    Terms the vocabulary does not know yet count from the next rebuild.
+    """
+    job_ids = list(job_ids)
+    rows = list(Job.objects.filter(pk__in=job_ids).order_by().values(*JOB_FIELDS))
+    documents = {row['id']: _document(row) for row in rows}
+    vocabulary = set().union(*documents.values())
+    idf = dict(RelatedTerm.objects.filter(term__in=vocabulary).values_list('term', 'idf')) if vocabulary else {}
+    vectors = {job_id: _vector(document, idf) for job_id, document in documents.items()}
+
+    with transaction.atomic():
+        JobTerm.objects.filter(job_id__in=job_ids).delete()
+        _store_vectors(vectors.items())
+        RelatedJob.objects.filter(Q(job_id__in=job_ids) | Q(related_id__in=job_ids)).delete()
+        if not rows:
+            return
+
+        current = {row['job_id']: row for row in RelatedJob.objects.values('job_id').annotate(
+            size=Count('id'), lowest=Min('score')).order_by()}
+        entries, changed = [], set()
+        for row in rows:
+            scores = _scores(row, vectors[row['id']])
+            best = heapq.nlargest(k, scores.items(), key=itemgetter(1))
+            entries.extend(RelatedJob(job_id=row['id'], related_id=other, score=score) for other, score in best)
+            if not row['is_active']:
+                continue
+            # Similarity is symmetric, so the scores also rank the job in every other list.
+            for other, score in scores.items():
+                if other in job_ids:
+                    continue
+                state = current.get(other)
+                if state is None or state['size'] < k or score > state['lowest']:
+                    entries.append(RelatedJob(job_id=other, related_id=row['id'], score=score))
+                    changed.add(other)
+
+        RelatedJob.objects.bulk_create(entries, batch_size=1000)
+        _trim(changed, k)
+
+
+def _trim(job_ids, k):
+    """Drop the entries beyond the best `k` of each of `job_ids`."""
+    if not job_ids:
+        return
+    overflow, kept = [], Counter()
+    for entry in RelatedJob.objects.filter(job_id__in=job_ids).order_by('job_id', '-score').values('id', 'job_id'):
+        kept[entry['job_id']] += 1
+        if kept[entry['job_id']] > k:
+            overflow.append(entry['id'])
+    if overflow:
+        RelatedJob.objects.filter(id__in=overflow).delete()
+
+
+def queue_refresh(job_ids):
+    """Queue `job_ids` for `process_pending()`, which the `refresh_related_jobs` command runs."""
+    RelatedJobRefresh.objects.bulk_create(
+        [RelatedJobRefresh(job_id=job_id) for job_id in job_ids],
+        update_conflicts=True, unique_fields=['job'], update_fields=['queued_at'])
+
+
+def process_pending(limit=100):
+    """Refresh the related jobs of up to `limit` queued jobs, oldest first. Returns the number refreshed."""
+    queued = list(RelatedJobRefresh.objects.order_by('queued_at').values_list('job_id', 'queued_at')[:limit])
+    if not queued:
+        return 0
+    refresh_related_jobs([job_id for job_id, _ in queued])
+    # Jobs saved again meanwhile stay queued.
+    done = Q()
+    for job_id, queued_at in queued:
+        done |= Q(job_id=job_id, queued_at=queued_at)
+    RelatedJobRefresh.objects.filter(done).delete()
+    return len(queued)
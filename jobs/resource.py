@@ -1,14 +1,18 @@
 from import_export import resources, fields
 from import_export.widgets import ForeignKeyWidget, ManyToManyWidget
 
-from .models import Job
+from core.bulk_import import BulkImportMixin
+from core.caching import bump_version
+
+from . import job_counts, related, search
+from .models import Job, JobApplication
 from companies.models import Company
 from locations.models import Location
 from categories.models import Category
 from accounts.models import User
 
 
-class JobResource(resources.ModelResource):
+class JobResource(BulkImportMixin, resources.ModelResource):
     title = fields.Field(attribute='title', column_name='Title')
     location = fields.Field(attribute='location', column_name='Location', widget=ForeignKeyWidget(Location, 'name'))
     address = fields.Field(attribute='address', column_name='Address')
@@ -26,7 +30,7 @@ class JobResource(resources.ModelResource):
     salary = fields.Field(attribute='salary', column_name='Salary')
     work_experience = fields.Field(attribute='work_experience', column_name='Work Experience')
     education_level = fields.Field(attribute='education_level', column_name='Education Level')
-    applicants = fields.Field(attribute='applicants', column_name='Applicants', widget=ManyToManyWidget(User, 'email'))
+    applicants = fields.Field(attribute='applicants', column_name='Applicants', widget=ManyToManyWidget(User, field='email'))
 
     class Meta:
         model = Job
@@ -35,3 +39,31 @@ class JobResource(resources.ModelResource):
             'image', 'user', 'description', 'requirements', 'responsibilities', 'job_type',
             'salary', 'work_experience',  'education_level', 'applicants')
         export_order = fields
+
+    def bulk_chunk_saved(self, created_ids, updated_ids):
+        search.index_jobs(job_ids=[*created_ids, *updated_ids])
+        bump_version('jobs')
+
+    def bulk_import_finished(self, created_ids, updated_ids):
+        job_counts.rebuild()
+        bump_version('jobs')
+        job_ids = [*created_ids, *updated_ids]
+        if len(job_ids) > related.BLOCK_SIZE:
+            related.rebuild_related_jobs()
+        elif job_ids:
+            related.queue_refresh(job_ids)
+
+
+class JobApplicationResource(resources.ModelResource):
+    job = fields.Field(attribute='job', column_name='Job', widget=ForeignKeyWidget(Job, 'slug'))
+    user = fields.Field(attribute='user', column_name='User', widget=ForeignKeyWidget(User, 'email'))
+    employer_email = fields.Field(attribute='employer_email', column_name='Employer Email')
+    resume = fields.Field(attribute='resume', column_name='Resume')
+    cover_letter = fields.Field(attribute='cover_letter', column_name='Cover Letter')
+    is_active = fields.Field(attribute='is_active', column_name='Is Active')
+    created_at = fields.Field(attribute='created_at', column_name='Created At')
+
+    class Meta:
+        model = JobApplication
+        fields = ('id', 'job', 'user', 'employer_email', 'resume', 'cover_letter', 'is_active', 'created_at')
+        export_order = fields
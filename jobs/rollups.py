@@ -0,0 +1,175 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, OuterRef, PositiveIntegerField, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from .models import Bookmark, Click, Impression, Job, JobApplication, JobDailyStats, RollupWatermark
+
+WATERMARK_NAME = 'job_daily_stats'
+# Events younger than this may still belong to uncommitted transactions.
+SETTLE_DELAY = timedelta(minutes=1)
+ROLLUP_FIELDS = ('impressions', 'unique_sessions', 'bookmarks')
+
+
+def _day_start(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def get_watermark():
+    return RollupWatermark.objects.filter(name=WATERMARK_NAME).values_list('position', flat=True).first()
+
+
+def _daily_rows(model, start, end, **aggregates):
+    return (
+        model.objects.filter(created_at__gte=start, created_at__lt=end, job__isnull=False)
+        .annotate(date=TruncDate('created_at'))
+        .values('job_id', 'date')
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+
+def _ensure_rows(keys):
+    """
+    Create the missing JobDailyStats rows for `(job_id, date)` keys. Conflicts are ignored,
+    so concurrent writers then update existing rows instead of racing on inserts.
+    """
+    keys = set(keys)
+    live = set(Job.objects.filter(pk__in={job_id for job_id, _ in keys}).values_list('pk', flat=True))
+    JobDailyStats.objects.bulk_create(
+        [JobDailyStats(job_id=job_id, date=date) for job_id, date in keys if job_id in live],
+        ignore_conflicts=True, batch_size=500,
+    )
+
+
+def _added(field, amount):
+    if amount < 0 and isinstance(JobDailyStats._meta.get_field(field), PositiveIntegerField):
+        # Removals of what was counted before the stats existed would go below 0.
+        return Greatest(F(field) + amount, 0)
+    return F(field) + amount
+
+
+def add_daily_counts(date, counts):
+    """
+    Add the per-job deltas in `counts` (`{job_id: {field: n}}`) to the stats of
+    `date`. Rows are only created for positive deltas; there is nothing to take
+    away from a day without stats.
+    """
+    counts = {job_id: values for job_id, values in counts.items() if values}
+    if not counts:
+        return
+    _ensure_rows((job_id, date) for job_id, values in counts.items() if any(n > 0 for n in values.values()))
+    groups = defaultdict(list)
+    for job_id, values in counts.items():
+        groups[tuple(sorted(values.items()))].append(job_id)
+    for items, job_ids in groups.items():
+        JobDailyStats.objects.filter(date=date, job_id__in=job_ids).update(
+            **{field: _added(field, amount) for field, amount in items})
+
+
+def _first_event():
+    firsts = [model.objects.aggregate(first=Min('created_at'))['first']
+              for model in (Impression, Bookmark)]
+    firsts = [first for first in firsts if first is not None]
+    return min(firsts) if firsts else None
+
+
+def rollup(now=None):
+    """
+    Compact the events recorded since the watermark into JobDailyStats and move the
+    watermark forward. The day the watermark falls in is recomputed from its start so
+    that the distinct session counts stay exact. Returns the number of rows written.
+    """
+    cutoff = (now or timezone.now()) - SETTLE_DELAY
+    start = get_watermark() or _first_event()
+    if start is None or start >= cutoff:
+        return 0
+    start = _day_start(timezone.localdate(start))
+
+    stats = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+    visitors = Count(Coalesce('session_id', 'source_ip'), distinct=True)
+    for row in _daily_rows(Impression, start, cutoff, count=Count('id'), visitors=visitors):
+        stats[row['job_id'], row['date']].update(impressions=row['count'], unique_sessions=row['visitors'])
+    # Bookmarks count those made that day and not removed since.
+    for row in _daily_rows(Bookmark, start, cutoff, count=Count('id')):
+        stats[row['job_id'], row['date']]['bookmarks'] = row['count']
+
+    with transaction.atomic():
+        _ensure_rows(stats)
+        entries = []
+        for entry in JobDailyStats.objects.filter(date__gte=start.date()).only('id', 'job_id', 'date'):
+            values = stats.get((entry.job_id, entry.date))
+            if values is not None:
+                for field, value in values.items():
+                    setattr(entry, field, value)
+                entries.append(entry)
+        # Only the rolled-up columns are written; views, clicks and applications are kept incrementally.
+        JobDailyStats.objects.bulk_update(entries, ROLLUP_FIELDS, batch_size=500)
+        RollupWatermark.objects.update_or_create(name=WATERMARK_NAME, defaults={'position': cutoff})
+    return len(stats)
+
+
+def reconcile_applications():
+    """
+    Recount Job.apply_count and the daily application stats from the JobApplication
+    rows, in bulk. Returns the number of job days with applications.
+    """
+    counts = JobApplication.objects.filter(job=OuterRef('pk')).order_by().values('job').annotate(total=Count('id'))
+    days = {
+        (row['job_id'], row['date']): row['count']
+        for row in JobApplication.objects.filter(job__isnull=False).annotate(date=TruncDate('created_at'))
+        .values('job_id', 'date').annotate(count=Count('id')).order_by()
+    }
+    with transaction.atomic():
+        Job.objects.update(apply_count=Coalesce(Subquery(counts.values('total')), 0))
+        JobDailyStats.objects.exclude(applications=0).update(applications=0)
+        _ensure_rows(days)
+        entries = []
+        for entry in JobDailyStats.objects.filter(date__in={date for _, date in days}).only('id', 'job_id', 'date'):
+            if (entry.job_id, entry.date) in days:
+                entry.applications = days[entry.job_id, entry.date]
+                entries.append(entry)
+        JobDailyStats.objects.bulk_update(entries, ['applications'], batch_size=500)
+    return len(days)
+
+
+def prune(retention_days=None, now=None):
+    """
+    Delete raw impressions and clicks older than the retention period. Events the
+    rollup still needs (those of the watermark's day onwards) are always kept.
+    Returns the number of rows deleted.
+    """
+    if retention_days is None:
+        retention_days = settings.JOB_EVENTS_RETENTION_DAYS
+    watermark = get_watermark()
+    if watermark is None:
+        return 0
+    today = timezone.localdate(now or timezone.now())
+    boundary = min(_day_start(today - timedelta(days=max(retention_days, 1))),
+                   _day_start(timezone.localdate(watermark)))
+    deleted = 0
+    for model in (Impression, Click):
+        deleted += model.objects.filter(created_at__lt=boundary).delete()[0]
+    return deleted
+
+
+def _event_count(model, field, job):
+    """Rolled-up total plus the raw events recorded since the watermark."""
+    watermark = get_watermark()
+    if watermark is None:
+        return model.objects.filter(job=job).count()
+    total = JobDailyStats.objects.filter(job=job).aggregate(total=Sum(field))['total'] or 0
+    return total + model.objects.filter(job=job, created_at__gte=watermark).count()
+
+
+def impression_count(job):
+    return _event_count(Impression, 'impressions', job)
+
+
+def click_count(job):
+    # Clicks reach the stats through the counter buffer, not as Click rows.
+    return JobDailyStats.objects.filter(job=job).aggregate(total=Sum('clicks'))['total'] or 0
@@ -0,0 +1,110 @@
+import re
+
+from django.db import connection
+from django.db.models import F, Q
+
+SEARCH_TABLE = 'jobs_job_search'
+SEARCH_COLUMNS = ('title', 'description', 'company', 'location', 'category')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available():
+    """The FTS5 index only exists on SQLite; other databases fall back to `icontains`."""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_expression(query, column=None):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix, so that
+    user input can never be parsed as FTS syntax.
+    """
+    tokens = TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+    expression = ' '.join(f'"{token}"*' for token in tokens)
+    if column:
+        expression = f'{column} : ({expression})'
+    return expression
+
+
+def search_jobs(queryset, query, column=None):
+    """
+    Filter `queryset` to jobs matching `query` and annotate their BM25 score as
+    `search_rank` (lower is a better match). Column weights are configured on the
+    index by migration 0008: title 10, company 4, location and category 2, description 1.
+    """
+    expression = build_match_expression(query, column)
+    if expression is None:
+        return queryset
+    if not is_available():
+        fields = [column] if column else ['title', 'description', 'company__name', 'location__name', 'category__name']
+        condition = Q()
+        for token in TOKEN_RE.findall(query):
+            token_condition = Q()
+            for field in fields:
+                token_condition |= Q(**{f'{field}__icontains': token})
+            condition &= token_condition
+        return queryset.filter(condition)
+    return queryset.filter(search_entry__document__match=expression).annotate(search_rank=F('search_entry__rank'))
+
+
+def _select_documents_sql(where):
+    return f"""
+        SELECT job.id, COALESCE(job.title, ''), COALESCE(job.description, ''), COALESCE(company.name, ''),
+               COALESCE(location.name, ''), COALESCE(category.name, '')
+        FROM jobs_job AS job
+        LEFT JOIN companies_company AS company ON company.id = job.company_id
+        LEFT JOIN locations_location AS location ON location.id = job.location_id
+        LEFT JOIN categories_category AS category ON category.id = job.category_id
+        WHERE {where}
+    """
+
+
+def index_jobs(job_ids=None, company_id=None, location_id=None, category_id=None, company_ids=None):
+    """(Re)index the given jobs, or all jobs of a company (or companies), location or category."""
+    if not is_available():
+        return
+    if job_ids is not None:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        where, params = f"job.id IN ({', '.join(['%s'] * len(job_ids))})", job_ids
+    elif company_id is not None:
+        where, params = 'job.company_id = %s', [company_id]
+    elif company_ids is not None:
+        company_ids = list(company_ids)
+        if not company_ids:
+            return
+        where, params = f"job.company_id IN ({', '.join(['%s'] * len(company_ids))})", company_ids
+    elif location_id is not None:
+        where, params = 'job.location_id = %s', [location_id]
+    elif category_id is not None:
+        where, params = 'job.category_id = %s', [category_id]
+    else:
+        where, params = '1 = 1', []
+
+    columns = ', '.join(SEARCH_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT job.id FROM jobs_job AS job WHERE {where})',
+                       params)
+        cursor.execute(f'INSERT INTO {SEARCH_TABLE} (rowid, {columns}) {_select_documents_sql(where)}', params)
+
+
+def unindex_jobs(job_ids):
+    job_ids = list(job_ids)
+    if not is_available() or not job_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(job_ids))})", job_ids)
+
+
+def rebuild_index():
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    index_jobs()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+
@@ -1,12 +1,166 @@
 from rest_framework import serializers
 
 from .models import Job, JobApplication, Impression, Click, Bookmark
+from .impressions import MAX_BATCH_SIZE
+from .bookmarks import MAX_BULK_SIZE
+from . import user_state
+from mediafiles.serializers import ImageVariantsField
+from core import taxonomy
+from core.taxonomy import CachedPrimaryKeyRelatedField
 from accounts.models import User
 from companies.models import Company
 from locations.models import Location
 from categories.models import Category
 from django.utils.text import slugify
 from django.db import IntegrityError
+from django.db.models import Prefetch
+from django.db.models.functions import Substr
+
+
+class EagerLoadingMixin:
+    """
+    Declares the related rows each serializer field reads so views can load them
+    up front with `setup_eager_loading()` instead of once per serialized row.
+
+    `select_related_plan` and `prefetch_related_plan` map a field name to the
+    lookup(s) it needs; `nested_eager_loading` maps a nested serializer field to
+    its serializer class, whose plan is applied under that field's prefix.
+
+    When `field_names` is given only the plan of those fields is applied, and the
+    query is narrowed with `.only()` to the model columns they read. Fields that
+    are not backed by a column of the same name list theirs in `model_field_plan`,
+    and `annotation_plan` adds cheap SQL stand-ins for columns left out.
+    """
+    select_related_plan = {}
+    prefetch_related_plan = {}
+    nested_eager_loading = {}
+    model_field_plan = {}
+    annotation_plan = {}
+
+    @staticmethod
+    def _as_tuple(lookups):
+        return (lookups,) if isinstance(lookups, (str, Prefetch)) else tuple(lookups)
+
+    @classmethod
+    def get_eager_loading_lookups(cls, prefix='', field_names=None):
+        def wanted(plan):
+            return [lookups for name, lookups in plan.items() if field_names is None or name in field_names]
+
+        select_related, prefetch_related = [], []
+        for lookups in wanted(cls.select_related_plan):
+            select_related.extend(prefix + lookup for lookup in cls._as_tuple(lookups))
+        for lookups in wanted(cls.prefetch_related_plan):
+            for lookup in cls._as_tuple(lookups):
+                if isinstance(lookup, Prefetch):
+                    lookup = Prefetch(prefix + lookup.prefetch_through, queryset=lookup.queryset)
+                else:
+                    lookup = prefix + lookup
+                prefetch_related.append(lookup)
+        for field_name, serializer_class in cls.nested_eager_loading.items():
+            if field_names is not None and field_name not in field_names:
+                continue
+            select_related.append(prefix + field_name)
+            nested_select, nested_prefetch = serializer_class.get_eager_loading_lookups(f'{prefix}{field_name}__')
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+        return list(dict.fromkeys(select_related)), prefetch_related
+
+    @classmethod
+    def get_only_fields(cls, field_names, extra_fields=()):
+        """Columns of `Meta.model` that serializing `field_names` reads."""
+        model_fields = {field.name for field in cls.Meta.model._meta.concrete_fields}
+        only = {cls.Meta.model._meta.pk.name, *extra_fields}
+        for name in field_names:
+            if name in cls.model_field_plan:
+                only.update(cls._as_tuple(cls.model_field_plan[name]))
+                continue
+            declared = cls._declared_fields.get(name)
+            source = getattr(declared, 'source', None) or name
+            if source.split('.')[0] in model_fields:
+                only.add(source.split('.')[0])
+        select_related, _ = cls.get_eager_loading_lookups(field_names=field_names)
+        only.update(lookup.split('__')[0] for lookup in select_related)
+        return only
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, field_names=None, extra_fields=()):
+        select_related, prefetch_related = cls.get_eager_loading_lookups(field_names=field_names)
+        queryset = queryset.select_related(*select_related).prefetch_related(*prefetch_related)
+        if field_names is not None:
+            queryset = queryset.only(*cls.get_only_fields(field_names, extra_fields))
+            for name in field_names:
+                queryset = queryset.annotate(**cls.annotation_plan.get(name, {}))
+        return queryset
+
+
+class DynamicFieldsMixin:
+    """
+    Lets read requests pick the serialized fields with `?fields=a,b` or drop some
+    with `?exclude=c,d`.
+    """
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        field_names = self.get_requested_fields(self._context.get('request'))
+        if field_names is not None:
+            for name in set(self.fields) - set(field_names):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_requested_fields(cls, request):
+        """The field names asked for by `request`, or None when it does not narrow them."""
+        if request is None or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        fields = request.query_params.get(cls.fields_query_param)
+        exclude = request.query_params.get(cls.exclude_query_param)
+        if not fields and not exclude:
+            return None
+        field_names = list(cls.Meta.fields)
+        if fields:
+            requested = {name.strip() for name in fields.split(',')}
+            field_names = [name for name in field_names if name in requested]
+        if exclude:
+            excluded = {name.strip() for name in exclude.split(',')}
+            field_names = [name for name in field_names if name not in excluded]
+        return field_names
+
+
+class UserJobStateMixin(serializers.Serializer):
+    """
+    Adds `is_bookmarked` and `has_applied` for the authenticated user, without a query
+    per job: bookmarks are looked up in the user's cached bookmark set (loaded once per
+    response) and `has_applied` is read from the annotation added by
+    `user_state.annotate_has_applied()`. Both fields are dropped for anonymous requests.
+    """
+    user_state_fields = ('is_bookmarked', 'has_applied')
+
+    is_bookmarked = serializers.SerializerMethodField()
+    has_applied = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.get_state_user() is None:
+            for name in self.user_state_fields:
+                self.fields.pop(name, None)
+
+    def get_state_user(self):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        return user if user is not None and user.is_authenticated else None
+
+    def get_is_bookmarked(self, obj):
+        # The context is shared by every row of a list, so the set is loaded once.
+        if 'bookmarked_job_ids' not in self.context:
+            self.context['bookmarked_job_ids'] = user_state.bookmarked_job_ids(self.get_state_user())
+        return obj.pk in self.context['bookmarked_job_ids']
+
+    def get_has_applied(self, obj):
+        if hasattr(obj, 'has_applied'):
+            return obj.has_applied
+        return Job.objects.filter(pk=obj.pk).filter(user_state.has_applied_expression(self.get_state_user())).exists()
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,17 +183,18 @@ class CategorySerializer(serializers.ModelSerializer):
 class CompanySerializer(serializers.ModelSerializer):
     get_user = serializers.CharField(source='user', required=False)
     logo = serializers.ImageField(required=False, allow_null=True)
+    logo_srcset = ImageVariantsField('logo')
 
     class Meta:
         model = Company
-        fields = 'id', 'name', 'slug', 'logo', 'website', 'description', 'get_user',
+        fields = 'id', 'name', 'slug', 'logo', 'logo_srcset', 'website', 'description', 'get_user',
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(DynamicFieldsMixin, UserJobStateMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer(required=False, read_only=True)
     company = serializers.PrimaryKeyRelatedField(queryset=Company.objects.all())
-    location = serializers.PrimaryKeyRelatedField(queryset=Location.objects.all())
-    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
+    location = CachedPrimaryKeyRelatedField(taxonomy.locations)
+    category = CachedPrimaryKeyRelatedField(taxonomy.categories)
     get_user = serializers.CharField(source='user', required=False, read_only=True)
     get_company = CompanySerializer(source='company', read_only=True)
     get_location = serializers.CharField(source='location', required=False, read_only=True)
@@ -49,13 +204,40 @@ class JobSerializer(serializers.ModelSerializer):
     get_job_type = serializers.CharField(source='job_type', required=False, read_only=True)
     get_created_at = serializers.DateTimeField(source='created_at', required=False, read_only=True)
     days_left = serializers.SerializerMethodField(required=False, read_only=True)
-    plan_title = serializers.ReadOnlyField(source='plan.title')
+    plan_title = serializers.SerializerMethodField()
     views_count = serializers.IntegerField(read_only=True)
     click_count = serializers.IntegerField(read_only=True)
     apply_count = serializers.IntegerField(read_only=True)
     truncated_description = serializers.CharField(read_only=True)
 
     image = serializers.ImageField(required=False, allow_null=True)
+    image_srcset = ImageVariantsField('image')
+
+    select_related_plan = {
+        'user': 'user',
+        'get_user': 'user',
+        'get_company': 'company__user',
+        'get_location': 'location',
+        'get_category': 'category',
+    }
+    prefetch_related_plan = {
+        'applicants': Prefetch('applicants', queryset=User.objects.only('id')),
+    }
+    model_field_plan = {
+        'truncated_description': (),
+        'timesince': ('created_at',),
+        'days_left': ('deadline',),
+        'views_count': (),
+        'is_bookmarked': (),
+        'has_applied': (),
+        'image_srcset': ('image', 'image_variants'),
+        'plan_title': ('plan',),
+    }
+    annotation_plan = {
+        'truncated_description': {
+            'description_preview': Substr('description', 1, Job.TRUNCATED_DESCRIPTION_LENGTH + 1),
+        },
+    }
 
     def get_timesince(self, obj):
         return obj.timesince()
@@ -63,16 +245,21 @@ class JobSerializer(serializers.ModelSerializer):
     def get_days_left(self, obj):
         return obj.days_left()
 
+    def get_plan_title(self, obj):
+        plan = taxonomy.plans.get(obj.plan_id) if obj.plan_id else None
+        return plan.title if plan else None
+
     class Meta:
         model = Job
         fields = (
             'id', 'title', 'slug', 'truncated_description', 'description', 'view_count', 'click_count', 'apply_count',
-            'get_user', 'get_company', 'get_location', 'user', 'email', 'image', 'vacancies', 'work_hours',
-            'work_hour_type', 'deadline', 'application_contact',
+            'get_user', 'get_company', 'get_location', 'user', 'email', 'image', 'image_srcset', 'vacancies',
+            'work_hours', 'work_hour_type', 'deadline', 'application_contact',
             'get_category', 'company', 'location', 'address', 'category', 'job_type', 'work_experience',
             'education_level', 'min_salary', 'max_salary', 'currency', 'salary_type',
             'created_at', 'updated_at', 'is_active', 'applicants', 'timesince', 'get_job_type',
-            'get_created_at', 'days_left', 'plan_title', 'views_count', 'click_count', 'bookmarks'
+            'get_created_at', 'days_left', 'plan_title', 'views_count', 'click_count', 'bookmarks',
+            'is_bookmarked', 'has_applied',
         )
         read_only_fields = (
         'created_at', 'updated_at', 'is_active', 'slug', 'truncated_description', 'view_count', 'click_count',
@@ -88,49 +275,80 @@ class JobSerializer(serializers.ModelSerializer):
         if image is not None:
             instance.image = image
 
-        # Get the new title if it exists
+        # Only update the slug if the title has changed
         new_title = validated_data.get('title', instance.title)
+        if new_title != instance.title:
+            self._update_slug(instance, new_title)
 
         # Update other fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        # Only update the slug if the title has changed
-        if new_title != instance.title:
-            self._update_slug(instance, new_title)
-
         instance.save()
         return instance
 
     def _update_slug(self, instance, new_title):
         """Update the slug only if necessary."""
-        new_slug = slugify(new_title)
-        if new_slug != instance.slug:
-            if not Job.objects.filter(slug=new_slug).exclude(pk=instance.pk).exists():
-                instance.slug = new_slug
-            else:
-                self._generate_unique_slug(instance, new_title)
-
-    def _generate_unique_slug(self, instance, title):
-        """Generate a unique slug for the instance."""
-        base_slug = slugify(title)
-        unique_slug = base_slug
-        num = 1
-        while Job.objects.filter(slug=unique_slug).exclude(pk=instance.pk).exists():
-            unique_slug = f"{base_slug}-{num}"
-            num += 1
-        instance.slug = unique_slug
+        if slugify(new_title) != instance.slug:
+            # Job.save allocates a free one from the new title.
+            instance.slug = ''
         
 
-class BookmarkSerializer(serializers.ModelSerializer):
+class CompanyCardSerializer(serializers.ModelSerializer):
+    logo = ImageVariantsField('logo')
+
+    class Meta:
+        model = Company
+        fields = 'id', 'name', 'slug', 'logo'
+
+
+class JobCardSerializer(JobSerializer):
+    """Compact, read-only projection of a job for list pages and cards."""
+    get_company = CompanyCardSerializer(source='company', read_only=True)
+
+    select_related_plan = {
+        'get_company': 'company',
+        'get_location': 'location',
+        'get_category': 'category',
+    }
+    prefetch_related_plan = {}
+    model_field_plan = {
+        **JobSerializer.model_field_plan,
+        'get_company': ('company__name', 'company__slug', 'company__logo', 'company__logo_variants'),
+        'get_location': ('location__name',),
+        'get_category': ('category__name',),
+    }
+
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'title', 'slug', 'truncated_description', 'get_company', 'get_location', 'get_category',
+            'company', 'location', 'category', 'job_type', 'get_job_type', 'min_salary', 'max_salary', 'currency',
+            'salary_type', 'deadline', 'days_left', 'timesince', 'created_at', 'is_bookmarked', 'has_applied',
+        )
+        read_only_fields = fields
+
+
+class BookmarkSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     job = JobSerializer()
 
+    nested_eager_loading = {'job': JobSerializer}
+
     class Meta:
         model = Bookmark
         fields = ('id', 'job', 'user', 'is_active', 'created_at')
         read_only_fields = ('created_at',)
 
 
+class BookmarkStateSerializer(serializers.Serializer):
+    job = serializers.IntegerField()
+    bookmarked = serializers.BooleanField()
+
+
+class BookmarkBulkSerializer(serializers.Serializer):
+    bookmarks = BookmarkStateSerializer(many=True, allow_empty=False, max_length=MAX_BULK_SIZE)
+
+
 class JobApplicationSerializer(serializers.ModelSerializer):
     resume = serializers.FileField(required=False, allow_null=True)
 
@@ -163,6 +381,15 @@ class ImpressionSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at',)
 
 
+class ImpressionEventSerializer(serializers.Serializer):
+    job = serializers.CharField(max_length=255)
+    session_id = serializers.CharField(max_length=200, required=False, allow_blank=True)
+
+
+class ImpressionBatchSerializer(serializers.Serializer):
+    impressions = ImpressionEventSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_SIZE)
+
+
 class ClickSerializer(serializers.ModelSerializer):
     class Meta:
         model = Click
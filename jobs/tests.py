@@ -1,3 +1,588 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from categories.models import Category
+from core import taxonomy
+from companies.models import Company
+from locations.models import Location
+from plans.models import Plan
+
+from . import counters, impressions, job_counts, related, rollups, search, user_state
+from .models import Job, Bookmark, Impression, Click, JobApplication, JobDailyStats, RelatedJob, RelatedJobRefresh
+
+
+@override_settings(JOB_COUNTERS_FLUSH_INTERVAL=0)
+class JobQueryCountTests(TestCase):
+    """The job endpoints must run a fixed number of queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='owner@example.com', password='secret')
+        cls.applicant = User.objects.create_user(email='applicant@example.com', password='secret')
+        cls.company = Company.objects.create(name='Acme', slug='acme', user=cls.user)
+        cls.location = Location.objects.create(name='Nairobi')
+        cls.category = Category.objects.create(name='Engineering')
+        cls.plan = Plan.objects.create(title='Basic', price_per_day=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.addCleanup(counters.buffer.clear)
+        self.addCleanup(cache.clear)
+        # The taxonomy rows are cached per process; reload them so the counts do not depend on test order.
+        taxonomy.invalidate_all()
+        for rows in taxonomy.TAXONOMIES:
+            rows.all()
+
+    def create_jobs(self, count):
+        for i in range(count):
+            job = Job.objects.create(
+                title=f'Engineer {i}', company=self.company, location=self.location, category=self.category,
+                plan=self.plan, user=self.user, description='Build things',
+            )
+            job.applicants.add(self.applicant)
+            Bookmark.objects.create(job=job, user=self.user)
+
+    def assertConstantQueries(self, url, num, authenticate=False):
+        if authenticate:
+            self.client.force_authenticate(self.user)
+        for total in (2, 12):
+            self.create_jobs(total - Job.objects.count())
+            with self.assertNumQueries(num):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    # The list and detail endpoints start with one query for their ETag validators.
+
+    def test_job_list(self):
+        self.assertConstantQueries('/jobs/', 3)
+
+    def test_job_card_list(self):
+        self.assertConstantQueries('/jobs/?projection=card', 2)
+
+    def test_job_list_sparse_fields(self):
+        self.assertConstantQueries('/jobs/?fields=id,title,truncated_description', 2)
+
+    def test_company_job_list(self):
+        self.assertConstantQueries('/jobs/company/acme/', 2)
+
+    def test_job_card_list_user_state(self):
+        self.client.force_authenticate(self.user)
+        self.create_jobs(12)
+        # The validators, the user's state fingerprint, the card query (with the has_applied
+        # annotation) and the user's bookmark set, which is then cached.
+        with self.assertNumQueries(4):
+            self.client.get('/jobs/?projection=card')
+        with self.assertNumQueries(3):
+            self.client.get('/jobs/?projection=card')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/jobs/{Job.objects.get(slug='engineer-1').pk}/bookmark/")
+        response = self.client.get('/jobs/?projection=card')
+        flags = {job['slug']: job['is_bookmarked'] for job in response.data['results']}
+        self.assertFalse(flags.pop('engineer-1'))
+        self.assertTrue(all(flags.values()))
+        self.assertFalse(any(job['has_applied'] for job in response.data['results']))
+
+        self.client.force_authenticate(self.applicant)
+        response = self.client.get('/jobs/?fields=id,has_applied,is_bookmarked')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'has_applied', 'is_bookmarked'})
+        self.assertTrue(all(job['has_applied'] and not job['is_bookmarked'] for job in response.data['results']))
+
+    def test_anonymous_list_has_no_user_state(self):
+        self.create_jobs(1)
+        self.assertNotIn('is_bookmarked', self.client.get('/jobs/').data['results'][0])
+
+    def test_user_bookmarks(self):
+        self.assertConstantQueries('/jobs/bookmarks/', 2, authenticate=True)
+
+    def test_job_details(self):
+        self.create_jobs(5)
+        related.process_pending()
+        with self.assertNumQueries(4):
+            response = self.client.get('/jobs/engineer-0/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['related_jobs']), 3)
+
+    def test_signed_in_job_details(self):
+        self.create_jobs(5)
+        related.process_pending()
+        self.client.force_authenticate(self.applicant)
+        # The related jobs carry the has_applied annotation too, rather than a query each.
+        with self.assertNumQueries(6):
+            response = self.client.get('/jobs/engineer-0/')
+        self.assertTrue(response.data['has_applied'])
+        self.assertEqual([job['has_applied'] for job in response.data['related_jobs']], [True] * 3)
+
+
+class CounterBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.jobs = [Job.objects.create(title=f'Engineer {i}') for i in range(3)]
+
+    def setUp(self):
+        self.buffer = counters.CounterBuffer(flush_interval=0)
+
+    def counts(self, field):
+        return [Job.objects.values_list(field, flat=True).get(pk=job.pk) for job in self.jobs]
+
+    def test_jobs_with_the_same_deltas_share_an_update(self):
+        first, second, third = [job.pk for job in self.jobs]
+        self.buffer.incr_many([first, second, third], 'view_count')
+        self.buffer.incr(third, 'click_count')
+        self.assertEqual(self.buffer.pending(third), {'view_count': 1, 'click_count': 1})
+        self.assertEqual(self.buffer.pending(999999), {})
+        with self.assertRaises(ValueError):
+            self.buffer.incr(first, 'apply_count')
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.counts('view_count'), [1, 1, 1])
+        self.assertEqual(self.counts('click_count'), [0, 0, 1])
+        self.assertEqual(self.buffer.pending(third), {})
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flushed_on_exit(self):
+        self.buffer.incr(self.jobs[0].pk, 'view_count', 3)
+        with mock.patch.object(counters, 'buffer', self.buffer):
+            counters._flush_on_exit()
+        self.assertEqual(self.counts('view_count'), [3, 0, 0])
+
+    def test_no_thread_without_an_interval(self):
+        self.buffer.incr(self.jobs[0].pk, 'view_count')
+        self.assertIsNone(self.buffer._thread)
+
+    def test_thread_closes_its_connection_after_each_flush(self):
+        buffer = counters.CounterBuffer(flush_interval=5)
+        with mock.patch.object(buffer._stopped, 'wait', side_effect=[False, False, True]), \
+                mock.patch.object(buffer, 'flush') as flush, mock.patch.object(counters.connection, 'close') as close:
+            buffer._run()
+        self.assertEqual((flush.call_count, close.call_count), (2, 2))
+
+
+@override_settings(JOB_COUNTERS_FLUSH_INTERVAL=0)
+class ImpressionIngestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme', slug='acme')
+        cls.jobs = [Job.objects.create(title=f'Engineer {i}', company=cls.company) for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.addCleanup(counters.buffer.clear)
+        self.addCleanup(impressions.recent.clear)
+
+    def post_batch(self, events):
+        return self.client.post('/jobs/impressions/', {'impressions': events}, format='json')
+
+    def test_batch_is_deduplicated_and_written_in_bulk(self):
+        events = [{'job': job.slug, 'session_id': 's1'} for job in self.jobs]
+        events += [{'job': self.jobs[0].id, 'session_id': 's1'}, {'job': self.jobs[0].slug, 'session_id': 's2'},
+                   {'job': 'missing', 'session_id': 's1'}]
+        # Resolving the jobs and one bulk INSERT.
+        with self.assertNumQueries(2):
+            response = self.post_batch(events)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {'accepted': 4, 'duplicate': 1, 'unknown': 1})
+        self.assertEqual(Impression.objects.count(), 4)
+
+        counters.flush()
+        self.assertEqual(Job.objects.get(pk=self.jobs[0].pk).impression_count, 2)
+        self.assertEqual(Job.objects.get(pk=self.jobs[1].pk).impression_count, 1)
+
+        # The same visitors again within the window.
+        self.assertEqual(self.post_batch(events).data, {'accepted': 0, 'duplicate': 5, 'unknown': 1})
+
+    def test_numeric_slugs_win_over_ids(self):
+        numeric = Job.objects.create(title='Numeric', company=self.company)
+        Job.objects.filter(pk=numeric.pk).update(slug=str(self.jobs[0].pk))
+        events = [{'job': str(self.jobs[0].pk), 'session_id': 's1'}, {'job': str(self.jobs[1].pk), 'session_id': 's1'}]
+        self.assertEqual(self.post_batch(events).data['accepted'], 2)
+        self.assertEqual(set(Impression.objects.values_list('job_id', flat=True)), {numeric.pk, self.jobs[1].pk})
+
+    def test_window_expires(self):
+        recent = impressions.RecentImpressions(window=60, bucket_seconds=30)
+        self.assertEqual(recent.add_new([(1, 'a')], now=0), [(1, 'a')])
+        self.assertEqual(recent.add_new([(1, 'a')], now=45), [])
+        self.assertEqual(recent.add_new([(1, 'a')], now=60), [(1, 'a')])
+
+    def test_batch_size_is_limited(self):
+        events = [{'job': self.jobs[0].slug}] * (impressions.MAX_BATCH_SIZE + 1)
+        self.assertEqual(self.post_batch(events).status_code, 400)
+
+
+class RelatedJobsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.design = Category.objects.create(name='Design')
+        cls.writing = Category.objects.create(name='Writing')
+        cls.jobs = [
+            Job.objects.create(title='Graphic designer', description='Illustrator and typography', category=cls.design),
+            Job.objects.create(title='Product designer', description='Figma prototypes and typography'),
+            Job.objects.create(title='Copywriter', description='Campaign copy', category=cls.writing),
+            Job.objects.create(title='Technical writer', description='Campaign documentation', category=cls.writing),
+        ]
+
+    def related(self, job):
+        return list(RelatedJob.objects.filter(job=job).order_by('-score').values_list('related__title', flat=True))
+
+    def test_saves_are_refreshed_by_the_worker(self):
+        related.rebuild_related_jobs()
+        self.assertEqual(self.related(self.jobs[0]), ['Product designer'])
+        self.assertFalse(RelatedJobRefresh.objects.exists())
+
+        job = Job.objects.create(title='Senior graphic designer', description='Typography', category=self.design)
+        self.assertFalse(RelatedJob.objects.filter(job=job).exists())
+        self.assertEqual(related.process_pending(), 1)
+        self.assertEqual(self.related(job), ['Graphic designer', 'Product designer'])
+        # Inserted in the lists of the jobs it ranks in.
+        self.assertEqual(self.related(self.jobs[0]), ['Senior graphic designer', 'Product designer'])
+        self.assertEqual(related.process_pending(), 0)
+
+        # Queries do not depend on the number of jobs.
+        self.jobs[2].save()
+        with self.assertNumQueries(14):
+            related.process_pending()
+
+    def test_incremental_scores_match_a_rebuild(self):
+        related.rebuild_related_jobs()
+        # With the same vocabulary: the text is unchanged.
+        self.jobs[1].category = self.design
+        for job in self.jobs:
+            job.save()
+        related.process_pending()
+        incremental = sorted(RelatedJob.objects.values_list('job', 'related', 'score'))
+        related.rebuild_related_jobs()
+        rebuilt = sorted(RelatedJob.objects.values_list('job', 'related', 'score'))
+        self.assertEqual([entry[:2] for entry in incremental], [entry[:2] for entry in rebuilt])
+        for (_, _, first), (_, _, second) in zip(incremental, rebuilt):
+            self.assertAlmostEqual(first, second, places=5)
+
+
+class DailyRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = Job.objects.create(title='Engineer', company=Company.objects.create(name='Acme', slug='acme'))
+
+    def record(self, model, when, session_id):
+        event = model.objects.create(job=self.job, session_id=session_id)
+        model.objects.filter(pk=event.pk).update(created_at=when)
+
+    def test_rollup_is_incremental_and_pruned(self):
+        now = timezone.now()
+        old = now - timedelta(days=100)
+        self.record(Impression, old, 'a')
+        self.record(Impression, old, 'a')
+        self.record(Click, old, 'a')
+        self.record(Impression, now - timedelta(hours=1), 'b')
+        # Clicks come from the counter buffer, and are kept by the rollup.
+        JobDailyStats.objects.create(job=self.job, date=timezone.localdate(old), clicks=1)
+
+        rollups.rollup(now=now)
+        old_stats = JobDailyStats.objects.get(job=self.job, date=timezone.localdate(old))
+        self.assertEqual((old_stats.impressions, old_stats.clicks, old_stats.unique_sessions), (2, 1, 1))
+
+        # New events after the watermark are counted from the raw table until rolled up.
+        self.record(Impression, now + timedelta(minutes=1), 'c')
+        self.assertEqual(rollups.impression_count(self.job), 4)
+        rollups.rollup(now=now + timedelta(minutes=5))
+        self.assertEqual(rollups.impression_count(self.job), 4)
+        self.assertEqual(rollups.click_count(self.job), 1)
+
+        self.assertEqual(rollups.prune(retention_days=30, now=now), 3)
+        self.assertEqual(Impression.objects.count(), 2)
+        self.assertEqual(rollups.impression_count(self.job), 4)
+
+
+class BookmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='user@example.com', password='secret')
+        company = Company.objects.create(name='Acme', slug='acme')
+        cls.jobs = [Job.objects.create(title=f'Engineer {i}', company=company) for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.addCleanup(cache.clear)
+
+    def bookmark_count(self, job):
+        return Job.objects.values_list('bookmarks', flat=True).get(pk=job.pk)
+
+    def test_toggle(self):
+        job = self.jobs[0]
+        # The DELETE (a SELECT first, for the Bookmark signals), counter UPDATE and the INSERT in a savepoint.
+        with self.assertNumQueries(7):
+            response = self.client.post(f'/jobs/{job.pk}/bookmark/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.bookmark_count(job), 1)
+
+        with self.assertNumQueries(5):
+            response = self.client.post(f'/jobs/{job.pk}/bookmark/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.bookmark_count(job), 0)
+        self.assertFalse(Bookmark.objects.exists())
+
+        self.assertEqual(self.client.post('/jobs/999999/bookmark/').status_code, 404)
+
+    def test_other_writes_clear_the_cached_set(self):
+        first, second, _ = self.jobs
+        self.assertEqual(user_state.bookmarked_job_ids(self.user), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            Bookmark.objects.create(job=first, user=self.user)
+            Bookmark.objects.create(job=second, user=self.user)
+        self.assertEqual(user_state.bookmarked_job_ids(self.user), {first.pk, second.pk})
+        # Cascades from the job.
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.get(pk=first.pk).delete()
+        self.assertEqual(user_state.bookmarked_job_ids(self.user), {second.pk})
+
+    def test_bulk_set(self):
+        first, second, third = self.jobs
+        Bookmark.objects.create(job=second, user=self.user)
+        Job.objects.filter(pk=second.pk).update(bookmarks=1)
+        states = [{'job': first.pk, 'bookmarked': True}, {'job': second.pk, 'bookmarked': False},
+                  {'job': third.pk, 'bookmarked': True}, {'job': 999999, 'bookmarked': True}]
+        response = self.client.post('/jobs/bookmarks/bulk/', {'bookmarks': states}, format='json')
+        self.assertEqual(response.data, {'bookmarked': [first.pk, third.pk]})
+        self.assertEqual([self.bookmark_count(job) for job in self.jobs], [1, 0, 1])
+
+        # Idempotent.
+        response = self.client.post('/jobs/bookmarks/bulk/', {'bookmarks': states}, format='json')
+        self.assertEqual(response.data, {'bookmarked': [first.pk, third.pk]})
+        self.assertEqual([self.bookmark_count(job) for job in self.jobs], [1, 0, 1])
+
+
+class ApplyCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='user@example.com', password='secret')
+        cls.job = Job.objects.create(title='Engineer', company=Company.objects.create(name='Acme', slug='acme'))
+
+    def apply(self):
+        return JobApplication.objects.create(job=self.job, user=self.user, employer_email='hr@acme.example')
+
+    def counts(self):
+        stats = JobDailyStats.objects.filter(job=self.job, date=timezone.localdate()).first()
+        return Job.objects.get(pk=self.job.pk).apply_count, stats.applications if stats else 0
+
+    def test_counters_follow_applications(self):
+        updated_at = Job.objects.get(pk=self.job.pk).updated_at
+        self.apply()
+        application = self.apply()
+        self.assertEqual(self.counts(), (2, 2))
+        # The job row is not saved again.
+        self.assertEqual(Job.objects.get(pk=self.job.pk).updated_at, updated_at)
+        application.delete()
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_reconcile(self):
+        self.apply()
+        Job.objects.update(apply_count=7)
+        JobDailyStats.objects.update(applications=0)
+        self.assertEqual(rollups.reconcile_applications(), 1)
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_deleting_applications_sent_before_the_stats(self):
+        self.apply()
+        application = self.apply()
+        JobDailyStats.objects.all().delete()
+        application.delete()
+        self.assertEqual(self.counts(), (1, 0))
+        self.assertFalse(JobDailyStats.objects.exists())
+
+        self.apply()
+        JobDailyStats.objects.update(applications=0)
+        JobApplication.objects.first().delete()
+        self.assertEqual(self.counts(), (1, 0))
+        # Cascades from the job.
+        Job.objects.get(pk=self.job.pk).delete()
+        self.assertFalse(JobApplication.objects.exists())
+
+
+class JobCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.design = Category.objects.create(name='Design')
+        cls.sales = Category.objects.create(name='Sales')
+        cls.nairobi = Location.objects.create(name='Nairobi')
+        cls.acme = Company.objects.create(name='Acme', slug='acme')
+
+    def counts(self, obj):
+        obj.refresh_from_db()
+        return obj.job_count, obj.active_job_count
+
+    def test_counters_follow_jobs(self):
+        job = Job.objects.create(title='Designer', category=self.design, location=self.nairobi, company=self.acme)
+        Job.objects.create(title='Intern', category=self.design, is_active=False)
+        self.assertEqual(self.counts(self.design), (2, 1))
+        self.assertEqual(self.counts(self.nairobi), (1, 1))
+        self.assertEqual(self.counts(self.acme), (1, 1))
+
+        job.category = self.sales
+        job.is_active = False
+        job.save()
+        self.assertEqual(self.counts(self.design), (1, 0))
+        self.assertEqual(self.counts(self.sales), (1, 0))
+        self.assertEqual(self.counts(self.nairobi), (1, 0))
+
+        # Instances loaded with deferred fields are completed from the database.
+        deferred = Job.objects.only('id', 'title').get(pk=job.pk)
+        deferred.is_active = True
+        deferred.save()
+        self.assertEqual(self.counts(self.sales), (1, 1))
+        Job.objects.only('id').get(pk=job.pk).delete()
+        self.assertEqual(self.counts(self.sales), (0, 0))
+        self.assertEqual(self.counts(self.acme), (0, 0))
+
+    def test_saving_a_stale_instance_keeps_the_counts(self):
+        stale = Category.objects.get(pk=self.design.pk)
+        Job.objects.create(title='Designer', category=self.design)
+        stale.description = 'Visual work'
+        stale.save()
+        self.assertEqual(self.counts(self.design), (1, 1))
+
+    def test_rebuild(self):
+        Job.objects.create(title='Designer', category=self.design, location=self.nairobi)
+        Category.objects.update(job_count=5)
+        Location.objects.update(active_job_count=0)
+        self.assertEqual(job_counts.rebuild(), 3)
+        self.assertEqual(self.counts(self.design), (1, 1))
+        self.assertEqual(self.counts(self.sales), (0, 0))
+        self.assertEqual(self.counts(self.nairobi), (1, 1))
+
+    def test_list_reads_the_counters(self):
+        for name in ('A', 'B', 'C'):
+            Job.objects.create(title='Designer', category=Category.objects.create(name=name))
+        with self.assertNumQueries(1):
+            response = APIClient().get('/categories/')
+        self.assertEqual({row['total_jobs'] for row in response.json()}, {0, 1})
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.design = Category.objects.create(name='Design')
+        cls.sales = Category.objects.create(name='Sales')
+        cls.nairobi = Location.objects.create(name='Nairobi')
+        Job.objects.create(title='Designer', category=cls.design, location=cls.nairobi, min_salary=30000)
+        Job.objects.create(title='Illustrator', category=cls.design, job_type=Job.CONTRACT, min_salary=60000)
+        Job.objects.create(title='Seller', category=cls.sales, location=cls.nairobi, min_salary=10000)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def facets(self, query=''):
+        return self.client.get(f'/jobs/facets/{query}').json()
+
+    def counts(self, facet, key='name'):
+        return {row[key]: row['count'] for row in facet}
+
+    def test_counts(self):
+        facets = self.facets()
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(self.counts(facets['category']), {'Design': 2, 'Sales': 1})
+        self.assertEqual(self.counts(facets['location']), {'Nairobi': 2})
+        self.assertEqual(self.counts(facets['job_type'], 'value'), {Job.FULL_TIME: 2, Job.CONTRACT: 1})
+        self.assertEqual(self.counts(facets['salary'], 'label'),
+                         {'0-20k': 1, '20k-50k': 1, '50k-100k': 1, '100k-200k': 0, '200k+': 0})
+
+    def test_each_facet_ignores_its_own_filter(self):
+        facets = self.facets(f'?category={self.design.pk}&job_type={Job.FULL_TIME}')
+        self.assertEqual(facets['total'], 1)
+        # Categories are counted over the full-time jobs, job types over the design jobs.
+        self.assertEqual(self.counts(facets['category']), {'Design': 1, 'Sales': 1})
+        self.assertEqual(self.counts(facets['job_type'], 'value'), {Job.FULL_TIME: 1, Job.CONTRACT: 1})
+        self.assertEqual(self.counts(facets['location']), {'Nairobi': 1})
+        self.assertEqual(self.facets('?min_salary=20000')['salary'][0]['count'], 1)
+
+    def test_saves_refresh_the_counts(self):
+        self.assertEqual(self.facets()['total'], 3)
+        job = Job.objects.create(title='Writer', category=self.sales)
+        self.assertEqual(self.counts(self.facets()['category']), {'Design': 2, 'Sales': 2})
+
+        Location.objects.filter(pk=self.nairobi.pk).update(name='Mombasa')
+        self.assertEqual(self.counts(self.facets()['location']), {'Nairobi': 2})
+        Location.objects.get(pk=self.nairobi.pk).save()
+        self.assertEqual(self.counts(self.facets()['location']), {'Mombasa': 2})
+
+        Category.objects.filter(pk=self.sales.pk).update(name='Selling')
+        Category.objects.get(pk=self.sales.pk).save()
+        self.assertEqual(self.counts(self.facets()['category']), {'Design': 2, 'Selling': 2})
+
+        job.delete()
+        self.assertEqual(self.counts(self.facets()['category']), {'Design': 2, 'Selling': 1})
+
+
+@skipUnless(search.is_available(), 'the FTS5 index only exists on SQLite')
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme', slug='acme')
+        cls.nairobi = Location.objects.create(name='Nairobi')
+        cls.design = Category.objects.create(name='Design')
+        cls.writer = Job.objects.create(title='Writer', description='Python documentation', company=cls.acme)
+        cls.developer = Job.objects.create(title='Python developer', description='Backend services',
+                                           location=cls.nairobi, category=cls.design)
+        cls.tester = Job.objects.create(title='Tester', description='Test the Python tooling and more Python')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def titles(self, query):
+        return [job['title'] for job in self.client.get(f'/jobs/{query}').json()['results']]
+
+    def matches(self, query):
+        return set(search.search_jobs(Job.objects.all(), query).values_list('title', flat=True))
+
+    def test_query_is_ordered_by_rank(self):
+        titles = self.titles('?q=pyth')
+        # The title is weighted above the description.
+        self.assertEqual(titles[0], 'Python developer')
+        self.assertEqual(set(titles), {'Writer', 'Python developer', 'Tester'})
+        self.assertEqual(self.titles('?q=python+backend'), ['Python developer'])
+        self.assertEqual(self.titles('?q=%22OR%22+*'), [])
+
+    def test_title_prefix(self):
+        self.assertEqual(self.titles('?title=pyth'), ['Python developer'])
+        self.assertEqual(self.titles('?title=documentation'), [])
+
+    def test_pages_follow_the_rank(self):
+        expected = self.titles('?q=python')
+        response = self.client.get('/jobs/?q=python&page_size=1').json()
+        pages = [job['title'] for job in response['results']]
+        while response['next']:
+            response = self.client.get(response['next']).json()
+            pages.extend(job['title'] for job in response['results'])
+        self.assertEqual(pages, expected)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.writer.title = 'Editor'
+        self.writer.save()
+        self.assertEqual(self.matches('editor'), {'Editor'})
+        self.assertEqual(self.matches('writer'), set())
+
+        self.acme.name = 'Globex'
+        self.acme.save()
+        self.nairobi.name = 'Mombasa'
+        self.nairobi.save()
+        self.design.name = 'Engineering'
+        self.design.save()
+        self.assertEqual(self.matches('globex'), {'Editor'})
+        self.assertEqual(self.matches('mombasa engineering'), {'Python developer'})
+        self.assertEqual(self.matches('acme') | self.matches('nairobi') | self.matches('design'), set())
+
+        self.tester.delete()
+        self.assertEqual(self.matches('tooling'), set())
+        # Deleting a company, location or category deletes its jobs and their index rows.
+        self.acme.delete()
+        self.nairobi.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.SEARCH_TABLE}')
+            self.assertEqual(cursor.fetchone()[0], 0)
@@ -1,11 +1,19 @@
 from django.urls import path
-from .views import JobViewSet, JobDetailsViewSet, ToggleBookmarkView, UserBookmarksView, JobApplicationView
+from .views import (JobViewSet, JobDetailsViewSet, ToggleBookmarkView, UserBookmarksView, JobApplicationView,
+                    CompanyJobViewSet, JobFacetsView, ImpressionBatchView, BulkBookmarksView, JobExportView,
+                    JobApplicationExportView)
 
 app_name = 'jobs'
 
 urlpatterns = [
     path('bookmarks/', UserBookmarksView.as_view(), name='user_bookmarks'),
+    path('bookmarks/bulk/', BulkBookmarksView.as_view(), name='bulk_bookmarks'),
     path('', JobViewSet.as_view(), name='jobs'),
+    path('facets/', JobFacetsView.as_view(), name='facets'),
+    path('export/', JobExportView.as_view(), name='export'),
+    path('applications/export/', JobApplicationExportView.as_view(), name='export_applications'),
+    path('impressions/', ImpressionBatchView.as_view(), name='impressions'),
+    path('company/<slug:slug>/', CompanyJobViewSet.as_view(), name='company_jobs'),
     path('<slug:slug>/', JobDetailsViewSet.as_view(), name='details'),
     path('apply/<int:job_id>/', JobApplicationView.as_view(), name='apply-for-job'),
     path('<int:job_id>/bookmark/', ToggleBookmarkView.as_view(), name='toggle_bookmark'),
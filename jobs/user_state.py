@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef, Subquery
+
+from .models import Bookmark, Job, JobApplication
+
+BOOKMARKS_CACHE_TIMEOUT = 60 * 60
+
+
+def _bookmarks_key(user_id):
+    return f'jobs:bookmarked:{user_id}'
+
+
+def bookmarked_job_ids(user):
+    """Ids of the jobs `user` bookmarked, cached per user until a bookmark changes."""
+    key = _bookmarks_key(user.pk)
+    job_ids = cache.get(key)
+    if job_ids is None:
+        job_ids = frozenset(Bookmark.objects.filter(user=user, is_active=True, job__isnull=False)
+                            .values_list('job_id', flat=True))
+        cache.set(key, job_ids, BOOKMARKS_CACHE_TIMEOUT)
+    return job_ids
+
+
+def forget_bookmarks(user_id):
+    cache.delete(_bookmarks_key(user_id))
+
+
+def has_applied_expression(user):
+    """True when `user` sent a JobApplication for the job or is one of its `applicants`."""
+    applied = JobApplication.objects.filter(job=OuterRef('pk'), user=user)
+    listed = Job.applicants.through.objects.filter(job=OuterRef('pk'), user=user)
+    return Exists(applied) | Exists(listed)
+
+
+def annotate_has_applied(queryset, user):
+    return queryset.annotate(has_applied=has_applied_expression(user))
+
+
+def _per_user(queryset, aggregate):
+    return Subquery(queryset.order_by().values('user').annotate(value=aggregate).values('value'))
+
+
+def state_fingerprint(user):
+    """Values that change whenever `is_bookmarked` or `has_applied` does for any job, for ETags."""
+    applications = JobApplication.objects.filter(user=OuterRef('pk'))
+    listed = Job.applicants.through.objects.filter(user=OuterRef('pk'))
+    applied = type(user).objects.filter(pk=user.pk).values_list(
+        _per_user(applications, Count('id')), _per_user(applications, Max('id')),
+        _per_user(listed, Count('id')), _per_user(listed, Max('id')),
+    ).first()
+    return (tuple(sorted(bookmarked_job_ids(user))), *(applied or ()))
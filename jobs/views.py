@@ -7,25 +7,119 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, Max, Q, Sum
 from datetime import timedelta
 
 
 from .models import Job, JobApplication, Impression, Bookmark
-from .serializers import JobSerializer, JobApplicationSerializer, ImpressionSerializer, BookmarkSerializer
+from .serializers import (JobSerializer, JobCardSerializer, JobApplicationSerializer, ImpressionSerializer,
+                          ImpressionBatchSerializer, BookmarkSerializer, BookmarkBulkSerializer)
 from .filters import JobFilter
+from core.pagination import KeysetPagination
+from core.conditional import ConditionalGetMixin
+from core.exports import ExportAPIView
+from core.response_cache import CachedResponseMixin
+from . import bookmarks, counters, impressions, user_state
+from .facets import get_facets
+from .resource import JobApplicationResource, JobResource
 
 logger = logging.getLogger(__name__)
 
 
-class JobViewSet(generics.ListCreateAPIView):
+class JobProjectionMixin:
+    """
+    Serializes job lists with the projection named by `?projection=` (e.g. `card`)
+    and narrows the query to the columns the serialized fields actually read.
+    """
+    projections = {'card': JobCardSerializer}
+    projection_query_param = 'projection'
+    # Columns read by the view itself (pagination cursor, counters) on top of the serializer's.
+    extra_fields = ('created_at',)
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            projection = self.request.query_params.get(self.projection_query_param)
+            if projection in self.projections:
+                return self.projections[projection]
+        return JobSerializer
+
+    def get_pagination_ordering(self, queryset):
+        # Searches (?q= / ?title=) are listed best match first.
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', 'id')
+        return None
+
+    def get_job_queryset(self, queryset):
+        if self.request.method != 'GET':
+            return queryset
+        serializer_class = self.get_serializer_class()
+        field_names = serializer_class.get_requested_fields(self.request)
+        if field_names is None and serializer_class is not JobSerializer:
+            field_names = serializer_class.Meta.fields
+        queryset = serializer_class.setup_eager_loading(queryset, field_names, extra_fields=self.extra_fields)
+        if self.request.user.is_authenticated and (field_names is None or 'has_applied' in field_names):
+            queryset = user_state.annotate_has_applied(queryset, self.request.user)
+        return queryset
+
+
+class JobConditionalGetMixin(ConditionalGetMixin):
+    """
+    ConditionalGetMixin for job responses, which carry per-user state (`is_bookmarked`,
+    `has_applied`) and the time-relative `days_left` and `timesince`.
+    """
+    etag_time_bucket = 300
+
+    def get_user_etag_parts(self, request):
+        if not request.user.is_authenticated:
+            return [None]
+        return [request.user.pk, *user_state.state_fingerprint(request.user)]
+
+
+class NestedJobsMixin(JobConditionalGetMixin):
+    """
+    Adds a keyset-paginated page of the instance's jobs, as cards, to retrieve
+    responses: `{..., "jobs": {"next", "previous", "results"}}`. Following pages are
+    fetched with the `cursor` of those links and sized with `?page_size=`, so the
+    cost of a response does not depend on how many jobs the instance has.
+    """
+    # Job field pointing at the retrieved instance
+    jobs_lookup = None
+    jobs_pagination_class = KeysetPagination
+
+    def get_validators(self, request):
+        # The instance and its job cards only change along with the jobs cache version.
+        return [], None
+
+    def get_nested_jobs(self, instance):
+        fields = JobCardSerializer.Meta.fields
+        queryset = JobCardSerializer.setup_eager_loading(Job.objects.filter(**{self.jobs_lookup: instance}), fields)
+        if self.request.user.is_authenticated:
+            queryset = user_state.annotate_has_applied(queryset, self.request.user)
+        paginator = self.jobs_pagination_class()
+        page = paginator.paginate_queryset(queryset, self.request)
+        data = JobCardSerializer(page, many=True, context=self.get_serializer_context()).data
+        return paginator.get_paginated_response(data).data
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        data['jobs'] = self.get_nested_jobs(instance)
+        return Response(data)
+
+
+class JobViewSet(CachedResponseMixin, JobConditionalGetMixin, JobProjectionMixin, generics.ListCreateAPIView):
     queryset = Job.objects.all()
     serializer_class = JobSerializer
     lookup_field = 'slug'
     filter_backends = (DjangoFilterBackend,)
     filterset_class = JobFilter
+    pagination_class = KeysetPagination
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    extra_fields = ('created_at', 'last_viewed_at')
+    list_view_window = timedelta(minutes=37)
+
+    def get_queryset(self):
+        return self.get_job_queryset(super().get_queryset())
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -35,60 +129,141 @@ class JobViewSet(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        current_time = timezone.now()
-        time_since_last_viewed = current_time - timedelta(minutes=37)
+    def record_list_views(self, last_viewed):
+        since = timezone.now() - self.list_view_window
+        counters.record_list_views(job_id for job_id, viewed_at in last_viewed if viewed_at > since)
 
-        for job in queryset:
-            if job.last_viewed_at and job.last_viewed_at > time_since_last_viewed:
-                job.view_count += 1
-                job.save(update_fields=['view_count'])
+    def response_cache_hit(self, request, last_viewed):
+        self.record_list_views(last_viewed)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+    def get_validators(self, request):
+        totals = self.filter_queryset(Job.objects.order_by()).aggregate(
+            updated_at=Max('updated_at'), count=Count('id'), views=Sum('view_count'), clicks=Sum('click_count'),
+            applications=Sum('apply_count'), bookmarks=Sum('bookmarks'),
+        )
+        return list(totals.values()), None
 
+    def response_not_modified(self, request):
+        # Only the ids and view times of the page, to keep counting list views.
+        jobs = self.paginate_queryset(self.filter_queryset(Job.objects.only('id', 'created_at', 'last_viewed_at')))
+        self.record_list_views([(job.id, job.last_viewed_at) for job in jobs if job.last_viewed_at])
 
-class JobDetailsViewSet(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Job.objects.all()
+    def list(self, request, *args, **kwargs):
+        jobs = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        last_viewed = [(job.id, job.last_viewed_at) for job in jobs if job.last_viewed_at]
+        self.record_list_views(last_viewed)
+        self.response_cache_meta = last_viewed
+
+        serializer = self.get_serializer(jobs, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class JobDetailsViewSet(CachedResponseMixin, JobConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = JobSerializer.setup_eager_loading(Job.objects.all())
     serializer_class = JobSerializer
     lookup_field = 'slug'
     # permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
+    related_jobs_count = 3
+    click_window = timedelta(minutes=75)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET' and self.request.user.is_authenticated:
+            queryset = user_state.annotate_has_applied(queryset, self.request.user)
+        return queryset
+
     def perform_update(self, serializer):
         serializer.save()
 
+    def get_related_jobs(self, instance):
+        queryset = JobCardSerializer.setup_eager_loading(Job.objects.all(), JobCardSerializer.Meta.fields)
+        if self.request.user.is_authenticated:
+            queryset = user_state.annotate_has_applied(queryset, self.request.user)
+        related_jobs = list(
+            queryset.filter(related_by__job=instance).order_by('-related_by__score')[:self.related_jobs_count]
+        )
+        if related_jobs:
+            return related_jobs
+        # Not precomputed yet (e.g. before the first `rebuild_related_jobs`).
+        return queryset.filter(
+            Q(category=instance.category) | Q(company=instance.company)
+        ).exclude(id=instance.id).order_by('-created_at')[:self.related_jobs_count]
+
+    def record_view(self, job_id, last_clicked_at):
+        now = timezone.now()
+        clicked = bool(last_clicked_at and last_clicked_at > now - self.click_window)
+        counters.record_detail_view(job_id, clicked, now)
+        return now
+
+    def response_cache_hit(self, request, job_id):
+        # The request that built the entry set last_clicked_at, and entries live well
+        # within the click window.
+        counters.record_detail_view(job_id, True, timezone.now())
+
+    def get_validators(self, request):
+        self.validator_row = Job.objects.filter(slug=self.kwargs['slug']).values(
+            'id', 'updated_at', 'view_count', 'click_count', 'apply_count', 'bookmarks', 'last_clicked_at').first()
+        if self.validator_row is None:
+            return None
+        return list(self.validator_row.values()), self.validator_row['updated_at']
+
+    def response_not_modified(self, request):
+        self.record_view(self.validator_row['id'], self.validator_row['last_clicked_at'])
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        time_since_last_clicked = timezone.now() - timezone.timedelta(minutes=75)
-        if instance.last_clicked_at and instance.last_clicked_at > time_since_last_clicked:
-            instance.click_count += 1
-        instance.view_count += 1
-        instance.save(update_fields=['click_count', 'view_count'])
-        instance.update_last_viewed()
-        instance.update_last_clicked()
+        now = self.record_view(instance.pk, instance.last_clicked_at)
+        self.response_cache_meta = instance.pk
+
+        # The buffered hits reach the database on the next flush; show them right away.
+        pending = counters.buffer.pending(instance.id)
+        instance.view_count = (instance.view_count or 0) + pending.get('view_count', 0)
+        instance.click_count = (instance.click_count or 0) + pending.get('click_count', 0)
+        instance.last_viewed_at = instance.last_clicked_at = now
         serializer = self.get_serializer(instance)
         data = serializer.data
 
         # Add related jobs to the response
-        related_jobs = Job.objects.filter(
-            Q(category=instance.category) | Q(company=instance.company)
-        ).exclude(id=instance.id).order_by('-created_at')[:3]
-        related_serializer = self.get_serializer(related_jobs, many=True)
-        data['related_jobs'] = related_serializer.data
+        related_jobs = self.get_related_jobs(instance)
+        data['related_jobs'] = JobCardSerializer(related_jobs, many=True, context=self.get_serializer_context()).data
 
         return Response(data)
 
 
-class CompanyJobViewSet(generics.ListAPIView):
+class CompanyJobViewSet(JobProjectionMixin, generics.ListAPIView):
     serializer_class = JobSerializer
     lookup_field = 'slug'
     filter_backends = (DjangoFilterBackend,)
     filterset_class = JobFilter
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Job.objects.filter(company__slug=self.kwargs['slug'])
+        return self.get_job_queryset(Job.objects.filter(company__slug=self.kwargs['slug']))
+
+
+class JobExportView(ExportAPIView):
+    """Streams the jobs matching the JobFilter parameters, for staff."""
+    queryset = Job.objects.all()
+    resource_class = JobResource
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = JobFilter
+    filename = 'jobs'
+
+
+class JobApplicationExportView(ExportAPIView):
+    queryset = JobApplication.objects.all()
+    resource_class = JobApplicationResource
+    filename = 'job_applications'
+
+
+class JobFacetsView(APIView):
+    """Counts per category, location, job type and salary band for the JobFilter parameters given."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(get_facets(Job.objects.all(), request.query_params, request))
 
 
 class JobApplicationView(generics.CreateAPIView):
@@ -109,26 +284,36 @@ class ToggleBookmarkView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, job_id):
-        job = get_object_or_404(Job, id=job_id)
-        bookmark, created = Bookmark.objects.get_or_create(job=job, user=request.user)
-
-        if created:
-            job.bookmarks += 1
-            job.save()
+        if bookmarks.toggle_bookmark(request.user, job_id):
             return Response({'status': 'Bookmark added'}, status=status.HTTP_201_CREATED)
         else:
-            bookmark.delete()
-            job.bookmarks -= 1
-            job.save()
             return Response({'status': 'Bookmark removed'}, status=status.HTTP_200_OK)
 
+
+class BulkBookmarksView(APIView):
+    """
+    Sets the bookmark state of many jobs at once:
+    `{"bookmarks": [{"job": <id>, "bookmarked": true|false}, ...]}`.
+    Responds with the ids of the listed jobs that are now bookmarked.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BookmarkBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        states = {entry['job']: entry['bookmarked'] for entry in serializer.validated_data['bookmarks']}
+        bookmarked = bookmarks.set_bookmarks(request.user, states)
+        return Response({'bookmarked': sorted(bookmarked)})
+
 class UserBookmarksView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        bookmarks = Bookmark.objects.filter(user=request.user)
-        serializer = BookmarkSerializer(bookmarks, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination()
+        queryset = BookmarkSerializer.setup_eager_loading(Bookmark.objects.filter(user=request.user))
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = BookmarkSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class ImpressionViewSet(generics.ListCreateAPIView):
@@ -136,15 +321,23 @@ class ImpressionViewSet(generics.ListCreateAPIView):
     serializer_class = ImpressionSerializer
     permission_classes = [permissions.AllowAny]
 
-    def perform_create(self, serializer):
-        job = Job.objects.get(slug=self.kwargs['slug'])
-        source_ip = self.request.META.get('REMOTE_ADDR')
+    def create(self, request, *args, **kwargs):
+        event = {'job': self.kwargs['slug'], 'session_id': request.data.get('session_id')}
+        result = impressions.ingest([event], source_ip=request.META.get('REMOTE_ADDR'))
+        if result['unknown']:
+            return Response({'detail': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result, status=status.HTTP_202_ACCEPTED)
 
-        if not Impression.objects.filter(
-                job=job, source_ip=source_ip, created_at__gte=timezone.now() - timedelta(minutes=30)
-        ).exists():
-            job.impression_count += 1
-            job.save(update_fields=['impression_count'])
-            job.update_last_impression()
 
-        serializer.save(job=job, source_ip=source_ip)
\ No newline at end of file
+class ImpressionBatchView(APIView):
+    """
+    Accepts the impressions of a whole list page in one request:
+    `{"impressions": [{"job": <id or slug>, "session_id": "..."}, ...]}`.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = ImpressionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = impressions.ingest(serializer.validated_data['impressions'], source_ip=request.META.get('REMOTE_ADDR'))
+        return Response(result, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_alter_location_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='country',
+            name='flag_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='flag_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0003_country_flag_variants_location_flag_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='active_job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='job_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,24 +1,21 @@
 from rest_framework import serializers
 from .models import Country, Location
 
-from jobs.models import Job
-from jobs.serializers import JobSerializer
+from mediafiles.serializers import ImageVariantsField
 
 class CountrySerializer(serializers.ModelSerializer):
+    flag_srcset = ImageVariantsField('flag')
+
     class Meta:
         model = Country
-        fields = ('id', 'name', 'slug', 'code', 'flag')
+        fields = ('id', 'name', 'slug', 'code', 'flag', 'flag_srcset')
 
 
 class LocationSerializer(serializers.ModelSerializer):
-    job_count = serializers.SerializerMethodField()
-    jobs = JobSerializer(many=True, read_only=True)
+    flag_srcset = ImageVariantsField('flag')
     # country = CountrySerializer()
 
-    def get_job_count(self, location):
-        return Job.objects.filter(location=location).count()
-
     class Meta:
         model = Location
-        fields = ('id', 'name', 'slug', 'country', 'flag', 'job_count', 'jobs')
+        fields = ('id', 'name', 'slug', 'country', 'flag', 'flag_srcset', 'job_count', 'active_job_count')
         read_only_fields = ('country',)
\ No newline at end of file
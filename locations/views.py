@@ -8,10 +8,20 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 
-class CountryList(ListCreateAPIView):
+from core import taxonomy
+from core.conditional import ConditionalGetMixin
+from core.response_cache import CachedResponseMixin
+from jobs.views import NestedJobsMixin
+
+class CountryList(ConditionalGetMixin, ListCreateAPIView):
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
     parser_classes = (MultiPartParser, FormParser,)
+    etag_namespace = taxonomy.countries.namespace
+
+    def get_validators(self, request):
+        # Country saves and deletes move the taxonomy's version.
+        return [], None
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -22,20 +32,29 @@ class CountryList(ListCreateAPIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CountryDetail(RetrieveAPIView):
+class CountryDetail(ConditionalGetMixin, RetrieveAPIView):
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
     lookup_field = 'slug'
+    etag_namespace = taxonomy.countries.namespace
 
-class LocationList(ListCreateAPIView):
+    def get_validators(self, request):
+        return [], None
+
+class LocationList(CachedResponseMixin, ConditionalGetMixin, ListCreateAPIView):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
     lookup_field = 'slug'
     parser_classes = (MultiPartParser, FormParser,)
 
-class LocationDetail(RetrieveUpdateDestroyAPIView):
+    def get_validators(self, request):
+        # Location saves and deletes, and the job counts, move the jobs cache version.
+        return [], None
+
+class LocationDetail(NestedJobsMixin, RetrieveUpdateDestroyAPIView):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
     lookup_field = 'slug'
+    jobs_lookup = 'location'
 
 
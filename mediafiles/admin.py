@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import Blob, VariantTask
+
+
+class VariantTaskAdmin(admin.ModelAdmin):
+    list_display = ('content_type', 'object_id', 'field', 'source', 'status', 'attempts', 'created_at', 'processed_at')
+    list_filter = ('status', 'content_type')
+    search_fields = ('object_id', 'source')
+    readonly_fields = ('created_at', 'processed_at', 'last_error')
+    list_per_page = 20
+
+
+admin.site.register(VariantTask, VariantTaskAdmin)
+
+
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'created_at', 'uploaded_at')
+    list_filter = ('created_at',)
+    search_fields = ('name', 'sha256')
+    readonly_fields = ('name', 'sha256', 'size', 'ref_count', 'created_at', 'uploaded_at')
+    list_per_page = 20
+
+
+admin.site.register(Blob, BlobAdmin)
@@ -0,0 +1,58 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from mediafiles.views import serve_media
+
+BENCHMARK_DIR = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = ('Compare media throughput of django.views.static.serve with mediafiles.views.serve_media. '
+            'Bodies are read in-process, so the sendfile path of WSGI file wrappers is not part of the figures.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=8, help='Size of the file served.')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per scenario.')
+
+    def measure(self, view, path, count, **headers):
+        factory = RequestFactory()
+        transferred, started = 0, time.perf_counter()
+        for _ in range(count):
+            response = view(factory.get(f'/media/{path}', **headers), path=path)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            transferred += len(body)
+            response.close()
+        elapsed = time.perf_counter() - started
+        return elapsed, transferred
+
+    def report(self, label, elapsed, transferred, count):
+        self.stdout.write(f'{label:<40} {count / elapsed:>9.1f} req/s {transferred / elapsed / 2 ** 20:>10.1f} MiB/s')
+
+    def handle(self, *args, **options):
+        size = int(options['size_mb'] * 2 ** 20)
+        count = options['requests']
+        path = f'{BENCHMARK_DIR}/sample.bin'
+        full_path = os.path.join(settings.MEDIA_ROOT, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as file:
+            file.write(os.urandom(size))
+
+        def static_serve(request, path):
+            return serve(request, path, document_root=settings.MEDIA_ROOT)
+
+        try:
+            with override_settings(MEDIA_ACCEL_REDIRECT=''):
+                self.report('static.serve, full file', *self.measure(static_serve, path, count), count)
+                self.report('serve_media, full file', *self.measure(serve_media, path, count), count)
+                etag = serve_media(RequestFactory().get('/'), path=path)['ETag']
+                self.report('serve_media, If-None-Match (304)',
+                            *self.measure(serve_media, path, count, HTTP_IF_NONE_MATCH=etag), count)
+                self.report('serve_media, 64 KiB range (206)',
+                            *self.measure(serve_media, path, count, HTTP_RANGE='bytes=0-65535'), count)
+        finally:
+            os.remove(full_path)
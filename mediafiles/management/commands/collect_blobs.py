@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from mediafiles.storage import collect_garbage, recount_references
+
+
+class Command(BaseCommand):
+    help = 'Delete the stored blobs no longer referenced by any file field.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Keep unreferenced blobs younger than this, their upload may still be in flight.')
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute the reference counts from the file fields first.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            changed = recount_references()
+            self.stdout.write(f'Corrected the reference count of {changed} blob(s).')
+        count, freed = collect_garbage(grace=timedelta(hours=options['grace_hours']))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} blob(s), {freed} bytes freed.'))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mediafiles.variants import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Generate the resized variants of newly uploaded images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Images processed per batch.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new uploads.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = process_pending(limit=options['batch_size'])
+            if done or failed:
+                self.stdout.write(f'Processed {done} image(s), {failed} failed.')
+            if not options['loop']:
+                break
+            if done + failed < options['batch_size']:
+                time.sleep(options['interval'])
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:32
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Existing blobs were last uploaded when they were created.
+    Blob = apps.get_model('mediafiles', 'Blob')
+    Blob.objects.update(uploaded_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mediafiles', '0002_blob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blob',
+            name='blob_orphan_idx',
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='uploaded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last uploaded at'),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='blob',
+            index=models.Index(fields=['ref_count', 'uploaded_at'], name='blob_orphan_idx'),
+        ),
+    ]
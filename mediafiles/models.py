@@ -0,0 +1,62 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class VariantTask(models.Model):
+    """An uploaded image waiting for its resized variants to be generated."""
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name=_('Model'))
+    object_id = models.CharField(max_length=64, verbose_name=_('Object id'))
+    field = models.CharField(max_length=100, verbose_name=_('Field'))
+    source = models.CharField(max_length=255, verbose_name=_('Source file'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name=_('Status'))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_('Attempts'))
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name=_('Next attempt at'))
+    last_error = models.TextField(blank=True, verbose_name=_('Last error'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    processed_at = models.DateTimeField(blank=True, null=True, verbose_name=_('Processed at'))
+
+    class Meta:
+        verbose_name = _('Image variant task')
+        verbose_name_plural = _('Image variant tasks')
+        ordering = ('-created_at',)
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'field'], name='unique_variant_task'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='variant_task_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type.model} {self.object_id}.{self.field} ({self.status})'
+
+
+class Blob(models.Model):
+    """A file stored once by content in `ContentAddressedStorage`, with the number of fields using it."""
+    name = models.CharField(max_length=255, unique=True, verbose_name=_('Name'))
+    sha256 = models.CharField(max_length=64, db_index=True, verbose_name=_('SHA-256'))
+    size = models.BigIntegerField(verbose_name=_('Size'))
+    ref_count = models.IntegerField(default=0, verbose_name=_('References'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    uploaded_at = models.DateTimeField(default=timezone.now, verbose_name=_('Last uploaded at'))
+
+    class Meta:
+        verbose_name = _('Blob')
+        verbose_name_plural = _('Blobs')
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['ref_count', 'uploaded_at'], name='blob_orphan_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count} refs)'
@@ -0,0 +1,52 @@
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from .variants import EXTENSIONS, PRESETS
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only map of the generated variants of an image field:
+
+        {"original": url, "thumbnail": {"webp": url, "jpg": url, "width": 64, "height": 48},
+         "card": {...}, "full": {...}, "srcset": {"webp": "url 64w, url 320w, ...", "jpg": "..."}}
+
+    Until the variants are generated (or when they belong to a previous upload) only
+    `original` is given. Empty images serialize to None.
+    """
+
+    def __init__(self, image_field, variants_field=None, **kwargs):
+        self.image_field = image_field
+        self.variants_field = variants_field or f'{image_field}_variants'
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def _url(self, storage, name):
+        url = storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, instance):
+        field_file = getattr(instance, self.image_field)
+        if not field_file:
+            return None
+        data = {'original': self._url(field_file.storage, field_file.name)}
+        variants = getattr(instance, self.variants_field) or {}
+        if variants.get('source') != field_file.name:
+            return data
+
+        srcset = defaultdict(list)
+        for preset in PRESETS:
+            entry = variants.get(preset)
+            if not entry:
+                continue
+            data[preset] = {'width': entry['width'], 'height': entry['height']}
+            for extension in EXTENSIONS.values():
+                if extension in entry:
+                    url = self._url(default_storage, entry[extension])
+                    data[preset][extension] = url
+                    srcset[extension].append(f"{url} {entry['width']}w")
+        data['srcset'] = {extension: ', '.join(candidates) for extension, candidates in srcset.items()}
+        return data
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import tempfile
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from .models import Blob
+
+BLOB_DIR = 'blobs'
+CHUNK_SIZE = 256 * 1024
+GC_BATCH_SIZE = 500
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file once, as `blobs/ab/cd/<sha256><ext>` under MEDIA_ROOT, whatever
+    the upload_to path. The upload is hashed in chunks first, and only written (or, for
+    large uploads already spooled to disk, moved) when no blob has that content yet.
+    Each blob gets a `Blob` row; `track_references()` keeps its reference count.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content in `_save`, so they never clash.
+        return name
+
+    def _save(self, name, content):
+        digest, size = hashlib.sha256(), 0
+        for chunk in content.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        blob_name = f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+
+        if not self.exists(blob_name):
+            self._write(blob_name, content)
+        # Uploading an existing blob again restarts its grace period, so that
+        # `collect_garbage()` keeps it until the new upload is attached.
+        if not Blob.objects.filter(name=blob_name).update(uploaded_at=timezone.now()):
+            Blob.objects.get_or_create(name=blob_name, defaults={'sha256': sha256, 'size': size})
+        return blob_name
+
+    def _write(self, blob_name, content):
+        """
+        Write `content` to a temporary file next to the blob and rename it into place,
+        so the blob never shows partly written. A concurrent upload of the same
+        content may rename its own copy first; the bytes are identical either way.
+        """
+        path = self.path(blob_name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                os.close(fd)
+                file_move_safe(content.temporary_file_path(), temporary_path, allow_overwrite=True)
+            else:
+                with os.fdopen(fd, 'wb') as destination:
+                    for chunk in content.chunks(CHUNK_SIZE):
+                        destination.write(chunk)
+            # mkstemp creates the file readable by its owner only.
+            os.chmod(temporary_path, self.file_permissions_mode or 0o644)
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def get_blob_storage():
+    return blob_storage
+
+
+# model label -> names of the file fields stored as blobs
+_referencing = {}
+
+
+def track_references(model, *fields):
+    """Count the `fields` of `model` pointing at each blob as references to it."""
+    label = model._meta.label_lower
+    _referencing[label] = fields
+    post_init.connect(_remember_names, sender=model, weak=False, dispatch_uid=f'blobs:init:{label}')
+    post_save.connect(_update_references, sender=model, weak=False, dispatch_uid=f'blobs:save:{label}')
+    post_delete.connect(_release_references, sender=model, weak=False, dispatch_uid=f'blobs:delete:{label}')
+
+
+def _loaded_name(instance, field):
+    """The stored name of `field`, or None when the column was deferred."""
+    if field not in instance.__dict__:
+        return None
+    value = instance.__dict__[field]
+    return (getattr(value, 'name', value) or '')
+
+
+def _adjust(names, delta):
+    names = [name for name in names if name]
+    if names:
+        Blob.objects.filter(name__in=names).update(ref_count=F('ref_count') + delta)
+
+
+def _remember_names(sender, instance, **kwargs):
+    instance._blob_names = {field: _loaded_name(instance, field) for field in _referencing[sender._meta.label_lower]}
+
+
+def _changed_names(instance, fields):
+    """The `(new, previous)` names of the `fields` of `instance` changed since it was loaded."""
+    for field in fields:
+        name, previous = _loaded_name(instance, field), instance._blob_names.get(field)
+        # Skip fields that were deferred when the instance was loaded: their old value is unknown.
+        if name is None or previous is None or name == previous:
+            continue
+        instance._blob_names[field] = name
+        yield name, previous
+
+
+def _update_references(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    changed = list(_changed_names(instance, _referencing[sender._meta.label_lower]))
+    _adjust([name for name, _ in changed], 1)
+    _adjust([previous for _, previous in changed], -1)
+
+
+def update_references(model, instances):
+    """
+    The counterpart of the post_save handler for `instances` written with
+    bulk_create or bulk_update, which send no signals. Takes one query per
+    distinct change of count, whatever the number of instances.
+    """
+    fields = _referencing.get(model._meta.label_lower)
+    if not fields:
+        return
+    deltas = Counter()
+    for instance in instances:
+        for name, previous in _changed_names(instance, fields):
+            deltas[name] += 1
+            deltas[previous] -= 1
+    by_delta = defaultdict(list)
+    for name, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(name)
+    for delta, names in by_delta.items():
+        _adjust(names, delta)
+
+
+def _release_references(sender, instance, **kwargs):
+    _adjust(instance._blob_names.values(), -1)
+
+
+def recount_references():
+    """Recompute every blob's reference count from the tracked fields. Returns the blobs changed."""
+    counts = {}
+    for label, fields in _referencing.items():
+        model = apps.get_model(label)
+        for field in fields:
+            rows = model._default_manager.filter(**{f'{field}__startswith': f'{BLOB_DIR}/'}).values(field)
+            for row in rows.annotate(total=Count('pk')).order_by():
+                counts[row[field]] = counts.get(row[field], 0) + row['total']
+    changed = []
+    for blob in Blob.objects.only('id', 'name', 'ref_count').iterator():
+        if blob.ref_count != counts.get(blob.name, 0):
+            blob.ref_count = counts.get(blob.name, 0)
+            changed.append(blob)
+    Blob.objects.bulk_update(changed, ['ref_count'], batch_size=GC_BATCH_SIZE)
+    return len(changed)
+
+
+def collect_garbage(grace=timedelta(hours=24)):
+    """
+    Delete the blobs nobody references. Blobs uploaded (or uploaded again) within
+    `grace` are kept, as the upload may not be attached to a saved object yet.
+    Returns `(blobs, bytes)` freed.
+    """
+    count = freed = 0
+    orphaned = {'ref_count__lte': 0, 'uploaded_at__lt': timezone.now() - grace}
+    candidates = Blob.objects.filter(**orphaned)
+    for blob in candidates.only('id', 'name', 'size').iterator(chunk_size=GC_BATCH_SIZE):
+        # Re-checked row by row in case the blob was referenced or uploaded again meanwhile.
+        if Blob.objects.filter(pk=blob.pk, **orphaned).delete()[0]:
+            blob_storage.delete(blob.name)
+            count += 1
+            freed += blob.size
+    return count, freed
@@ -0,0 +1,196 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from companies.models import Company
+from core import taxonomy
+from locations.models import Location
+from jobs.serializers import CompanyCardSerializer
+
+from . import storage, variants
+from .models import Blob, VariantTask
+
+
+def make_image(size=(800, 600), mode='RGB', image_format='PNG'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format)
+    return SimpleUploadedFile(f'logo.{image_format.lower()}', buffer.getvalue())
+
+
+class TemporaryMediaMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ImageVariantTests(TemporaryMediaMixin, TestCase):
+    def test_upload_is_queued_and_processed(self):
+        company = Company.objects.create(name='Acme', slug='acme', logo=make_image())
+        task = VariantTask.objects.get()
+        self.assertEqual((task.field, task.source), ('logo', company.logo.name))
+        self.assertEqual(CompanyCardSerializer(company).data['logo'], {'original': company.logo.url})
+
+        self.assertEqual(variants.process_pending(), (1, 0))
+        company.refresh_from_db()
+        card = company.logo_variants['card']
+        self.assertEqual((card['width'], card['height']), (320, 240))
+        self.assertTrue(card['webp'].endswith('.webp') and card['jpg'].endswith('.jpg'))
+        self.assertTrue(company.logo.storage.exists(card['webp']))
+
+        logo = CompanyCardSerializer(company).data['logo']
+        self.assertEqual(set(logo), {'original', 'thumbnail', 'card', 'full', 'srcset'})
+        self.assertIn(' 320w', logo['srcset']['webp'])
+        # Saving again without a new upload does not queue more work.
+        company.save()
+        self.assertEqual(variants.process_pending(), (0, 0))
+
+    def test_processing_invalidates_responses(self):
+        Company.objects.create(name='Acme', slug='acme', logo=make_image())
+        location = Location.objects.create(name='Nairobi', flag=make_image((40, 40)))
+        etag = self.client.get('/companies/acme/')['ETag']
+        self.assertEqual(taxonomy.locations.get(location.pk).flag_variants, {})
+        variants.process_pending()
+        self.assertEqual(self.client.get('/companies/acme/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertIn('card', taxonomy.locations.get(location.pk).flag_variants)
+
+    def test_transparent_images_fall_back_to_png(self):
+        company = Company.objects.create(name='Acme', slug='acme', logo=make_image((40, 40), 'RGBA'))
+        variants.process_pending()
+        company.refresh_from_db()
+        # Small images are not upscaled, so every preset shares the same files.
+        self.assertEqual(company.logo_variants['full'], company.logo_variants['thumbnail'])
+        self.assertTrue(company.logo_variants['full']['png'].endswith('.png'))
+
+    def test_unreadable_upload_fails_without_retry(self):
+        Company.objects.create(name='Acme', slug='acme', logo=SimpleUploadedFile('logo.png', b'not an image'))
+        self.assertEqual(variants.process_pending(), (0, 1))
+        self.assertEqual(VariantTask.objects.get().status, VariantTask.FAILED)
+
+
+class BlobStorageTests(TemporaryMediaMixin, TestCase):
+    def blob_files(self):
+        return [name for _, _, names in os.walk(os.path.join(self.media_root, storage.BLOB_DIR)) for name in names]
+
+    def test_identical_uploads_share_one_blob(self):
+        content = make_image().read()
+        first = Company.objects.create(name='Acme', slug='acme', logo=SimpleUploadedFile('a.png', content))
+        second = Company.objects.create(name='Beta', slug='beta', logo=SimpleUploadedFile('b.png', content))
+        self.assertEqual(first.logo.name, second.logo.name)
+        self.assertTrue(first.logo.name.startswith('blobs/'))
+        self.assertEqual(len(self.blob_files()), 1)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+        Company.objects.get(pk=first.pk).delete()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+        # Replacing the last reference orphans the blob, which the collector removes.
+        second = Company.objects.get(pk=second.pk)
+        second.logo = SimpleUploadedFile('c.png', make_image((10, 10)).read())
+        second.save()
+        self.assertEqual(sorted(Blob.objects.values_list('ref_count', flat=True)), [0, 1])
+        self.assertEqual(storage.collect_garbage(grace=timedelta(0))[0], 1)
+        self.assertEqual(len(self.blob_files()), 1)
+        self.assertEqual(Company.objects.get(pk=second.pk).logo.read(), make_image((10, 10)).read())
+
+    def test_concurrent_identical_uploads(self):
+        content = make_image().read()
+        name = storage.blob_storage.save('logo.png', SimpleUploadedFile('logo.png', content))
+        temporary = TemporaryUploadedFile('logo.png', 'image/png', len(content), None)
+        self.addCleanup(temporary.close)
+        temporary.write(content)
+        temporary.seek(0)
+        # Another upload of the same content wins between the existence check and the write.
+        with mock.patch.object(storage.blob_storage, 'exists', return_value=False):
+            for upload in (SimpleUploadedFile('logo.png', content), temporary):
+                self.assertEqual(storage.blob_storage.save('logo.png', upload), name)
+        self.assertEqual(self.blob_files(), [os.path.basename(name)])
+        self.assertEqual(storage.blob_storage.open(name).read(), content)
+
+    def test_uploading_again_restarts_the_grace_period(self):
+        content = make_image().read()
+        storage.blob_storage.save('logo.png', SimpleUploadedFile('logo.png', content))
+        Blob.objects.update(created_at=timezone.now() - timedelta(days=2), uploaded_at=timezone.now() - timedelta(days=2))
+        storage.blob_storage.save('logo.png', SimpleUploadedFile('logo.png', content))
+        self.assertEqual(storage.collect_garbage(grace=timedelta(hours=1)), (0, 0))
+        Blob.objects.update(uploaded_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(storage.collect_garbage(grace=timedelta(hours=1))[0], 1)
+        self.assertEqual(self.blob_files(), [])
+
+    def test_deferred_fields_are_not_counted(self):
+        Company.objects.create(name='Acme', slug='acme', logo=make_image())
+        company = Company.objects.only('id', 'name').get()
+        company.name = 'Acme Ltd'
+        company.save()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+    def test_recount(self):
+        Company.objects.create(name='Acme', slug='acme', logo=make_image())
+        Blob.objects.update(ref_count=5)
+        self.assertEqual(storage.recount_references(), 1)
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+
+class MediaServingTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 4
+        for name in ('docs/report.pdf', 'blobs/ab/cd/abcd1234.pdf'):
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(self.media_root, name), 'wb') as file:
+                file.write(self.content)
+
+    def test_full_response_has_validators(self):
+        response = self.client.get('/media/docs/report.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get('/media/docs/report.pdf', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_content_addressed_names_are_immutable(self):
+        response = self.client.get('/media/blobs/ab/cd/abcd1234.pdf')
+        self.assertEqual(response['ETag'], '"abcd1234"')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_ranges(self):
+        response = self.client.get('/media/docs/report.pdf', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+        response = self.client.get('/media/docs/report.pdf', HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-4:])
+
+        response = self.client.get('/media/docs/report.pdf', HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+        # A stale If-Range gets the whole file.
+        response = self.client.get('/media/docs/report.pdf', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        response = self.client.get('/media/docs/report.pdf')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/docs/report.pdf')
+        self.assertEqual(response.content, b'')
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.client.get('/media/docs/missing.pdf').status_code, 404)
+        # safe_join's SuspiciousFileOperation, as with django.views.static.serve.
+        self.assertEqual(self.client.get('/media/%2e%2e/settings.py').status_code, 400)
+        self.assertEqual(self.client.post('/media/docs/report.pdf').status_code, 405)
@@ -0,0 +1,189 @@
+import hashlib
+import io
+import logging
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core import taxonomy
+from core.caching import bump_version
+
+from .models import VariantTask
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes; images are scaled down to fit, never up.
+PRESETS = {
+    'thumbnail': (64, 64),
+    'card': (320, 320),
+    'full': (1280, 1280),
+}
+VARIANTS_DIR = 'variants'
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = timedelta(minutes=1)
+
+# (model label, image field) -> JSON field holding its variants
+_tracked = {}
+
+
+def track(model, field, variants_field=None):
+    """Generate variants of the uploads of `model.field` and store them in `variants_field`."""
+    _tracked[model._meta.label_lower, field] = variants_field or f'{field}_variants'
+    post_save.connect(_enqueue_changed, sender=model, weak=False, dispatch_uid=f'variants:{model._meta.label_lower}')
+
+
+def variants_field_for(model, field):
+    return _tracked[model._meta.label_lower, field]
+
+
+def _changed_uploads(model, instance):
+    """The `(field, name)` of the tracked fields of `instance` whose variants are not of their current file."""
+    for (label, field), variants_field in _tracked.items():
+        if label != model._meta.label_lower:
+            continue
+        name = getattr(instance, field).name or ''
+        if name == (model._meta.get_field(field).get_default() or ''):
+            # Shared placeholders such as the default avatar.
+            continue
+        if name != (getattr(instance, variants_field) or {}).get('source', ''):
+            yield field, name
+
+
+def _enqueue_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for field, name in _changed_uploads(sender, instance):
+        enqueue(instance, field, name)
+
+
+def enqueue(instance, field, source):
+    VariantTask.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=str(instance.pk),
+        field=field,
+        defaults={'source': source, 'status': VariantTask.PENDING, 'attempts': 0,
+                  'next_attempt_at': timezone.now(), 'last_error': ''},
+    )
+
+
+def enqueue_changed(model, instances):
+    """
+    The counterpart of the post_save handler for `instances` written with
+    bulk_create or bulk_update, which send no signals: one insert for the whole
+    batch, resetting the tasks already queued for the same fields.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    tasks = [
+        VariantTask(content_type=content_type, object_id=str(instance.pk), field=field, source=name,
+                    next_attempt_at=timezone.now())
+        for instance in instances for field, name in _changed_uploads(model, instance)
+    ]
+    if tasks:
+        VariantTask.objects.bulk_create(
+            tasks, update_conflicts=True, unique_fields=['content_type', 'object_id', 'field'],
+            update_fields=['source', 'status', 'attempts', 'next_attempt_at', 'last_error'])
+
+
+def _store(image, image_format):
+    """
+    Save `image` under a name derived from its encoded bytes, once per content. Variants
+    go to the default storage even when the original is a blob, as they are not
+    reference-counted.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **SAVE_OPTIONS[image_format])
+    data = buffer.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'{VARIANTS_DIR}/{digest[:2]}/{digest[2:34]}.{EXTENSIONS[image_format]}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def build_variants(field_file):
+    """Encode every preset of `field_file` as WebP plus JPEG (or PNG when it has transparency)."""
+    with field_file.open('rb') as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    formats = ('WEBP', 'PNG' if has_alpha else 'JPEG')
+
+    variants = {'source': field_file.name, 'width': image.width, 'height': image.height}
+    for preset, size in PRESETS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+        for image_format in formats:
+            entry[EXTENSIONS[image_format]] = _store(resized, image_format)
+        variants[preset] = entry
+    return variants
+
+
+def process(task):
+    model = task.content_type.model_class()
+    variants_field = variants_field_for(model, task.field)
+    instance = model._default_manager.filter(pk=task.object_id).first()
+    if instance is not None:
+        field_file = getattr(instance, task.field)
+        if field_file.name == task.source:
+            variants = build_variants(field_file) if field_file.name else {}
+            # Skipped if the file was replaced meanwhile; its own task takes over.
+            updated = model._default_manager.filter(pk=instance.pk, **{task.field: task.source}).update(
+                **{variants_field: variants})
+            if updated:
+                _variants_written(model)
+    VariantTask.objects.filter(pk=task.pk, source=task.source, status=VariantTask.PENDING).update(
+        status=VariantTask.DONE, processed_at=timezone.now(), attempts=task.attempts + 1)
+
+
+def _variants_written(model):
+    """
+    The variants are written with a queryset update, which sends no signals, so the
+    caches and ETags of the responses showing them are invalidated here.
+    """
+    bump_version('jobs')
+    for cache in taxonomy.TAXONOMIES:
+        if cache.label.lower() == model._meta.label_lower:
+            cache.invalidate()
+
+
+def process_pending(limit=50):
+    """Generate the variants of up to `limit` due uploads. Returns `(done, failed)`."""
+    tasks = (VariantTask.objects.filter(status=VariantTask.PENDING, next_attempt_at__lte=timezone.now())
+             .select_related('content_type').order_by('next_attempt_at', 'id')[:limit])
+    done = failed = 0
+    for task in tasks:
+        try:
+            process(task)
+        except Exception as error:
+            failed += 1
+            _record_failure(task, error)
+        else:
+            done += 1
+    return done, failed
+
+
+def _record_failure(task, error):
+    task.attempts += 1
+    task.last_error = f'{type(error).__name__}: {error}'
+    if task.attempts >= MAX_ATTEMPTS or isinstance(error, (FileNotFoundError, Image.UnidentifiedImageError)):
+        task.status = VariantTask.FAILED
+        logger.error("Giving up on image variants for %s: %s", task, error)
+    else:
+        task.next_attempt_at = timezone.now() + BASE_BACKOFF * (2 ** (task.attempts - 1))
+        logger.warning("Image variants for %s failed (attempt %d): %s", task, task.attempts, error)
+    task.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
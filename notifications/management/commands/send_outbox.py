@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Send the queued outbox emails over a single SMTP connection. Several workers can run at once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages sent per connection.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new messages.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_pending(limit=options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} message(s), {failed} failed.')
+            if not options['loop']:
+                break
+            # Drain a full batch right away; otherwise wait for new messages.
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
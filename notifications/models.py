@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxMessage(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name=_('Subject'))
+    body = models.TextField(blank=True, verbose_name=_('Body'),
+                            help_text=_('Plain text body, used when no template is given.'))
+    template = models.CharField(max_length=255, blank=True, verbose_name=_('Template'),
+                                help_text=_('HTML template rendered when the message is sent.'))
+    context = models.JSONField(default=dict, blank=True, verbose_name=_('Context'))
+    from_email = models.CharField(max_length=255, verbose_name=_('From'))
+    to = models.JSONField(default=list, verbose_name=_('To'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name=_('Status'))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_('Attempts'))
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name=_('Next attempt at'))
+    last_error = models.TextField(blank=True, verbose_name=_('Last error'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+    sent_at = models.DateTimeField(blank=True, null=True, verbose_name=_('Sent at'))
+
+    class Meta:
+        verbose_name = _('Outbox message')
+        verbose_name_plural = _('Outbox messages')
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.to)} ({self.status})'
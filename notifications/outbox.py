@@ -0,0 +1,143 @@
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import models
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+BASE_BACKOFF = timedelta(minutes=1)
+MAX_BACKOFF = timedelta(hours=6)
+# How long a claimed message is left to its worker before another one may send it.
+SEND_LEASE = timedelta(minutes=10)
+
+
+def _dump_context(context):
+    """Store model instances by reference so templates see fresh rows when rendered."""
+    dumped = {}
+    for key, value in (context or {}).items():
+        if isinstance(value, models.Model):
+            dumped[key] = {'__model__': value._meta.label_lower, 'pk': str(value.pk)}
+        else:
+            dumped[key] = value
+    return dumped
+
+
+def _load_context(context):
+    loaded = {}
+    for key, value in context.items():
+        if isinstance(value, dict) and '__model__' in value:
+            model = apps.get_model(value['__model__'])
+            value = model._default_manager.filter(pk=value['pk']).first()
+        loaded[key] = value
+    return loaded
+
+
+def enqueue(subject, to, body='', template='', context=None, from_email=None):
+    """
+    Queue an email for the outbox worker. Called inside the caller's transaction, so
+    the message only exists if the change it announces is committed.
+    """
+    recipients = [address for address in ([to] if isinstance(to, str) else to) if address]
+    if not recipients:
+        return None
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        template=template,
+        context=_dump_context(context),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=recipients,
+    )
+
+
+def build_email(message, connection=None):
+    if message.template:
+        html = render_to_string(message.template, _load_context(message.context))
+        email = EmailMultiAlternatives(message.subject, strip_tags(html), message.from_email, message.to,
+                                       connection=connection)
+        email.attach_alternative(html, 'text/html')
+    else:
+        email = EmailMultiAlternatives(message.subject, message.body, message.from_email, message.to,
+                                       connection=connection)
+    return email
+
+
+def backoff(attempts):
+    return min(BASE_BACKOFF * (2 ** (attempts - 1)), MAX_BACKOFF)
+
+
+def due_messages(limit):
+    queryset = OutboxMessage.objects.filter(status=OutboxMessage.PENDING, next_attempt_at__lte=timezone.now())
+    return queryset.order_by('next_attempt_at', 'id')[:limit]
+
+
+def claim(message):
+    """
+    Lease a due `message` to this worker by moving its next attempt SEND_LEASE ahead.
+    Only one of several workers that read it changes the row; the others skip it. A
+    worker that dies mid-send leaves it to be retried when the lease runs out.
+    """
+    lease = timezone.now() + SEND_LEASE
+    claimed = OutboxMessage.objects.filter(
+        pk=message.pk, status=OutboxMessage.PENDING, next_attempt_at=message.next_attempt_at,
+    ).update(next_attempt_at=lease)
+    if claimed:
+        message.next_attempt_at = lease
+    return bool(claimed)
+
+
+def send_pending(limit=100):
+    """
+    Send up to `limit` due messages over one SMTP connection, claiming each first so
+    that several workers can run side by side. Failed sends are retried with
+    exponential backoff until MAX_ATTEMPTS. Returns `(sent, failed)`.
+    """
+    messages = list(due_messages(limit))
+    if not messages:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        for message in messages:
+            if not claim(message):
+                continue
+            try:
+                connection.open()
+                build_email(message, connection).send()
+            except Exception as error:
+                failed += 1
+                _record_failure(message, error)
+                # The connection may be broken; the next message reopens it.
+                connection.close()
+            else:
+                sent += 1
+                message.status = OutboxMessage.SENT
+                message.attempts += 1
+                message.sent_at = timezone.now()
+                message.last_error = ''
+                message.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(message, error):
+    message.attempts += 1
+    message.last_error = f'{type(error).__name__}: {error}'
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = OutboxMessage.FAILED
+        logger.error("Giving up on outbox message %s after %d attempts: %s", message.pk, message.attempts, error)
+    else:
+        message.next_attempt_at = timezone.now() + backoff(message.attempts)
+        logger.warning("Outbox message %s failed (attempt %d): %s", message.pk, message.attempts, error)
+    message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
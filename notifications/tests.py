@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from companies.models import Company
+
+from . import outbox
+from .models import OutboxMessage
+
+
+class OutboxTests(TestCase):
+    def test_company_creation_queues_instead_of_sending(self):
+        Company.objects.create(name='Acme', slug='acme', email='hr@acme.example')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.PENDING).count(), 2)
+
+    def test_worker_renders_templates_and_sends(self):
+        company = Company.objects.create(name='Acme', slug='acme', email='hr@acme.example')
+        self.assertEqual(outbox.send_pending(), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        welcome = next(message for message in mail.outbox if message.to == [company.email])
+        self.assertIn('Acme', welcome.alternatives[0][0])
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.SENT).exists())
+        self.assertEqual(outbox.send_pending(), (0, 0))
+
+    def test_failed_send_is_retried_with_backoff(self):
+        message = outbox.enqueue(subject='Hello', body='Hi', to=['someone@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            self.assertEqual(outbox.send_pending(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.PENDING, 1))
+        self.assertGreater(message.next_attempt_at, message.created_at)
+        # Not due yet.
+        self.assertEqual(outbox.send_pending(), (0, 0))
+
+    def test_workers_claim_messages_before_sending(self):
+        for index in range(2):
+            outbox.enqueue(subject='Hello', body='Hi', to=[f'someone{index}@example.com'])
+        # What a second worker read at the same time.
+        stale = list(outbox.due_messages(10))
+        self.assertEqual(outbox.send_pending(), (2, 0))
+        with mock.patch.object(outbox, 'due_messages', return_value=stale):
+            self.assertEqual(outbox.send_pending(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_claims_of_dead_workers_expire(self):
+        message = outbox.enqueue(subject='Hello', body='Hi', to=['someone@example.com'])
+        self.assertTrue(outbox.claim(message))
+        self.assertEqual(outbox.send_pending(), (0, 0))
+        later = timezone.now() + outbox.SEND_LEASE
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(outbox.send_pending(), (1, 0))